@@ -0,0 +1,211 @@
+# batch.py
+"""
+디렉터리 안의 대화방 내보내기를 프로세스 풀로 한꺼번에 분석해서 요약 하나로 모으기.
+
+    python -m batch EXPORT_DIR [-o OUT] [--workers N] [--memory-mb MB] [--reports] [--no-cache] [--as-of YYYY-MM-DD]
+
+EXPORT_DIR 바로 아래의 .txt 파일 하나가 방 하나이고, 하위 디렉터리 하나는
+(같은 방을 여러 번 내보낸 .txt들을 합친) 방 하나다.
+방마다 워커 프로세스에서 loader.load_exports(파싱 + 통계, 디스크 캐시 사용)를 한 번 돌려
+요약(메시지 수, 활동 사용자, 입장/퇴장, 최근 30일 추세)을 만들고, OUT에 summary.csv / summary.json을 쓴다.
+--reports면 방마다 OUT/rooms/<방>/ 아래에 report.py와 같은 CSV/JSON/PNG도 쓴다.
+
+동시에 처리 중인 방들의 예상 메모리(파일 크기 * MEMORY_PER_FILE_BYTE)가 --memory-mb를 넘지 않게
+큰 방부터 제출하고, 깨진 파일은 그 방만 error로 기록하고 계속한다.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+import time
+from bisect import bisect_right
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from loader import load_exports
+from message_table import KIND_JOIN, KIND_LEAVE, MINUTES_PER_DAY, from_minutes, to_minutes
+
+MEMORY_PER_FILE_BYTE = 3      # 방 하나를 분석할 때 파일 크기 대비 대략적인 최대 메모리 (열 배열 + 통계 + 캐시 저장)
+DEFAULT_MEMORY_MB = 2048
+TREND_DAYS = 30               # 최근 N일 vs 그 전 N일
+
+SUMMARY_COLUMNS = (
+    "room", "files", "messages", "users", "active_users", "active_users_recent", "joins", "leaves",
+    "first_message_time", "last_message_time", "messages_recent", "messages_previous", "trend_pct",
+    "seconds", "error",
+)
+
+
+def find_rooms(export_dir):
+    """
+    EXPORT_DIR -> [(방 이름, [파일 경로])] (이름순). .txt 파일 하나 또는 .txt가 든 하위 디렉터리 하나가 방 하나
+    """
+    rooms = []
+    for entry in sorted(os.scandir(export_dir), key=lambda e: e.name):
+        if entry.is_file() and entry.name.lower().endswith(".txt"):
+            rooms.append((os.path.splitext(entry.name)[0], [entry.path]))
+        elif entry.is_dir():
+            paths = sorted(
+                e.path for e in os.scandir(entry.path) if e.is_file() and e.name.lower().endswith(".txt")
+            )
+            if paths:
+                rooms.append((entry.name, paths))
+    return rooms
+
+def room_summary(messages, user_stats, as_of):
+    """
+    한 방의 요약 dict. 최근 추세는 as_of 기준 직전 TREND_DAYS일과 그 전 TREND_DAYS일의 메시지 수 비교
+    """
+    rows = messages.message_rows()
+    kinds = messages.kinds
+    end = to_minutes(as_of)
+    window = TREND_DAYS * MINUTES_PER_DAY
+    i, j = messages.message_span_by_minutes(end - window + 1, end)
+    h, _ = messages.message_span_by_minutes(end - 2 * window + 1, end - window)
+    n_recent, n_previous = j - i, i - h
+    return {
+        "messages": len(rows),
+        "users": len(user_stats),
+        "active_users": sum(1 for st in user_stats.values() if st.message_count),
+        "active_users_recent": int(np.count_nonzero(np.bincount(messages.user_ids[rows[i:j]], minlength=1))),
+        "joins": int(np.count_nonzero(kinds == KIND_JOIN)),
+        "leaves": int(np.count_nonzero(kinds == KIND_LEAVE)),
+        "first_message_time": from_minutes(messages.minutes[rows[0]]).isoformat(sep=" ") if len(rows) else "",
+        "last_message_time": from_minutes(messages.minutes[rows[-1]]).isoformat(sep=" ") if len(rows) else "",
+        "messages_recent": n_recent,
+        "messages_previous": n_previous,
+        "trend_pct": round(100.0 * (n_recent - n_previous) / n_previous, 1) if n_previous else "",
+    }
+
+def analyze_room(name, paths, as_of, use_cache=True, report_dir=None):
+    """
+    워커 프로세스에서 방 하나 분석 (파일은 한 번만 읽는다). 예외는 잡아서 error 칸에 넣는다
+    """
+    started = time.perf_counter()
+    result = {"room": name, "files": len(paths)}
+    try:
+        messages, user_stats = load_exports(paths, workers=1, use_cache=use_cache)
+        result.update(room_summary(messages, user_stats, as_of))
+        if report_dir is not None:
+            from report import write_charts, write_user_stats
+            os.makedirs(report_dir, exist_ok=True)
+            write_user_stats(user_stats, report_dir)
+            write_charts(messages, report_dir)
+    except Exception as e:
+        result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = round(time.perf_counter() - started, 3)
+    return result
+
+def run_batch(rooms, out_dir, workers=None, memory_mb=DEFAULT_MEMORY_MB, as_of=None, use_cache=True,
+              reports=False, progress=None):
+    """
+    rooms([(방 이름, [경로])])를 프로세스 풀로 분석해서 방 이름순 요약 목록을 반환.
+    예상 메모리 합이 memory_mb를 넘지 않는 만큼만 동시에 제출한다 (한 방이 예산보다 커도 혼자서는 돈다).
+    워커가 죽어서(메모리 부족 등) 풀이 깨지면 그때 처리 중이던 방들은 새 풀에서 한 방씩 혼자 다시 돌려 보고,
+    혼자 돌려도 풀을 깨는 방만 error로 남긴다.
+    """
+    as_of = as_of or datetime.now()
+    budget = memory_mb * 1024 * 1024
+    # 큰 방부터 (끝에 큰 방 하나만 남아서 코어가 노는 것을 줄인다)
+    pending = sorted(
+        ((name, paths, sum(os.path.getsize(p) for p in paths) * MEMORY_PER_FILE_BYTE) for name, paths in rooms),
+        key=lambda room: room[2],
+    )
+    retry = []     # 풀이 깨질 때 처리 중이던 방 (어느 방이 워커를 죽였는지 모르므로 하나씩 다시 돌린다)
+    results = []
+    while pending or retry:
+        with ProcessPoolExecutor(max_workers=workers or os.cpu_count()) as pool:
+            in_flight = {}   # future -> (방 이름, 경로, 예상 메모리, 재시도인지)
+            in_use = 0
+            broken = False
+
+            def submit(room, retried=False):
+                nonlocal in_use
+                name, paths, cost = room
+                report_dir = os.path.join(out_dir, "rooms", name) if reports else None
+                future = pool.submit(analyze_room, name, paths, as_of, use_cache, report_dir)
+                in_flight[future] = (name, paths, cost, retried)
+                in_use += cost
+
+            while True:
+                if not broken:
+                    if retry:
+                        if not in_flight:
+                            submit(retry.pop(), retried=True)
+                    else:
+                        # 남은 예산에 들어가는 방 중 가장 큰 방부터 채운다 (가장 큰 방이 안 들어가도 작은 방은 낸다).
+                        # 예산보다 큰 방은 처리 중인 방이 하나도 없을 때만 혼자 낸다
+                        while pending:
+                            i = bisect_right(pending, budget - in_use, key=lambda room: room[2]) - 1
+                            if i < 0:
+                                if in_flight:
+                                    break
+                                i = len(pending) - 1
+                            submit(pending.pop(i))
+                if not in_flight:
+                    break
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                for future in done:
+                    name, paths, cost, retried = in_flight.pop(future)
+                    in_use -= cost
+                    try:
+                        result = future.result()
+                    except BrokenProcessPool:
+                        broken = True
+                        if not retried:
+                            retry.append((name, paths, cost))
+                            continue
+                        result = {"room": name, "files": len(paths), "error": "worker process died"}
+                    results.append(result)
+                    if progress is not None:
+                        progress(len(results), len(results) + len(pending) + len(retry) + len(in_flight), result)
+    results.sort(key=lambda r: r["room"])
+    return results
+
+def write_summary(results, out_dir):
+    os.makedirs(out_dir, exist_ok=True)
+    with open(os.path.join(out_dir, "summary.csv"), "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=SUMMARY_COLUMNS, restval="")
+        writer.writeheader()
+        writer.writerows(results)
+    with open(os.path.join(out_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(results, f, ensure_ascii=False, indent=1)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m batch", description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("export_dir")
+    ap.add_argument("-o", "--out", default="batch_report", help="결과를 쓸 디렉터리 (기본: batch_report)")
+    ap.add_argument("--workers", type=int, default=None, help="워커 프로세스 수 (기본: 코어 수)")
+    ap.add_argument("--memory-mb", type=int, default=DEFAULT_MEMORY_MB, help="동시에 처리 중인 방들의 예상 메모리 상한")
+    ap.add_argument("--as-of", type=lambda s: datetime.strptime(s, "%Y-%m-%d"),
+                    help=f"최근 {TREND_DAYS}일 추세의 기준일 (그날 끝까지 포함, 기본: 지금)")
+    ap.add_argument("--reports", action="store_true", help="방마다 CSV/JSON/PNG 리포트도 쓴다")
+    ap.add_argument("--no-cache", action="store_true", help="디스크 캐시를 읽지도 쓰지도 않는다")
+    args = ap.parse_args(argv)
+
+    rooms = find_rooms(args.export_dir)
+    if not rooms:
+        print(f"[ERROR] {args.export_dir}에 내보내기(.txt)가 없습니다.", file=sys.stderr)
+        return 1
+    as_of = args.as_of + timedelta(hours=23, minutes=59, seconds=59) if args.as_of else None
+
+    def progress(done, total, result):
+        status = result.get("error") or f"{result['messages']:,} messages"
+        print(f"[{done}/{total}] {result['room']}: {status}")
+
+    started = time.perf_counter()
+    results = run_batch(rooms, args.out, args.workers, args.memory_mb, as_of, not args.no_cache, args.reports, progress)
+    write_summary(results, args.out)
+    failed = sum(1 for r in results if r.get("error"))
+    print(f"{len(results)} rooms ({failed} failed) in {time.perf_counter() - started:.1f}s -> {os.path.abspath(args.out)}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
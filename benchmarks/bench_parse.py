@@ -0,0 +1,252 @@
+# benchmarks/bench_parse.py
+"""
+parse_kakao_chat 처리 속도(초당 줄 수) 측정.
+
+    python -m benchmarks.bench_parse [export.txt] [--lines N] [--repeat R] [--workers W]
+
+파일을 주지 않으면 합성 대화 데이터를 만들어 쓴다.
+기존(정규식 3개를 순서대로 시도하던) 구현과 같은 입력으로 비교하고,
+두 결과가 같은지도 확인한다.
+파일을 주면 mmap 수집 경로(ingest_kakao_mmap)도 같은 파일로 재고,
+줄 앞뒤에 유니코드 공백(전각 공백, NBSP 등)이 있을 때 str 경로와 bytes 경로 결과가 같은지는 항상 확인한다.
+--workers를 주면 parse_kakao_file 순차/병렬 파싱도 비교한다.
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+from message_table import MessageTable
+from parse_kakao import parse_kakao_chat, parse_kakao_file, ingest_kakao_mmap
+
+
+def parse_kakao_chat_baseline(chat_data):
+    """
+    비교 기준: 이전 버전의 parse_kakao_chat (컴파일 안 된 re.match 3회 순차 시도)
+    """
+    messages = []
+    date_pattern = r"^-+\s+(\d{4})년\s+(\d{1,2})월\s+(\d{1,2})일\s+[가-힣]+\s+-+$"
+    message_pattern = r"\[(.*?)\] \[(.*?)\] (.+)"
+    join_leave_pattern = r"(.*?)님이 (들어왔습니다|나갔습니다)\."
+
+    current_date = None
+
+    def parse_kakao_time(time_str):
+        period, clock = time_str.split()
+        hour, minute = map(int, clock.split(":"))
+        if period == "오후" and hour != 12:
+            hour += 12
+        if period == "오전" and hour == 12:
+            hour = 0
+        return hour, minute
+
+    for line in chat_data.split("\n"):
+        line_stripped = line.strip()
+
+        date_match = re.match(date_pattern, line_stripped)
+        if date_match:
+            year, month, day = map(int, date_match.groups())
+            current_date = datetime(year, month, day)
+            continue
+
+        join_leave_match = re.match(join_leave_pattern, line_stripped)
+        if join_leave_match:
+            user, action = join_leave_match.groups()
+            if not current_date:
+                current_date = datetime.now()
+            messages.append({"type": "system", "user": user, "action": action, "time": current_date})
+            continue
+
+        message_match = re.match(message_pattern, line_stripped)
+        if message_match:
+            if not current_date:
+                current_date = datetime.now()
+            name, time_str, msg_text = message_match.groups()
+            try:
+                h, m = parse_kakao_time(time_str)
+                msg_time = datetime(current_date.year, current_date.month, current_date.day, h, m, 0, 0)
+                messages.append({"type": "message", "user": name, "time": msg_time, "message": msg_text})
+            except ValueError:
+                print(f"[WARNING] Invalid time format: {time_str}")
+
+    return messages
+
+
+def make_synthetic_chat(n_lines, seed=0):
+    """
+    PC 버전 내보내기 형식의 합성 대화 (날짜 줄 + 메시지 + 입장/퇴장)
+    """
+    rnd = random.Random(seed)
+    users = [f"사용자{i}" for i in range(200)]
+    words = ["안녕하세요", "ㅋㅋㅋ", "오늘", "회의", "자료", "공유", "감사합니다", "네", "확인했습니다", "점심"]
+    weekdays = "월화수목금토일"
+    out = []
+    day = datetime(2020, 1, 1)
+    minute = 0
+    while len(out) < n_lines:
+        if minute >= 24 * 60 or not out:
+            if out:
+                day += timedelta(days=1)
+            minute = rnd.randint(0, 120)
+            out.append(f"--------------- {day.year}년 {day.month}월 {day.day}일 {weekdays[day.weekday()]}요일 ---------------")
+            continue
+        minute += rnd.randint(0, 6)
+        if minute >= 24 * 60:
+            continue
+        user = users[int(rnd.paretovariate(1.2)) % len(users)]
+        r = rnd.random()
+        if r < 0.01:
+            out.append(f"{user}님이 들어왔습니다.")
+        elif r < 0.02:
+            out.append(f"{user}님이 나갔습니다.")
+        else:
+            h, m = divmod(minute, 60)
+            period = "오전" if h < 12 else "오후"
+            out.append(f"[{user}] [{period} {h % 12 or 12}:{m:02d}] " + " ".join(rnd.choices(words, k=rnd.randint(1, 8))))
+    return "\n".join(out) + "\n"
+
+
+def bench(func, chat_data, repeat):
+    best = float("inf")
+    result = None
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = func(chat_data)
+        best = min(best, time.perf_counter() - t0)
+    return best, result
+
+
+def same_table(a, b):
+    columns = ("minutes", "user_ids", "kinds", "text_lens", "text_starts", "text_nbytes")
+    return (all((getattr(a, c) == getattr(b, c)).all() for c in columns)
+            and a.text_buf == b.text_buf and a.users == b.users)
+
+
+def traced(func):
+    """
+    (결과, 걸린 초, 결과 크기 MB, tracemalloc 최대 할당 MB). 시간은 tracemalloc 없이 따로 잰다
+    """
+    t0 = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - t0
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return result, elapsed, result.nbytes / 1024 ** 2, peak / 1024 ** 2
+
+def bench_mmap(path, n_lines):
+    seq, t_seq, kept_seq, peak_seq = traced(lambda: parse_kakao_file(path))
+    mm, t_mm, kept_mm, peak_mm = traced(lambda: ingest_kakao_mmap(path))
+
+    # 메모리는 재서 보여 주기만 한다. mmap 경로도 수집 후 파일 내용 전체를 bytes로 들고 있다
+    print(f"parse_kakao_file  : {t_seq:8.3f}s  {n_lines / t_seq:12,.0f} lines/s  "
+          f"table {kept_seq:8.1f}MB  peak {peak_seq:8.1f}MB")
+    print(f"ingest_kakao_mmap : {t_mm:8.3f}s  {n_lines / t_mm:12,.0f} lines/s  "
+          f"table {kept_mm:8.1f}MB  peak {peak_mm:8.1f}MB  (x{t_seq / t_mm:.2f})")
+    columns = ("minutes", "user_ids", "kinds", "text_lens")
+    return (all((getattr(seq, c) == getattr(mm, c)).all() for c in columns)
+            and seq.users == mm.users
+            and all(seq.text(i) == mm.text(i) for i in range(len(seq))))
+
+
+# 줄 앞뒤의 ASCII가 아닌 공백 (str.strip()은 걷어내므로 bytes 경로도 같아야 한다)
+WHITESPACE_LINES = [
+    "--------------- 2024년 1월 1일 월요일 ---------------",
+    "\u3000[민수] [오후 3:07] 안녕",
+    "[민수] [오후 3:08] 안녕\u3000",
+    "[영희] [오후 3:09] 잘 지내?\xa0\u2003",
+    "\xa0영희님이 들어왔습니다.\u202f",
+    "\u2028\u205f",
+    "---------------\u3000 2024년 1월 2일 화요일\u2009---------------",
+    "\x1c[민수] [오전 9:00] 좋은 아침\x1f",
+    "[철수] [오전 9:01] 끝\x85",
+    "[철수] [오전 9:02] あ",
+    "\u1680철수님이 나갔습니다.",
+]
+
+def same_records(path, chat_data):
+    """
+    parse_kakao_chat(str 경로)와 ingest_kakao_mmap(bytes 경로)의 결과가 같은지
+    """
+    seq = MessageTable.from_records(parse_kakao_chat(chat_data))
+    mm = ingest_kakao_mmap(path)
+    columns = ("minutes", "user_ids", "kinds", "text_lens")
+    return (len(seq) == len(mm)
+            and all((getattr(seq, c) == getattr(mm, c)).all() for c in columns)
+            and seq.users == mm.users
+            and all(seq.text(i) == mm.text(i) for i in range(len(seq))))
+
+def check_unicode_whitespace():
+    chat_data = "\n".join(WHITESPACE_LINES) + "\n"
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "whitespace.txt")
+        with open(path, "w", encoding="utf-8", newline="\n") as f:
+            f.write(chat_data)
+        return same_records(path, chat_data)
+
+
+def bench_parallel(path, workers, n_lines):
+    t0 = time.perf_counter()
+    seq = parse_kakao_file(path)
+    t_seq = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    par = parse_kakao_file(path, workers=workers)
+    t_par = time.perf_counter() - t0
+
+    print(f"parse_kakao_file (1 proc) : {t_seq:8.3f}s  {n_lines / t_seq:12,.0f} lines/s")
+    print(f"parse_kakao_file ({workers} proc) : {t_par:8.3f}s  {n_lines / t_par:12,.0f} lines/s  (x{t_seq / t_par:.2f})")
+    return same_table(seq, par)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("path", nargs="?")
+    ap.add_argument("--lines", type=int, default=200_000)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--workers", type=int, default=0)
+    args = ap.parse_args(argv)
+
+    if args.path:
+        with open(args.path, "r", encoding="utf-8") as f:
+            chat_data = f.read()
+    else:
+        chat_data = make_synthetic_chat(args.lines)
+    n_lines = chat_data.count("\n") + 1
+
+    t_old, old = bench(parse_kakao_chat_baseline, chat_data, args.repeat)
+    t_new, new = bench(parse_kakao_chat, chat_data, args.repeat)
+
+    print(f"lines: {n_lines:,}  messages: {len(new):,}")
+    print(f"baseline        : {t_old:8.3f}s  {n_lines / t_old:12,.0f} lines/s")
+    print(f"parse_kakao_chat: {t_new:8.3f}s  {n_lines / t_new:12,.0f} lines/s  (x{t_old / t_new:.2f})")
+    if old != new:
+        print("[WARNING] 결과가 기존 구현과 다릅니다.")
+        return 1
+
+    if not check_unicode_whitespace():
+        print("[WARNING] 유니코드 공백이 있는 줄에서 bytes 경로 결과가 str 경로와 다릅니다.")
+        return 1
+
+    if args.path and not bench_mmap(args.path, n_lines):
+        print("[WARNING] mmap 수집 결과가 parse_kakao_file과 다릅니다.")
+        return 1
+
+    if args.workers > 1:
+        if not args.path:
+            print("[INFO] 병렬 파싱 비교는 파일 경로가 필요합니다.")
+        elif not bench_parallel(args.path, args.workers, n_lines):
+            print("[WARNING] 병렬 파싱 결과가 순차 파싱과 다릅니다.")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
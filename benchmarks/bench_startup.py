@@ -0,0 +1,96 @@
+# benchmarks/bench_startup.py
+"""
+main.py 시작 시간(프로세스 시작 ~ 첫 화면을 그릴 때까지) 측정.
+
+    python -m benchmarks.bench_startup [--repeat R] [--max-ms MS] [--top N]
+
+main.py를 `python -X importtime`으로 띄우고, mainloop 대신 한 번만 화면을 그린 뒤 끝내는
+프로브를 끼워 넣어 첫 화면까지 걸린 시간과 그때까지 import 된 모듈을 잰다.
+첫 화면 전에 무거운 모듈(matplotlib, tkcalendar)이 import 되거나
+--max-ms를 넘으면 종료 코드 1 (시작 시간 회귀 검사용). 화면(DISPLAY)이 있어야 한다.
+"""
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MAIN = os.path.join(ROOT, "main.py")
+
+# 첫 화면 전에 import 되면 안 되는 모듈 (차트/달력을 처음 쓸 때나 창이 뜬 뒤 불러온다)
+LAZY_MODULES = ("matplotlib", "tkcalendar")
+
+# 자식 프로세스에서 실행할 프로브: Tk.mainloop를 "한 번 그리고 시각 출력 후 종료"로 바꾼 뒤 main.py 실행
+PROBE = r"""
+import runpy, sys, time, tkinter
+def first_paint(self, n=0):
+    self.update()
+    sys.stderr.write("first-paint %r\n" % time.time())
+    self.destroy()
+tkinter.Tk.mainloop = first_paint
+sys.path.insert(0, sys.argv[1])
+sys.argv = [sys.argv[2]]
+runpy.run_path(sys.argv[0], run_name="__main__")
+"""
+
+
+def run_once():
+    """
+    main.py를 한 번 띄워서 (첫 화면까지 초, [(누적 import 시간 us, 모듈 이름)] 최상위 import 목록, 전체 import 모듈 이름 집합)
+    """
+    started = time.time()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", PROBE, ROOT, MAIN],
+        cwd=ROOT, capture_output=True, text=True,
+    )
+    painted = None
+    top_level = []
+    modules = set()
+    for line in proc.stderr.splitlines():
+        if line.startswith("first-paint "):
+            painted = float(line.split()[1])
+        elif line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            if not cumulative.strip().isdigit():
+                continue   # 머리글 줄
+            modules.add(name.strip())
+            if not name[1:].startswith(" "):   # 들여쓰기가 없으면 최상위 import
+                top_level.append((int(cumulative), name.strip()))
+    if proc.returncode != 0 or painted is None:
+        raise RuntimeError(f"main.py 실행 실패 (exit {proc.returncode}):\n{proc.stderr[-2000:]}")
+    return painted - started, top_level, modules
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--max-ms", type=float, default=None, help="첫 화면까지 중앙값이 이보다 길면 실패")
+    ap.add_argument("--top", type=int, default=10, help="오래 걸린 최상위 import 몇 개를 보여 줄지")
+    args = ap.parse_args(argv)
+
+    times = []
+    for _ in range(args.repeat):
+        elapsed, top_level, modules = run_once()
+        times.append(elapsed)
+
+    median_ms = statistics.median(times) * 1000
+    print(f"first paint: median {median_ms:8.1f}ms  min {min(times) * 1000:8.1f}ms  ({args.repeat} runs)")
+    print(f"imports before first paint: {len(modules)} modules, {sum(t for t, _ in top_level) / 1000:.1f}ms")
+    for cumulative, name in sorted(top_level, reverse=True)[:args.top]:
+        print(f"  {cumulative / 1000:8.1f}ms  {name}")
+
+    failed = False
+    eager = sorted(m for m in modules if m.split(".")[0] in LAZY_MODULES)
+    if eager:
+        print(f"[WARNING] 첫 화면 전에 import 됨: {', '.join(eager[:5])}{' ...' if len(eager) > 5 else ''}")
+        failed = True
+    if args.max_ms is not None and median_ms > args.max_ms:
+        print(f"[WARNING] 첫 화면까지 {median_ms:.1f}ms > {args.max_ms:.1f}ms")
+        failed = True
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,294 @@
+# benchmarks/bench_suite.py
+"""
+파이프라인 단계별 벤치마크 (처리량, 지연 시간, 최대 메모리) + 저장된 기준값과 비교.
+
+    python -m benchmarks.bench_suite [export.txt] [--size 16MB] [--seed 0] [--repeat 3]
+                                     [--save NAME] [--compare NAME] [--tolerance 0.25] [--no-memory]
+
+파일을 주지 않으면 synth_export로 같은 seed의 합성 내보내기를 임시 파일로 만들어 쓴다.
+단계: 수집(parse_kakao_chat / ingest_kakao_mmap) -> 통계(analyze_user_activity) -> 인덱스(일자별 누적,
+정렬 순열, 이름/본문 색인) -> 차트 집계(pie_top20, line_series) -> Agg 렌더링 -> 검색 지연 시간.
+시간은 repeat번 중 가장 빠른 값, 검색은 질의별 p50/p95, 메모리는 tracemalloc으로 잰 단계별 최대 할당량
+(수집 단계에는 mmap에서 복사해 두는 파일 본문도 포함된다).
+
+--save NAME은 결과를 benchmarks/baselines/NAME.json에 저장하고, --compare NAME은 그 기준값보다
+--tolerance 비율 넘게 느려진 단계가 있으면 종료 코드 1. 처리량이 있는 단계는 단위당 처리량으로 비교하고,
+처리량이 없는 단계(차트 집계/렌더링/검색)는 기준값과 입력(source, 크기, 행 수)이 같을 때만 시간으로 비교한다.
+메모리를 잴 때는 PEAK_LIMITS_MB의 단계가 상한(고정 MB + 파일 MB당 MB)을 넘어도 종료 코드 1.
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import timedelta
+
+import numpy as np
+
+from benchmarks.synth_export import WORDS, parse_size, write_export
+from parse_kakao import ingest_kakao_mmap, parse_kakao_chat
+from stats import UserSortOrders, analyze_user_activity, build_daily_user_counts
+from name_index import NameIndex
+from text_index import build_text_index
+from message_table import from_minutes
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baselines")
+MAX_STR_PARSE_BYTES = 256 * 1024 ** 2   # parse_kakao_chat은 파일 전체를 문자열로 올리므로 이보다 크면 건너뛴다
+MIN_STAGE_SECONDS = 0.2    # 짧은 단계는 repeat번을 넘어서라도 이만큼은 반복해서 가장 빠른 값을 쓴다
+NOISE_FLOOR_SECONDS = 0.01   # 기준값이 이보다 짧은 단계는 비교만 보여 주고 회귀로 치지 않는다 (측정 잡음)
+INPUT_KEYS = ("source", "file_mb", "rows")   # 이 값이 기준값과 다르면 시간끼리는 비교하지 않는다
+# 단계별 최대 메모리 상한 (고정 MB, 파일 MB당 MB). 색인은 세그먼트 단위로 만들므로 임시 메모리는
+# 파일 크기와 상관없이 일정하고, 결과 색인만 파일 크기에 비례한다 (GUI 백그라운드 스레드에서 매번 돈다)
+PEAK_LIMITS_MB = {
+    "build_text_index": (64, 1.0),
+}
+
+
+def best_time(func, repeat):
+    """
+    repeat번 (짧으면 합해서 MIN_STAGE_SECONDS가 될 때까지, 최대 1000번) 실행해서 (가장 빠른 초, 마지막 결과)
+    """
+    best = float("inf")
+    result = None
+    total = 0.0
+    n = 0
+    while n < repeat or (total < MIN_STAGE_SECONDS and n < 1000):
+        t0 = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - t0
+        best = min(best, elapsed)
+        total += elapsed
+        n += 1
+    return best, result
+
+def peak_bytes(func):
+    """
+    func 한 번 실행하는 동안 tracemalloc으로 잰 최대 할당 바이트 (numpy 배열 포함)
+    """
+    tracemalloc.start()
+    try:
+        func()
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+def latencies(func, args):
+    """
+    args 각각으로 func를 한 번씩 불러서 (p50 ms, p95 ms)
+    """
+    times = []
+    for a in args:
+        t0 = time.perf_counter()
+        func(a)
+        times.append((time.perf_counter() - t0) * 1000)
+    times.sort()
+    return statistics.median(times), times[min(len(times) - 1, int(len(times) * 0.95))]
+
+
+def run_suite(path, repeat=3, memory=True):
+    """
+    path 내보내기로 모든 단계를 재서 {단계: {seconds, throughput, unit, [p50_ms, p95_ms], [peak_mb]}}
+    """
+    size = os.path.getsize(path)
+    mb = size / 1024 ** 2
+    results = {}
+
+    def stage(name, func, amount=None, unit=None):
+        seconds, result = best_time(func, repeat)
+        entry = {"seconds": round(seconds, 6)}
+        if amount is not None:
+            entry.update(throughput=round(amount / seconds, 1), unit=unit)
+        if memory:
+            entry["peak_mb"] = round(peak_bytes(func) / 1024 ** 2, 1)
+        results[name] = entry
+        return result
+
+    # 수집
+    if size <= MAX_STR_PARSE_BYTES:
+        with open(path, "r", encoding="utf-8") as f:
+            chat_data = f.read()
+        n_lines = chat_data.count("\n") + 1
+        stage("parse_kakao_chat", lambda: parse_kakao_chat(chat_data), n_lines, "lines/s")
+        del chat_data
+    messages = stage("ingest_kakao_mmap", lambda: ingest_kakao_mmap(path), mb, "MB/s")
+    n_rows = len(messages)
+
+    # 통계 / 인덱스
+    user_stats = stage("analyze_user_activity", lambda: analyze_user_activity(messages), n_rows, "rows/s")
+    daily_counts = stage("build_daily_user_counts", lambda: build_daily_user_counts(messages), n_rows, "rows/s")
+    stage("UserSortOrders", lambda: UserSortOrders(user_stats), len(user_stats), "users/s")
+    name_index = stage("NameIndex", lambda: NameIndex(user_stats), len(user_stats), "users/s")
+    text_index = stage("build_text_index", lambda: build_text_index(messages), n_rows, "rows/s")
+
+    # 차트 집계 (캐시를 비우고 잰다) / 렌더링
+    from chart_figures import (
+        ChartFigure, aggregate_cache, draw_pie, line_series, pie_top20, update_daily_lines, use_korean_font,
+    )
+    use_korean_font()
+    rows = messages.message_rows()
+    last = from_minutes(messages.minutes[rows[-1]])
+    month = (last - timedelta(days=30), last)
+
+    def uncached(func):
+        def run():
+            aggregate_cache.clear()
+            return func()
+        return run
+    top_20, _ = stage("pie_top20(all)", uncached(lambda: pie_top20(messages, None, None)))
+    stage("pie_top20(30d, daily_counts)", uncached(lambda: pie_top20(messages, *month, daily_counts)))
+    series = stage("line_series(all)", uncached(lambda: line_series(messages, None, None)))
+
+    def render_pie():
+        figure = ChartFigure(figsize=(5, 4))
+        draw_pie(figure, top_20, "pie")
+    def render_line():
+        figure = ChartFigure(figsize=(5, 4), layout="tight")
+        days, day_counts, ma_vals, title, _ = series
+        update_daily_lines(figure, days, day_counts, ma_vals, 30, 'Daily Count', title)
+        figure.draw()
+    stage("render_pie", render_pie)
+    stage("render_line", render_line)
+
+    # 검색 지연 시간
+    queries = WORDS + [a + " " + b for a, b in zip(WORDS, WORDS[1:])]
+    p50, p95 = latencies(text_index.search, queries)
+    results["text_search"] = {"queries": len(queries), "p50_ms": round(p50, 3), "p95_ms": round(p95, 3)}
+    name_queries = [name[:k] for name in list(user_stats)[:50] for k in (1, 2, 3)]
+    p50, p95 = latencies(name_index.search, name_queries)
+    results["name_search"] = {"queries": len(name_queries), "p50_ms": round(p50, 3), "p95_ms": round(p95, 3)}
+
+    return {
+        "meta": {
+            "file_mb": round(mb, 1),
+            "rows": n_rows,
+            "users": len(user_stats),
+            "repeat": repeat,
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+
+
+def _cost(entry):
+    # 비교 기준 (초): 일반 단계는 시간, 검색은 p95
+    return entry["seconds"] if "seconds" in entry else entry["p95_ms"] / 1000
+
+def input_mismatch(report, baseline):
+    """
+    report와 baseline의 입력이 다른 항목 목록 [(키, 지금 값, 기준값)]
+    """
+    meta, base_meta = report["meta"], baseline["meta"]
+    return [(k, meta.get(k), base_meta.get(k)) for k in INPUT_KEYS if meta.get(k) != base_meta.get(k)]
+
+def _slowdown(entry, base, same_input):
+    """
+    기준값 대비 몇 배 느린지 (1보다 크면 느려짐). 처리량이 있으면 단위당 처리량으로,
+    없으면 입력이 같을 때만 시간으로 비교한다. 비교할 수 없으면 None
+    """
+    if entry.get("throughput") and base.get("throughput") and entry.get("unit") == base.get("unit"):
+        return base["throughput"] / entry["throughput"]
+    if same_input and _cost(base):
+        return _cost(entry) / _cost(base)
+    return None
+
+def print_results(report, baseline=None, tolerance=0.25):
+    """
+    단계별 결과 표. baseline이 있으면 비율도 보여 주고, tolerance 넘게 느려진 단계 이름 목록을 반환
+    """
+    meta = report["meta"]
+    print(f"file: {meta['file_mb']}MB  rows: {meta['rows']:,}  users: {meta['users']:,}  (best of {meta['repeat']})")
+    regressions = []
+    base_results = baseline["results"] if baseline else {}
+    same_input = True
+    if baseline:
+        mismatch = input_mismatch(report, baseline)
+        same_input = not mismatch
+        for key, value, base_value in mismatch:
+            print(f"[WARNING] 기준값과 입력이 다릅니다: {key} {value!r} vs {base_value!r}")
+        if mismatch:
+            print("[WARNING] 처리량이 있는 단계만 단위당 처리량으로 비교합니다")
+    for name, entry in report["results"].items():
+        if "seconds" in entry:
+            line = f"{name:30s} {entry['seconds'] * 1000:10.1f}ms"
+            if "throughput" in entry:
+                line += f"  {entry['throughput']:14,.1f} {entry['unit']}"
+            if "peak_mb" in entry:
+                line += f"  peak {entry['peak_mb']:8.1f}MB"
+        else:
+            line = f"{name:30s} p50 {entry['p50_ms']:8.3f}ms  p95 {entry['p95_ms']:8.3f}ms  ({entry['queries']} queries)"
+        base = base_results.get(name)
+        ratio = None if base is None else _slowdown(entry, base, same_input)
+        if ratio is not None:
+            line += f"  x{ratio:.2f} vs baseline"
+            if ratio > 1 + tolerance and _cost(base) >= NOISE_FLOOR_SECONDS:
+                line += "  [SLOWER]"
+                regressions.append(name)
+        elif base is not None:
+            line += "  (not compared: different input)"
+        print(line)
+    return regressions
+
+
+def over_peak_limits(report):
+    """
+    PEAK_LIMITS_MB 상한을 넘은 [(단계, 최대 MB, 상한 MB)] (메모리를 재지 않았으면 빈 목록)
+    """
+    file_mb = report["meta"]["file_mb"]
+    over = []
+    for name, (fixed, per_mb) in PEAK_LIMITS_MB.items():
+        peak = report["results"].get(name, {}).get("peak_mb")
+        limit = fixed + per_mb * file_mb
+        if peak is not None and peak > limit:
+            over.append((name, peak, limit))
+    return over
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("path", nargs="?")
+    ap.add_argument("--size", type=parse_size, default=parse_size("16MB"), help="합성 파일 크기 (파일을 안 줄 때)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--save", metavar="NAME", help="결과를 baselines/NAME.json으로 저장")
+    ap.add_argument("--compare", metavar="NAME", help="baselines/NAME.json과 비교")
+    ap.add_argument("--tolerance", type=float, default=0.25, help="이 비율 넘게 느려지면 회귀로 본다")
+    ap.add_argument("--no-memory", action="store_true", help="tracemalloc 메모리 측정을 건너뛴다")
+    args = ap.parse_args(argv)
+
+    baseline = None
+    if args.compare:
+        with open(os.path.join(BASELINE_DIR, args.compare + ".json"), "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = args.path
+        if path is None:
+            path = os.path.join(tmp, "synthetic.txt")
+            t0 = time.perf_counter()
+            written, _ = write_export(path, args.size, args.seed)
+            print(f"generated {written / 1024 ** 2:.1f}MB (seed {args.seed}) in {time.perf_counter() - t0:.1f}s")
+        report = run_suite(path, args.repeat, memory=not args.no_memory)
+    report["meta"].update(source=args.path or f"synthetic:{args.size}:{args.seed}")
+
+    regressions = print_results(report, baseline, args.tolerance)
+    over = over_peak_limits(report)
+    for name, peak, limit in over:
+        print(f"[WARNING] {name} 최대 메모리 {peak:.1f}MB > 상한 {limit:.1f}MB")
+    if args.save:
+        os.makedirs(BASELINE_DIR, exist_ok=True)
+        with open(os.path.join(BASELINE_DIR, args.save + ".json"), "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+    if regressions:
+        print(f"[WARNING] 기준값보다 {args.tolerance:.0%} 넘게 느려진 단계: {', '.join(regressions)}")
+    return 1 if regressions or over else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,171 @@
+# benchmarks/synth_export.py
+"""
+벤치마크/검증용 합성 카카오톡 PC 내보내기 파일 만들기 (seed가 같으면 바이트 단위로 같은 파일).
+
+    python -m benchmarks.synth_export OUT.txt [--size 64MB] [--seed 0] [--users 300]
+
+- 머리글("... 님과 카카오톡 대화", "저장한 날짜 : ...") + 날짜 줄 + [이름] [오전/오후 h:mm] 메시지 + 입장/퇴장
+- 사용자별 활동량은 파레토 분포로 치우치고(소수가 대부분을 말함), 하루 중 시간대/요일/장기 추세/가끔 폭주하는 날이 있다
+- 메시지는 한글 단어/이모티콘/링크/사진 등이고, 가끔 여러 줄 메시지(이어지는 줄)가 섞인다
+- 크기는 1MB ~ 수 GB까지 하루치씩 파일에 바로 써서 메모리를 거의 쓰지 않는다
+"""
+import argparse
+import math
+import random
+import sys
+from datetime import datetime, timedelta
+
+SURNAMES = "김이박최정강조윤장임한오서신권황안송류홍"
+GIVEN = ["민준", "서연", "도윤", "지우", "하은", "시우", "서윤", "예준", "지호", "수아",
+         "주원", "지유", "하준", "채원", "은우", "지민", "현우", "다은", "건우", "유진"]
+WORDS = ["안녕하세요", "네", "넵", "감사합니다", "확인했습니다", "오늘", "내일", "회의", "자료", "공유",
+         "점심", "저녁", "뭐해요", "진짜", "대박", "그렇네요", "좋아요", "언제", "어디서", "몇시에",
+         "주말에", "다들", "혹시", "이거", "사진", "보내드릴게요", "잠시만요", "수고하셨습니다", "ㅎㅎ", "ㅠㅠ"]
+STICKERS = ["ㅋㅋㅋ", "ㅋㅋㅋㅋㅋㅋ", "이모티콘", "사진", "동영상", "(하트)", "(굿)", "^^"]
+LINKS = ["https://example.com/notice", "https://youtu.be/dQw4w9WgXcQ", "https://map.kakao.com/?q=%EC%A0%90%EC%8B%AC"]
+WEEKDAYS = "월화수목금토일"
+# 시간대별 상대 활동량 (0시~23시)
+HOUR_WEIGHTS = [3, 2, 1, 1, 1, 1, 2, 4, 7, 9, 10, 10, 12, 11, 10, 10, 10, 11, 12, 13, 14, 13, 10, 6]
+
+UNITS = {"KB": 1024, "MB": 1024 ** 2, "GB": 1024 ** 3}
+
+
+def parse_size(text):
+    """
+    "64MB" / "2GB" / "1048576" -> 바이트 수
+    """
+    text = text.strip().upper()
+    for unit, scale in UNITS.items():
+        if text.endswith(unit):
+            return int(float(text[:-len(unit)]) * scale)
+    return int(text)
+
+def _message_text(rnd):
+    r = rnd.random()
+    if r < 0.08:
+        return rnd.choice(STICKERS)
+    if r < 0.10:
+        return rnd.choice(WORDS) + " " + rnd.choice(LINKS)
+    n = min(int(rnd.expovariate(0.25)) + 1, 40)   # 짧은 말이 대부분, 가끔 긴 말
+    text = " ".join(rnd.choices(WORDS, k=n))
+    if rnd.random() < 0.3:
+        text += " " + rnd.choice(STICKERS)
+    return text
+
+class ExportGenerator:
+    """
+    하루 단위로 내보내기 줄을 만든다. 같은 seed면 같은 줄이 나온다.
+    """
+    def __init__(self, seed=0, n_users=300, start=datetime(2019, 1, 1), room="벤치마크 대화방"):
+        self.rnd = random.Random(seed)
+        self.room = room
+        self.day = start
+        self.day_index = 0
+        self.members = []      # 지금 방에 있는 사용자 이름
+        self.activity = {}     # 이름 -> 활동 가중치 (파레토)
+        self.n_created = 0
+        for _ in range(n_users):
+            self.members.append(self._new_user())
+
+    def _new_user(self):
+        rnd = self.rnd
+        self.n_created += 1
+        name = rnd.choice(SURNAMES) + rnd.choice(GIVEN)
+        if name in self.activity:
+            name += str(self.n_created)   # 이름이 겹치지 않게
+        self.activity[name] = rnd.paretovariate(1.16)
+        return name
+
+    def header(self):
+        return [f"{self.room} 님과 카카오톡 대화", f"저장한 날짜 : {self.day:%Y-%m-%d} 오전 9:00", ""]
+
+    def next_day(self):
+        """
+        하루치 줄 목록 (날짜 줄 포함)
+        """
+        rnd = self.rnd
+        day = self.day
+        lines = [f"--------------- {day.year}년 {day.month}월 {day.day}일 {WEEKDAYS[day.weekday()]}요일 ---------------"]
+
+        # 입장/퇴장 (날짜 줄 바로 뒤 = 그날 00:00으로 기록된다)
+        for _ in range(rnd.choices((0, 1, 2, 3), (70, 20, 7, 3))[0]):
+            name = self._new_user()
+            self.members.append(name)
+            lines.append(f"{name}님이 들어왔습니다.")
+        if len(self.members) > 10:
+            for _ in range(rnd.choices((0, 1, 2), (78, 18, 4))[0]):
+                name = self.members.pop(rnd.randrange(len(self.members)))
+                lines.append(f"{name}님이 나갔습니다.")
+
+        # 그날 메시지 수: 기본 * 장기 추세 * 요일 * 가끔 폭주
+        trend = 1.0 + 0.5 * math.sin(self.day_index / 180.0) + self.day_index / 2000.0
+        weekday = 0.7 if day.weekday() >= 5 else 1.0
+        burst = 4.0 if rnd.random() < 0.02 else 1.0
+        n = max(int(rnd.gauss(600, 120) * trend * weekday * burst), 0)
+
+        members = self.members
+        cum = []
+        total = 0.0
+        for name in members:
+            total += self.activity[name]
+            cum.append(total)
+        speakers = rnd.choices(members, cum_weights=cum, k=n)
+        hours = rnd.choices(range(24), weights=HOUR_WEIGHTS, k=n)
+        minutes = sorted(h * 60 + rnd.randrange(60) for h in hours)
+        for speaker, minute in zip(speakers, minutes):
+            h, m = divmod(minute, 60)
+            period = "오전" if h < 12 else "오후"
+            lines.append(f"[{speaker}] [{period} {h % 12 or 12}:{m:02d}] {_message_text(rnd)}")
+            if rnd.random() < 0.02:   # 여러 줄 메시지의 이어지는 줄
+                lines.append(_message_text(rnd))
+
+        self.day += timedelta(days=1)
+        self.day_index += 1
+        return lines
+
+def write_export(path, size, seed=0, n_users=300):
+    """
+    size 바이트 이상이 될 때까지 하루씩 써서 path에 합성 내보내기를 만든다. 반환: (바이트 수, 줄 수)
+    """
+    gen = ExportGenerator(seed=seed, n_users=n_users)
+    written = n_lines = 0
+    with open(path, "wb") as f:
+        lines = gen.header()
+        while True:
+            data = ("\n".join(lines) + "\n").encode("utf-8")
+            f.write(data)
+            written += len(data)
+            n_lines += len(lines)
+            if written >= size:
+                return written, n_lines
+            lines = gen.next_day()
+
+def make_export_text(size, seed=0, n_users=300):
+    """
+    write_export와 같은 내용을 문자열로 (작은 크기용)
+    """
+    gen = ExportGenerator(seed=seed, n_users=n_users)
+    parts = ["\n".join(gen.header()) + "\n"]
+    written = len(parts[0].encode("utf-8"))
+    while written < size:
+        chunk = "\n".join(gen.next_day()) + "\n"
+        parts.append(chunk)
+        written += len(chunk.encode("utf-8"))
+    return "".join(parts)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("out")
+    ap.add_argument("--size", type=parse_size, default=parse_size("64MB"), help="목표 크기 (예: 1MB, 500MB, 2GB)")
+    ap.add_argument("--seed", type=int, default=0)
+    ap.add_argument("--users", type=int, default=300, help="처음 방에 있는 사용자 수")
+    args = ap.parse_args(argv)
+
+    written, n_lines = write_export(args.out, args.size, args.seed, args.users)
+    print(f"{args.out}: {written / 1024 ** 2:,.1f}MB, {n_lines:,} lines")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,256 @@
+# cache.py
+import hashlib
+import json
+import os
+import pickle
+import time
+
+from message_table import MessageTable
+from parse_kakao import PARSER_VERSION, read_file
+
+# 파서/통계/저장 형식이 바뀌면 올린다 (이전 캐시는 자동으로 무시·삭제됨)
+CACHE_VERSION = f"{PARSER_VERSION}.2"
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".kakaotalk_dashboard", "cache")
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3   # 캐시 디렉터리 전체 크기 상한 (LRU로 정리)
+LOCK_STALE_SECONDS = 10             # 이보다 오래된 잠금 파일은 죽은 프로세스가 남긴 것으로 보고 지운다
+
+_TABLE_COLUMNS = ("minutes", "user_ids", "kinds", "text_lens", "text_starts", "text_nbytes")
+
+
+def file_digest(path, checkpoints=None, block_size=1024 * 1024):
+    """
+    파일 내용 전체의 blake2b 해시 (hex).
+    checkpoints(바이트 크기들)를 주면 (전체 해시, {크기: 앞부분 크기만큼의 해시})를 한 번에 읽어서 구한다.
+    """
+    h = hashlib.blake2b(digest_size=20)
+    marks = sorted(set(checkpoints or ()))
+    prefix = {}
+    done = 0
+    with open(path, "rb") as f:
+        while True:
+            # 다음 checkpoint를 넘지 않게 읽는다
+            size = block_size
+            while marks and marks[0] <= done:
+                if marks[0] == done:
+                    prefix[done] = h.copy().hexdigest()
+                marks.pop(0)
+            if marks:
+                size = min(size, marks[0] - done)
+            block = f.read(size)
+            if not block:
+                break
+            h.update(block)
+            done += len(block)
+    if checkpoints is not None:
+        return h.hexdigest(), prefix
+    return h.hexdigest()
+
+
+class ExportCache:
+    """
+    파싱 결과(MessageTable + user_stats)를 디스크에 저장해 두는 캐시.
+
+    - 키: 파일 내용 해시. 같은 경로의 크기·mtime이 그대로면 index.json에 기록된 해시를 재사용해
+      다시 해싱하지 않는다.
+    - 본문 위치가 원본 파일 기준인 테이블은 본문 위치만 저장하고, 읽을 때 원본 파일을 다시 읽는다
+      (내용 해시가 같으므로 위치가 그대로 유효. 파일은 읽고 바로 닫는다).
+    - 전체 크기가 max_bytes를 넘으면 가장 오래 쓰지 않은 항목부터 지운다.
+    - 항목마다 마지막 날짜 줄 위치(tail_offset)와 그 앞까지의 행 수(tail_row)를 entries.json에 남겨서,
+      같은 방을 다시 내보낸 파일(이전 파일 + 뒤에 추가된 대화)이면 뒷부분만 다시 파싱할 수 있게 한다.
+    """
+    def __init__(self, cache_dir=None, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir or os.environ.get("KAKAO_DASHBOARD_CACHE", DEFAULT_CACHE_DIR)
+        self.max_bytes = max_bytes
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self.index_path = os.path.join(self.cache_dir, "index.json")
+        self.entries_path = os.path.join(self.cache_dir, "entries.json")
+
+    # ---- 파일 -> 내용 해시 -------------------------------------------------
+    def _load_json(self, path):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _save_json(self, path, data):
+        tmp = f"{path}.{os.getpid()}.tmp"   # 배치 실행 시 여러 프로세스가 같은 캐시를 쓴다
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def _update_json(self, path, update):
+        """
+        path JSON을 잠근 채로 다시 읽어 update(data)를 적용하고 저장.
+        배치 실행 시 여러 프로세스가 같은 캐시를 쓰므로, 읽은 뒤 쓰기 전에 다른 프로세스가 저장한 항목을
+        덮어써서 잃어버리지 않게 한다 (잠금은 O_EXCL로 만드는 .lock 파일)
+        """
+        lock = f"{path}.lock"
+        while True:
+            try:
+                os.close(os.open(lock, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                break
+            except FileExistsError:
+                try:
+                    if time.time() - os.path.getmtime(lock) > LOCK_STALE_SECONDS:
+                        self._remove(lock)
+                        continue
+                except OSError:
+                    continue   # 그 사이 풀렸다
+                time.sleep(0.005)
+        try:
+            data = self._load_json(path)
+            update(data)
+            self._save_json(path, data)
+        finally:
+            self._remove(lock)
+
+    def digest(self, path, checkpoints=None):
+        """
+        path의 내용 해시. 크기·mtime이 index.json 기록과 같으면 해싱을 건너뛴다.
+        checkpoints를 주면 (해시, {크기: 앞부분 해시})를 반환 (해싱을 건너뛰면 앞부분 해시는 비어 있음)
+        """
+        path = os.path.abspath(path)
+        st = os.stat(path)
+        rec = self._load_json(self.index_path).get(path)
+        if rec and rec["size"] == st.st_size and rec["mtime_ns"] == st.st_mtime_ns:
+            return rec["digest"] if checkpoints is None else (rec["digest"], {})
+
+        result = file_digest(path, checkpoints)
+        digest = result if checkpoints is None else result[0]
+        rec = {"size": st.st_size, "mtime_ns": st.st_mtime_ns, "digest": digest}
+        self._update_json(self.index_path, lambda index: index.update({path: rec}))
+        return result
+
+    def prefix_candidates(self, path):
+        """
+        path 앞부분이 이전 캐시 항목의 원본 파일과 같을 수 있는 후보 {크기: [항목 해시, ...]}.
+        크기가 더 작고, 그 항목의 마지막 날짜 줄이 path의 같은 위치에 그대로 있는 항목만 고른다
+        (실제 일치 여부는 앞부분 해시로 확인)
+        """
+        size = os.path.getsize(path)
+        candidates = {}
+        with open(path, "rb") as f:
+            for digest, meta in self._load_json(self.entries_path).items():
+                if meta.get("version") != CACHE_VERSION or not meta.get("tail_header"):
+                    continue
+                if not (0 < meta["file_size"] < size):
+                    continue
+                header = bytes.fromhex(meta["tail_header"])
+                f.seek(meta["tail_offset"])
+                if f.read(len(header)) == header:
+                    candidates.setdefault(meta["file_size"], []).append(digest)
+        return candidates
+
+    def entry_meta(self, digest):
+        return self._load_json(self.entries_path).get(digest)
+
+    def _entry_path(self, digest):
+        return os.path.join(self.cache_dir, f"{digest}.cache")
+
+    # ---- 조회 / 저장 -------------------------------------------------------
+    def get(self, path, digest=None):
+        """
+        캐시된 (messages, user_stats). 없거나 버전이 다르면 None
+        """
+        entry = self.load_entry(path, digest)
+        return None if entry is None else entry[:2]
+
+    def load_entry(self, path, digest=None):
+        """
+        캐시된 (messages, user_stats, prefix_stats). 없거나 버전이 다르면 None.
+        prefix_stats는 마지막 날짜 줄 앞까지(tail_row 행)의 user_stats
+        """
+        digest = digest or self.digest(path)
+        entry = self._entry_path(digest)
+        try:
+            with open(entry, "rb") as f:
+                payload = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception:
+            # 깨진 항목은 지우고 다시 만든다
+            self._remove(entry)
+            return None
+        if payload.get("version") != CACHE_VERSION:
+            self._remove(entry)
+            return None
+
+        try:
+            os.utime(entry)   # LRU: 최근 사용 시간 갱신
+        except FileNotFoundError:
+            pass   # 읽은 뒤 다른 프로세스가 정리했다 (읽은 내용은 그대로 쓸 수 있음)
+        text_buf = read_file(path) if payload["text_buf"] is None else payload["text_buf"]
+        messages = MessageTable(*(payload[c] for c in _TABLE_COLUMNS), text_buf, payload["users"])
+        return messages, payload["user_stats"], payload["prefix_stats"]
+
+    def put(self, path, messages, user_stats, digest=None, tail=None, prefix_stats=None, text_from_file=True):
+        """
+        text_from_file: messages의 본문 위치가 path 파일 기준이면(수집 경로) 본문은 저장하지 않는다
+        tail = (tail_offset, tail_row, tail_header bytes): 마지막 날짜 줄 위치 / 그 앞까지 행 수 / 그 줄 내용
+        prefix_stats = tail_row 행까지의 user_stats (이어 붙은 파일을 읽을 때 통계를 다시 계산하지 않도록)
+        """
+        digest = digest or self.digest(path)
+        payload = {
+            "version": CACHE_VERSION,
+            "users": messages.users,
+            "user_stats": user_stats,
+            "prefix_stats": prefix_stats,
+            # 원본 파일 본문은 읽을 때 파일에서 다시 읽으므로 저장하지 않는다
+            "text_buf": None if text_from_file else bytes(messages.text_buf),
+        }
+        for c in _TABLE_COLUMNS:
+            payload[c] = getattr(messages, c)
+
+        entry = self._entry_path(digest)
+        tmp = f"{entry}.{os.getpid()}.tmp"
+        with open(tmp, "wb") as f:
+            pickle.dump(payload, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, entry)
+
+        meta = {"version": CACHE_VERSION, "file_size": os.path.getsize(path)}
+        if tail is not None:
+            tail_offset, tail_row, tail_header = tail
+            meta.update(tail_offset=tail_offset, tail_row=tail_row, tail_header=tail_header.hex())
+        else:
+            meta.update(tail_offset=0, tail_row=0, tail_header="")
+        self._update_json(self.entries_path, lambda entries: entries.update({digest: meta}))
+        self.evict(keep=entry)
+
+    # ---- 정리 --------------------------------------------------------------
+    def _remove(self, entry):
+        try:
+            os.remove(entry)
+        except OSError:
+            pass
+
+    def evict(self, keep=None):
+        """
+        전체 크기가 max_bytes 이하가 될 때까지 오래 쓰지 않은 항목부터 삭제
+        """
+        entries = []
+        for name in os.listdir(self.cache_dir):
+            if name.endswith(".cache"):
+                p = os.path.join(self.cache_dir, name)
+                try:
+                    st = os.stat(p)
+                except FileNotFoundError:
+                    continue   # 다른 프로세스가 방금 지웠다
+                entries.append((st.st_mtime, st.st_size, p))
+        total = sum(size for _, size, _ in entries)
+        removed = []
+        for _, size, p in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            if p == keep:
+                continue
+            self._remove(p)
+            removed.append(os.path.basename(p)[:-len(".cache")])
+            total -= size
+
+        if removed:
+            def drop(meta):
+                for digest in removed:
+                    meta.pop(digest, None)
+            self._update_json(self.entries_path, drop)
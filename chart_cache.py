@@ -0,0 +1,40 @@
+# chart_cache.py
+from collections import OrderedDict
+
+class LRUCache:
+    """
+    메모리 예산(max_bytes) 안에서 최근에 쓴 항목만 남기는 캐시.
+    put 할 때 항목 크기를 같이 넘기고, 합이 예산을 넘으면 가장 오래 안 쓴 것부터 버린다.
+    """
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.nbytes = 0
+        self._items = OrderedDict()   # key -> (value, nbytes)
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def get(self, key):
+        item = self._items.get(key)
+        if item is None:
+            return None
+        self._items.move_to_end(key)
+        return item[0]
+
+    def put(self, key, value, nbytes):
+        if key in self._items:
+            self.nbytes -= self._items.pop(key)[1]
+        if nbytes > self.max_bytes:
+            return
+        self._items[key] = (value, nbytes)
+        self.nbytes += nbytes
+        while self.nbytes > self.max_bytes:
+            _, (_, size) = self._items.popitem(last=False)
+            self.nbytes -= size
+
+    def clear(self):
+        self._items.clear()
+        self.nbytes = 0
@@ -0,0 +1,263 @@
+# chart_figures.py
+"""
+Tk 없이 쓰는 차트 그리기 (matplotlib Figure + Agg).
+GUI(charts.py)와 헤드리스 리포트(report.py)가 같은 집계/그리기 코드를 쓴다.
+"""
+import math
+import warnings
+from datetime import datetime, timedelta
+
+import matplotlib
+import matplotlib.dates as mdates
+from matplotlib import font_manager
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+import numpy as np
+
+from message_table import EPOCH, MINUTES_PER_DAY, to_minutes
+from timeseries import daily_series, moving_average, lttb
+from stats import count_messages_by_user, top_users
+from chart_cache import LRUCache
+
+# 한글 폰트 설정
+matplotlib.rcParams['font.family'] = 'Malgun Gothic'  # Windows의 맑은 고딕 폰트
+matplotlib.rcParams['axes.unicode_minus'] = False    # 마이너스 기호 깨짐 방지
+
+# 맑은 고딕이 없는 환경(리눅스 서버 등)에서 대신 쓸 한글 폰트 후보 (앞에서부터 설치된 것을 쓴다)
+KOREAN_FONTS = ("Malgun Gothic", "NanumGothic", "NanumBarunGothic", "Noto Sans CJK KR", "Noto Sans KR", "UnDotum")
+
+# 집계 결과 캐시. 키는 (차트 종류, 데이터 버전, 정규화한 구간, ...)
+AGGREGATE_CACHE_BYTES = 32 * 1024 * 1024
+aggregate_cache = LRUCache(AGGREGATE_CACHE_BYTES)
+
+
+class ChartFigure:
+    """
+    축 하나짜리 Figure + Agg 캔버스 + 재사용하는 artist들.
+    pyplot을 거치지 않고 Figure를 직접 만들므로 pyplot의 전역 figure 목록에 쌓이지 않는다.
+    """
+    def __init__(self, figsize, layout=None):
+        self.figure = Figure(figsize=figsize, layout=layout)
+        self.ax = self.figure.add_subplot()
+        self.canvas = FigureCanvasAgg(self.figure)
+        self.artists = {}   # 차트 종류별로 재사용하는 artist들
+
+    def show_notice(self, text):
+        self.ax.clear()
+        self.artists.clear()
+        self.ax.set_axis_off()
+        self.ax.text(0.5, 0.5, text, ha="center", va="center", transform=self.ax.transAxes)
+
+    def draw(self, image_key=None):
+        self.canvas.draw()
+
+    def save(self, path, dpi=None):
+        self.figure.savefig(path, dpi=dpi)
+
+
+def use_korean_font():
+    """
+    설치된 한글 폰트 중 첫 번째로 바꾼다. 하나도 없으면 기본 글꼴로 그리고 (한글은 깨짐)
+    글자마다 나오는 폰트 없음 경고를 끈다.
+    """
+    installed = {font.name for font in font_manager.fontManager.ttflist}
+    for name in KOREAN_FONTS:
+        if name in installed:
+            matplotlib.rcParams['font.family'] = name
+            return name
+    matplotlib.rcParams['font.family'] = 'sans-serif'
+    warnings.filterwarnings("ignore", message="Glyph .* missing from font", category=UserWarning)
+    return None
+
+def period_range(period, now=None):
+    """
+    "day" / "week" / "month"(30일) -> (시작, 끝=now). 모르는 값이면 1주일
+    """
+    now = now or datetime.now()
+    span = {"day": timedelta(days=1), "week": timedelta(weeks=1), "month": timedelta(days=30)}
+    return now - span.get(period, timedelta(weeks=1)), now
+
+def pie_title(start_dt, end_dt):
+    if start_dt and end_dt:
+        return f"점유율 차트 ({start_dt.strftime('%Y-%m-%d')} ~ {end_dt.strftime('%Y-%m-%d')})"
+    return "점유율 차트 (전체 기간)"
+
+def pie_top20(messages, start_dt, end_dt, daily_counts=None):
+    """
+    기간 내 사용자별 메시지 수 상위 20명 (+기타) [(이름, 개수)]와 집계 캐시 키.
+    같은 메시지를 고르는 기간이면 캐시된 집계를 쓴다.
+    """
+    key = ("pie", messages.version, messages.message_span(start_dt, end_dt))
+    top_20 = aggregate_cache.get(key)
+    if top_20 is None:
+        user_count = count_messages_by_user(messages, start_dt, end_dt, daily_counts)
+        top_ids, sum_others = top_users(user_count, 20)
+        top_20 = [(messages.users[u], int(user_count[u])) for u in top_ids]
+        if sum_others:
+            top_20.append(("기타", sum_others))
+        aggregate_cache.put(key, top_20, 100 * (len(top_20) + 1))
+    return top_20, key
+
+def draw_pie(panel, top_20, title, image_key=None):
+    """
+    [(이름, 개수)] 파이차트 (파스텔 계열 색상 Pastel2)
+    """
+    cmap = matplotlib.colormaps['Pastel2']
+    colors = [cmap(i / len(top_20)) for i in range(len(top_20))]
+    update_pie(panel, [t[1] for t in top_20], [t[0] for t in top_20], colors, title, image_key)
+
+def line_series(messages, start_dt, end_dt):
+    """
+    기간 내 메시지의 일자별 개수 + 30일 이동평균 (메시지 없는 날도 0으로 채움).
+    반환: (days, day_counts, ma_vals, 제목, 캐시 키). 기간 안에 메시지가 없으면 None
+    """
+    rows = messages.message_rows(start_dt, end_dt)
+    if not len(rows):
+        return None
+    if start_dt and end_dt:
+        first_day = to_minutes(start_dt) // MINUTES_PER_DAY
+        last_day = to_minutes(end_dt) // MINUTES_PER_DAY
+        title = f"대화량 추이 ({start_dt.strftime('%Y-%m-%d')} ~ {end_dt.strftime('%Y-%m-%d')})"
+    else:
+        first_day = last_day = None
+        title = "대화량 추이(전체)"
+    key = ("line", messages.version, messages.message_span(start_dt, end_dt), first_day, last_day)
+    return _daily_aggregate(key, messages.minutes[rows], 30, first_day, last_day) + (title, key)
+
+def user_line_series(messages, user, user_rows):
+    """
+    user의 첫 메시지~마지막 메시지 사이 모든 날짜의 개수 + 7일 이동평균. 반환은 line_series와 같다
+    """
+    key = ("user_line", messages.version, user)
+    return _daily_aggregate(key, messages.minutes[user_rows], 7) + (f"{user}의 대화량 추이", key)
+
+def _daily_aggregate(key, minutes, ma_window, first_day=None, last_day=None):
+    """
+    일자별 개수 + 이동평균 (key로 집계 캐시에서 찾고, 없으면 계산해서 넣는다)
+    """
+    result = aggregate_cache.get(key)
+    if result is None:
+        days, day_counts = daily_series(minutes, first_day, last_day)
+        result = (days, day_counts, moving_average(day_counts, ma_window))
+        aggregate_cache.put(key, result, sum(a.nbytes for a in result))
+    return result
+
+def update_daily_lines(panel, days, day_counts, ma_vals, ma_window, daily_label, title, image_key=None):
+    """
+    일자별 개수 + 이동평균 두 선을 (처음이면 만들고) 전체 기간으로 갱신.
+    x축은 실제 날짜 축이고, 그리는 점은 보이는 구간만 축 너비(픽셀) 개수로 LTTB 다운샘플링한다.
+    휠로 확대/축소하면 (더블클릭은 전체) 보이는 구간을 전체 해상도 집계에서 다시 뽑는다.
+    """
+    ax = panel.ax
+    lines = panel.artists.get("daily_lines")
+    if lines is None:
+        daily, = ax.plot([], [], color='blue', marker='', label=daily_label)
+        ma, = ax.plot([], [], color='red', marker='', linestyle='--', label=f'{ma_window}-day MA')
+        lines = panel.artists["daily_lines"] = (daily, ma)
+        locator = mdates.AutoDateLocator()
+        ax.xaxis.set_major_locator(locator)
+        ax.xaxis.set_major_formatter(mdates.ConciseDateFormatter(locator))
+        ax.set_xlabel("Date")
+        ax.set_ylabel("Messages")
+        ax.legend()
+        ax.callbacks.connect("xlim_changed", lambda ax: _resample_daily_lines(panel))
+        panel.figure.canvas.mpl_connect("resize_event", lambda event: _resample_daily_lines(panel, force=True))
+        panel.figure.canvas.mpl_connect("scroll_event", lambda event: _zoom_daily_lines(panel, event))
+        panel.figure.canvas.mpl_connect("button_press_event", lambda event: _zoom_daily_lines(panel, event))
+
+    x = mdates.date2num(EPOCH) + days.astype(np.float64)
+    panel.artists["daily_series"] = (x, np.asarray(day_counts, dtype=np.float64), ma_vals)
+    panel.artists["daily_view"] = None
+    ax.set_xlim(*_full_xlim(x))
+    _resample_daily_lines(panel)
+    ax.set_title(title)
+    panel.draw(image_key)
+
+def _full_xlim(x):
+    # 하루뿐이면 앞뒤로 반나절씩 띄운다
+    return (x[0], x[-1]) if len(x) > 1 else (x[0] - 0.5, x[0] + 0.5)
+
+def _resample_daily_lines(panel, force=False):
+    """
+    지금 보이는 x 구간의 점만 잘라 축 너비만큼 LTTB로 줄여 선에 넣고, y축을 그 구간에 맞춘다
+    """
+    series = panel.artists.get("daily_series")
+    if series is None:
+        return
+    ax = panel.ax
+    x0, x1 = ax.get_xlim()
+    width = max(int(ax.bbox.width), 16)
+    if not force and panel.artists.get("daily_view") == (x0, x1, width):
+        return
+    panel.artists["daily_view"] = (x0, x1, width)
+
+    x, counts, ma_vals = series
+    # 보이는 구간 + 양옆 한 점씩 (선이 가장자리에서 끊기지 않게)
+    i = max(int(np.searchsorted(x, x0, side="left")) - 1, 0)
+    j = min(int(np.searchsorted(x, x1, side="right")) + 1, len(x))
+    xs = x[i:j]
+    for line, y in zip(panel.artists["daily_lines"], (counts[i:j], ma_vals[i:j])):
+        keep = lttb(xs, y, width)
+        line.set_data(xs[keep], y[keep])
+    ax.relim()
+    ax.autoscale_view(scalex=False)
+
+def _zoom_daily_lines(panel, event):
+    """
+    휠: 마우스 위치를 중심으로 x축 확대/축소 (전체 기간 밖으로는 안 나감). 더블클릭: 전체 기간
+    """
+    series = panel.artists.get("daily_series")
+    if series is None or event.inaxes is not panel.ax:
+        return
+    full_lo, full_hi = _full_xlim(series[0])
+    if event.name == "button_press_event":
+        if not event.dblclick:
+            return
+        lo, hi = full_lo, full_hi
+    else:
+        x0, x1 = panel.ax.get_xlim()
+        scale = 0.8 if event.button == "up" else 1.25
+        lo = event.xdata - (event.xdata - x0) * scale
+        hi = event.xdata + (x1 - event.xdata) * scale
+        if hi - lo < 2:   # 최소 이틀 폭
+            return
+        lo, hi = max(lo, full_lo), min(hi, full_hi)
+    panel.ax.set_xlim(lo, hi)
+    panel.figure.canvas.draw_idle()
+
+def update_pie(panel, counts, labels, colors, title, image_key=None):
+    """
+    파이차트 갱신. 조각 수가 같으면 기존 wedge의 각도/색/라벨만 바꾸고, 다르면 새로 그린다.
+    (ax.pie와 같은 배치: 반지름 1, 라벨 1.1, 퍼센트 0.6, 90도에서 반시계 방향)
+    """
+    ax = panel.ax
+    pie = panel.artists.get("pie")
+    if pie is None or len(pie[0]) != len(counts):
+        ax.clear()
+        pie = panel.artists["pie"] = ax.pie(
+            counts,
+            labels=labels,
+            autopct='%1.1f%%',
+            startangle=90,
+            colors=colors,
+            textprops={'fontsize': 8}  # 라벨 폰트 사이즈 작게
+        )
+    else:
+        wedges, texts, autotexts = pie
+        total = float(sum(counts))
+        theta1 = 90.0
+        for wedge, text, autotext, count, label, color in zip(wedges, texts, autotexts, counts, labels, colors):
+            theta2 = theta1 + 360.0 * count / total
+            wedge.set_theta1(theta1)
+            wedge.set_theta2(theta2)
+            wedge.set_facecolor(color)
+            mid = math.radians((theta1 + theta2) / 2)
+            x, y = math.cos(mid), math.sin(mid)
+            text.set_position((1.1 * x, 1.1 * y))
+            text.set_horizontalalignment('left' if x > 0 else 'right')
+            text.set_text(label)
+            autotext.set_position((0.6 * x, 0.6 * y))
+            autotext.set_text('%1.1f%%' % (100.0 * count / total))
+            theta1 = theta2
+    ax.set_title(title)
+    panel.draw(image_key)
@@ -1,89 +1,129 @@
 # charts.py
 import tkinter as tk
-import matplotlib.pyplot as plt
 from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
-from collections import defaultdict
-from datetime import datetime, timedelta
-import numpy as np
+
+from chart_cache import LRUCache
+from chart_figures import (
+    ChartFigure, period_range, pie_title, pie_top20, draw_pie,
+    line_series, user_line_series, update_daily_lines,
+)
+
+# 그려 둔 차트 이미지(Agg 버퍼 영역, RGBA) 캐시. 키는 집계 캐시 키 + 제목/크기
+IMAGE_CACHE_BYTES = 96 * 1024 * 1024
+image_cache = LRUCache(IMAGE_CACHE_BYTES)
+
+
+class ChartPanel(ChartFigure):
+    """
+    Tk 프레임 하나에 붙어 계속 재사용되는 ChartFigure (캔버스는 TkAgg).
+    다시 그릴 때는 기존 artist를 갱신한 뒤 draw_idle만 한다.
+    """
+    def __init__(self, parent, figsize, layout=None):
+        super().__init__(figsize, layout)
+        self.parent = parent
+        self.canvas = FigureCanvasTkAgg(self.figure, master=parent)
+        self.widget = self.canvas.get_tk_widget()
+        self.notice = tk.Label(parent)   # 데이터가 없을 때 캔버스 대신 보여 줄 안내
+
+    def show_notice(self, text):
+        self.widget.pack_forget()
+        self.notice.config(text=text)
+        self.notice.pack()
+
+    def draw(self, image_key=None):
+        """
+        갱신한 artist를 화면에 반영. image_key를 주면 같은 키·같은 크기로 그린 이미지가 캐시에 있을 때
+        다시 렌더링하지 않고 그 이미지를 캔버스에 바로 올리고, 없으면 그린 뒤 이미지를 캐시에 넣는다.
+        (artist는 항상 갱신해 두므로 창 크기가 바뀌어 새로 그려도 같은 차트가 나온다)
+        """
+        self.notice.pack_forget()
+        if not self.widget.winfo_ismapped():
+            self.widget.pack()
+        if image_key is None:
+            self.canvas.draw_idle()
+            return
+
+        width, height = (int(v) for v in self.figure.bbox.size)
+        key = image_key + (width, height)
+        region = image_cache.get(key)
+        if region is not None:
+            # 캐시한 픽셀을 Agg 버퍼에 되돌려 놓고 Tk 이미지로만 옮긴다 (렌더링 생략)
+            self.canvas.restore_region(region)
+            self.canvas.blit(self.figure.bbox)
+            return
+        self.canvas.draw()
+        image_cache.put(key, self.canvas.copy_from_bbox(self.figure.bbox), width * height * 4)
+
+
+_panels = {}      # Tk 프레임 경로 이름 -> ChartPanel
+_top_lists = {}   # Tk 프레임 경로 이름 -> Top 20 목록 Text
+
+def chart_panel(parent, figsize=(5, 4), layout=None):
+    """
+    parent 프레임의 ChartPanel (없으면 만든다). parent가 없어지면 패널도 닫힌다.
+    """
+    key = str(parent)
+    panel = _panels.get(key)
+    if panel is None:
+        panel = _panels[key] = ChartPanel(parent, figsize, layout)
+
+        def on_destroy(event):
+            if event.widget is parent:
+                close_chart_panel(parent)
+        parent.bind("<Destroy>", on_destroy, add="+")
+    return panel
+
+def close_chart_panel(parent):
+    """
+    parent의 패널을 목록에서 빼고 Figure를 비운다 (상세정보 창을 닫을 때 등)
+    """
+    panel = _panels.pop(str(parent), None)
+    if panel is not None:
+        panel.artists.clear()
+        panel.figure.clear()
+
+def _top_list(middle_subframe):
+    """
+    middle_subframe의 Top 20 목록 Text (처음 한 번 만들고 재사용)
+    """
+    text_top20 = _top_lists.get(str(middle_subframe))
+    if text_top20 is None or not text_top20.winfo_exists():
+        for w in middle_subframe.winfo_children():
+            w.destroy()
+        label_top20 = tk.Label(middle_subframe, text="Top 20 Users", font=("Arial", 10, "bold"))
+        label_top20.pack(pady=5)
+        text_top20 = _top_lists[str(middle_subframe)] = tk.Text(middle_subframe, width=25, height=22, font=("Arial", 10))
+        text_top20.pack()
+    return text_top20
 
 # 파이차트 (기간별 호출) -> 내부적으로 plot_pie_chart_custom 호출
-def plot_pie_chart_period(messages, left_subframe, middle_subframe, period):
+def plot_pie_chart_period(messages, left_subframe, middle_subframe, period, daily_counts=None):
     """
     1일 / 1주 / 1개월 간 메시지 기준 파이차트
     """
-    if period == "day":
-        start_time = datetime.now() - timedelta(days=1)
-    elif period == "week":
-        start_time = datetime.now() - timedelta(weeks=1)
-    elif period == "month":
-        start_time = datetime.now() - timedelta(days=30)
-    else:
-        start_time = datetime.now() - timedelta(weeks=1)
+    start_time, end_time = period_range(period)
+    plot_pie_chart_custom(messages, left_subframe, middle_subframe, start_time, end_time, daily_counts)
 
-    plot_pie_chart_custom(messages, left_subframe, middle_subframe, start_time, datetime.now())
-
-def plot_pie_chart_custom(messages, left_subframe, middle_subframe, start_dt, end_dt):
+def plot_pie_chart_custom(messages, left_subframe, middle_subframe, start_dt, end_dt, daily_counts=None):
     """
     start_dt~end_dt 메시지만으로 파이차트 + Top20
+    daily_counts(DailyUserCounts)가 있으면 메시지 수와 무관하게 누적 행렬로 집계
     """
-    # 기존 위젯 삭제
-    for w in left_subframe.winfo_children():
-        w.destroy()
-    for w in middle_subframe.winfo_children():
-        w.destroy()
-
-    # 메시지 필터
-    filtered_msgs = [m for m in messages if m["type"] == "message"]
-    if start_dt and end_dt:
-        filtered_msgs = [m for m in filtered_msgs if (start_dt <= m["time"] <= end_dt)]
-
-    from collections import defaultdict
-    user_count = defaultdict(int)
-    for msg in filtered_msgs:
-        user_count[msg["user"]] += 1
-
-    if not user_count:
-        tk.Label(left_subframe, text="No messages in this range").pack()
-        tk.Label(middle_subframe, text="No data").pack()
+    panel = chart_panel(left_subframe)
+    text_top20 = _top_list(middle_subframe)
+    top_20, key = pie_top20(messages, start_dt, end_dt, daily_counts)
+
+    text_top20.config(state="normal")
+    text_top20.delete("1.0", "end")
+    if not top_20:
+        panel.show_notice("No messages in this range")
+        text_top20.insert("end", "No data")
+        text_top20.config(state="disabled")
         return
 
-    sorted_list = sorted(user_count.items(), key=lambda x: x[1], reverse=True)
-    top_20 = sorted_list[:20]
-    others = sorted_list[20:]
-    if others:
-        sum_others = sum(cnt for _, cnt in others)
-        top_20.append(("기타", sum_others))
-
-    users = [t[0] for t in top_20]
-    counts = [t[1] for t in top_20]
-
-    # 파스텔 계열 색상 (Pastel2)
-    cmap = plt.get_cmap('Pastel2')
-    colors = [cmap(i / len(top_20)) for i in range(len(top_20))]
-
-    fig, ax = plt.subplots(figsize=(5, 4))
-    ax.pie(
-        counts, 
-        labels=users, 
-        autopct='%1.1f%%', 
-        startangle=90,
-        colors=colors,
-        textprops={'fontsize': 8}  # 라벨 폰트 사이즈 작게
-    )
-    if start_dt and end_dt:
-        ax.set_title(f"점유율 차트 ({start_dt.strftime('%Y-%m-%d')} ~ {end_dt.strftime('%Y-%m-%d')})")
-    else:
-        ax.set_title("점유율 차트 (전체 기간)")
-
-    canvas = FigureCanvasTkAgg(fig, master=left_subframe)
-    canvas.draw()
-    canvas.get_tk_widget().pack()
-
-    label_top20 = tk.Label(middle_subframe, text="Top 20 Users", font=("Arial", 10, "bold"))
-    label_top20.pack(pady=5)
-
-    text_top20 = tk.Text(middle_subframe, width=25, height=22, font=("Arial", 10))
-    text_top20.pack()
+    title = pie_title(start_dt, end_dt)
+    draw_pie(panel, top_20, title, image_key=key + (title,))
+
     for i, (u, c) in enumerate(top_20, start=1):
         text_top20.insert("end", f"{i}) {u}: {c}\n")
     text_top20.config(state="disabled")
@@ -93,121 +133,28 @@ def plot_line_chart_custom(messages, right_subframe, start_dt, end_dt):
     """
     메인화면 오른쪽 라인차트 (전체 or 사용자 지정 기간)
     """
-    for w in right_subframe.winfo_children():
-        w.destroy()
+    panel = chart_panel(right_subframe, layout="tight")
+    series = line_series(messages, start_dt, end_dt)
+    if series is None:
+        panel.show_notice("No messages for line chart")
+        return
 
-    filtered = [m for m in messages if m["type"] == "message"]
-    if start_dt and end_dt:
-        filtered = [m for m in filtered if start_dt <= m["time"] <= end_dt]
+    days, day_counts, ma_vals, title, key = series
+    update_daily_lines(panel, days, day_counts, ma_vals, 30, 'Daily Count', title, image_key=key)
 
-    if not filtered:
-        tk.Label(right_subframe, text="No messages for line chart").pack()
-        return
 
-    day_counter = defaultdict(int)
-    for msg in filtered:
-        d_str = msg["time"].strftime("%Y-%m-%d")
-        day_counter[d_str] += 1
-
-    sorted_days = sorted(day_counter.keys())
-    day_counts = [day_counter[d] for d in sorted_days]
-
-    # 30일 이동평균
-    def moving_average(values, window=30):
-        ma_vals = []
-        for i in range(len(values)):
-            start_idx = max(0, i - window + 1)
-            subarr = values[start_idx : i+1]
-            ma_vals.append(sum(subarr)/len(subarr))
-        return ma_vals
-
-    ma_vals = moving_average(day_counts, 30)
-
-    fig, ax = plt.subplots(figsize=(5, 4))
-    ax.plot(sorted_days, day_counts, color='blue', marker='', label='Daily Count')
-    ax.plot(sorted_days, ma_vals, color='red', marker='', linestyle='--', label='30-day MA')
-
-    n = len(sorted_days)
-    if n > 10:
-        step = n // 10
-        xticks = []
-        xtick_labels = []
-        for i, day in enumerate(sorted_days):
-            if i % step == 0 or i == n-1:
-                xticks.append(i)
-                xtick_labels.append(day)
-        ax.set_xticks(xticks)
-        ax.set_xticklabels(xtick_labels, rotation=45, ha='right')
-    else:
-        plt.xticks(rotation=45, ha='right')
-
-    if start_dt and end_dt:
-        title_str = f"대화량 추이 ({start_dt.strftime('%Y-%m-%d')} ~ {end_dt.strftime('%Y-%m-%d')})"
-    else:
-        title_str = "대화량 추이(전체)"
-    ax.set_title(title_str)
-    ax.set_xlabel("Date")
-    ax.set_ylabel("Messages")
-    ax.legend()
-    plt.tight_layout()
-
-    canvas = FigureCanvasTkAgg(fig, master=right_subframe)
-    canvas.draw()
-    canvas.get_tk_widget().pack()
-
-
-def plot_user_line_chart(messages, user, parent_frame):
-    """
-    상세정보 창에서, 선택된 user만의 일자별 대화량 + 이동평균 라인차트를 표시
-    """
-    user_msgs = [m for m in messages if m["type"] == "message" and m["user"] == user]
-    if not user_msgs:
+def plot_user_line_chart(messages, user, parent_frame, user_rows=None):
+    """
+    상세정보 창에서, 선택된 user만의 일자별 대화량 + 이동평균 라인차트를 표시.
+    user_rows(그 사용자의 메시지 행 번호)를 주지 않으면 사용자별 메시지 목록에서 꺼낸다.
+    """
+    if user_rows is None:
+        uid = messages.user_index.get(user)
+        user_rows = messages.user_message_rows(uid) if uid is not None else []
+    if not len(user_rows):
         tk.Label(parent_frame, text="No messages for this user chart").pack()
         return
 
-    day_counter = defaultdict(int)
-    for msg in user_msgs:
-        d_str = msg["time"].strftime("%Y-%m-%d")
-        day_counter[d_str] += 1
-
-    sorted_days = sorted(day_counter.keys())
-    day_counts = [day_counter[d] for d in sorted_days]
-
-    # 7일 이동평균
-    def moving_average(values, window=7):
-        ma_vals = []
-        for i in range(len(values)):
-            start_idx = max(0, i - window + 1)
-            subarr = values[start_idx : i+1]
-            ma_vals.append(sum(subarr)/len(subarr))
-        return ma_vals
-
-    ma_vals = moving_average(day_counts, 7)
-
-    fig, ax = plt.subplots(figsize=(4, 3))
-    ax.plot(sorted_days, day_counts, color='blue', marker='', label='User Daily')
-    ax.plot(sorted_days, ma_vals, color='red', marker='', linestyle='--', label='7-day MA')
-
-    n = len(sorted_days)
-    if n > 6:
-        step = max(1, n // 6)
-        xticks = []
-        xtick_labels = []
-        for i, day in enumerate(sorted_days):
-            if i % step == 0 or i == n-1:
-                xticks.append(i)
-                xtick_labels.append(day)
-        ax.set_xticks(xticks)
-        ax.set_xticklabels(xtick_labels, rotation=45, ha='right')
-    else:
-        plt.xticks(rotation=45, ha='right')
-
-    ax.set_title(f"{user}의 대화량 추이")
-    ax.set_xlabel("Date")
-    ax.set_ylabel("Messages")
-    ax.legend()
-    plt.tight_layout()
-
-    canvas = FigureCanvasTkAgg(fig, master=parent_frame)
-    canvas.draw()
-    canvas.get_tk_widget().pack()
+    days, day_counts, ma_vals, title, key = user_line_series(messages, user, user_rows)
+    panel = chart_panel(parent_frame, figsize=(4, 3), layout="tight")
+    update_daily_lines(panel, days, day_counts, ma_vals, 7, 'User Daily', title, image_key=key)
@@ -0,0 +1,129 @@
+# loader.py
+import os
+
+from cache import ExportCache
+from message_table import MessageTable
+from merge_exports import merge_tables
+from parse_kakao import ParseCancelled, ingest_kakao_mmap, ingest_kakao_range, last_date_header_offset
+from stats import analyze_user_activity, merge_user_stats
+
+def _tail_info(messages):
+    """
+    (마지막 날짜 줄 위치, 그 앞까지의 행 수, 날짜 줄 bytes). 날짜 줄이 없으면 None
+    """
+    mm = messages.text_buf
+    offset = last_date_header_offset(mm)
+    if offset is None:
+        return None
+    line_end = mm.find(b"\n", offset)
+    header = mm[offset:line_end if line_end >= 0 else len(mm)]
+    tail_rows = len(ingest_kakao_range(mm, offset))
+    return offset, len(messages) - tail_rows, header
+
+def _ingest_incremental(cache, path, base_digest, progress=None, cancel=None):
+    """
+    path의 앞부분이 base_digest 항목의 원본 파일과 같을 때:
+    캐시된 테이블에서 마지막 날짜 줄 앞까지만 가져오고, 그 뒤부터 파일 끝까지만 새로 파싱한다.
+    """
+    meta = cache.entry_meta(base_digest)
+    cached = cache.load_entry(path, base_digest)   # 본문 위치는 앞부분이 같으므로 새 파일 내용에서도 유효
+    if meta is None or cached is None:
+        return None
+    old_messages, _, prefix_stats = cached
+
+    mm = old_messages.text_buf   # load_entry가 읽어 온 새 파일 내용
+    prefix = old_messages.head(meta["tail_row"])
+    tail = ingest_kakao_range(mm, meta["tail_offset"], progress=progress, cancel=cancel)
+    return MessageTable.concat([prefix, tail], text_buf=mm), prefix_stats, meta["tail_row"]
+
+def _open_cache():
+    try:
+        return ExportCache()
+    except OSError as e:
+        print(f"[WARNING] 캐시 디렉터리를 쓸 수 없습니다: {e}")
+        return None
+
+def load_export(path, workers=None, use_cache=True, cache=None, progress=None, cancel=None):
+    """
+    내보내기 파일 하나를 읽어 (messages, user_stats)를 반환.
+    같은 내용의 파일을 전에 연 적이 있으면 디스크 캐시에서 바로 읽고,
+    전에 연 파일 뒤에 대화가 더 붙은 파일이면 붙은 부분만 파싱해서 합치며,
+    둘 다 아니면 mmap으로 수집 + 통계 계산 후 캐시에 저장한다.
+    어느 경우든 돌려준 테이블의 본문은 파일 내용을 복사한 bytes라 원본 파일을 열어 두지 않는다.
+
+    progress(처리한 바이트, 전체 바이트, 행 수)는 파싱 중에 호출되며(다른 스레드에서 불릴 수 있음),
+    cancel(threading.Event)이 설정되면 ParseCancelled가 난다.
+    """
+    if workers is None:
+        workers = os.cpu_count()
+    if use_cache and cache is None:
+        cache = _open_cache()
+    if not use_cache or cache is None:
+        messages = ingest_kakao_mmap(path, workers=workers, progress=progress, cancel=cancel)
+        return messages, analyze_user_activity(messages)
+
+    # 전체 해시를 구하면서 후보 항목 크기에서의 앞부분 해시도 같이 구한다 (파일은 한 번만 읽음)
+    candidates = cache.prefix_candidates(path)
+    digest, prefix_digests = cache.digest(path, checkpoints=candidates.keys())
+    hit = cache.get(path, digest)
+    if hit is not None:
+        return hit
+
+    incremental = None
+    for size in sorted(candidates, reverse=True):
+        if prefix_digests.get(size) in candidates[size]:
+            incremental = _ingest_incremental(cache, path, prefix_digests[size], progress, cancel)
+            if incremental is not None:
+                break
+    if incremental is not None:
+        messages, base_stats, base_row = incremental
+    else:
+        messages = ingest_kakao_mmap(path, workers=workers, progress=progress, cancel=cancel)
+        base_stats, base_row = {}, 0
+
+    # 통계는 구간별로 계산해서 합친다. 캐시된 앞부분 통계는 다시 계산하지 않고,
+    # 마지막 날짜 줄 앞까지의 통계(prefix_stats)는 다음 증분 로드를 위해 같이 저장한다.
+    tail = _tail_info(messages)
+    split = tail[1] if tail is not None else base_row
+    prefix_stats = merge_user_stats(base_stats, analyze_user_activity(messages.slice(base_row, split)))
+    user_stats = merge_user_stats(prefix_stats, analyze_user_activity(messages.slice(split, len(messages))))
+
+    try:
+        cache.put(path, messages, user_stats, digest, tail=tail, prefix_stats=prefix_stats)
+    except OSError as e:
+        print(f"[WARNING] 캐시 저장 실패: {e}")
+    return messages, user_stats
+
+def load_exports(paths, workers=None, use_cache=True, cache=None, progress=None, cancel=None):
+    """
+    같은 대화방을 여러 번 내보낸 파일들을 읽어 겹치는 기간은 한 번만 세고 하나로 합친 (messages, user_stats).
+    파일마다 load_export를 거치므로 각 파일은 따로 캐시된다.
+    progress는 전체 파일 크기 합 기준으로 호출된다.
+    """
+    paths = list(paths)
+    if len(paths) == 1:
+        return load_export(paths[0], workers, use_cache, cache, progress, cancel)
+    if use_cache and cache is None:
+        cache = _open_cache()
+        use_cache = cache is not None
+
+    sizes = [os.path.getsize(p) for p in paths]
+    total = sum(sizes)
+    tables = []
+    done = rows = 0
+    for path, size in zip(paths, sizes):
+        if cancel is not None and cancel.is_set():
+            raise ParseCancelled()
+        file_progress = None
+        if progress is not None:
+            def file_progress(d, _total, r, base=done, base_rows=rows):
+                progress(base + d, total, base_rows + r)
+        messages, _ = load_export(path, workers, use_cache, cache, file_progress, cancel)
+        tables.append(messages)
+        done += size
+        rows += len(messages)
+        if progress is not None:
+            progress(done, total, rows)
+
+    messages = merge_tables(tables)
+    return messages, analyze_user_activity(messages)
@@ -1,122 +1,325 @@
 # main.py
+import os
+import queue
+import threading
+import time
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
 from datetime import datetime, timedelta
-from tkcalendar import Calendar
 
 # 우리가 분할해놓은 파일에서 함수/클래스 import
-from parse_kakao import parse_kakao_chat
-from stats import analyze_user_activity
-from charts import (
-    plot_pie_chart_period,
-    plot_pie_chart_custom,
-    plot_line_chart_custom,
-    plot_user_line_chart
-)
-import matplotlib.pyplot as plt
-from matplotlib import rcParams
-
-# 한글 폰트 설정
-rcParams['font.family'] = 'Malgun Gothic'  # Windows의 맑은 고딕 폰트
-rcParams['axes.unicode_minus'] = False    # 마이너스 기호 깨짐 방지
-
-# 전역 리스트/딕셔너리
-messages = []
+from loader import load_exports
+from parse_kakao import ParseCancelled
+from stats import SORT_COLUMNS, UserStats, UserSortOrders, build_daily_user_counts
+from message_table import MessageTable
+from text_index import build_text_index
+from name_index import NameIndex
+from virtual_table import PagedText, VirtualTreeview
+import numpy as np
+# charts(matplotlib)와 tkcalendar는 import가 무거워서 창을 먼저 띄운 뒤 불러온다 (lazy_charts / preload_modules)
+
+# 전역 메시지 테이블/딕셔너리
+messages = MessageTable.empty()
 user_stats = {}
+daily_counts = None   # 일자×사용자 누적 메시지 수 (파이차트용)
+table_rows = np.zeros(0, dtype=np.int64)   # 사용자 테이블에 표시 중인 이름 번호 (검색/정렬 결과)
+name_index = NameIndex([])   # 사용자 이름 부분 문자열 검색 인덱스
+sort_orders = UserSortOrders({})   # 정렬 기준별 미리 만든 순열
+text_index = None     # 메시지 본문 전문 검색 색인 (로드 후 백그라운드에서 생성)
+search_after_id = None       # 입력 중 검색 예약(root.after) id
+load_cancel = None    # 진행 중인 로딩의 취소 이벤트 (로딩 중이 아니면 None)
+
+LOAD_POLL_MS = 100    # 로딩 진행 상황 확인 주기
+SEARCH_DEBOUNCE_MS = 150   # 검색어 입력이 멈춘 뒤 검색까지 기다리는 시간
+PRELOAD_DELAY_MS = 200     # 첫 화면을 그린 뒤 무거운 모듈을 미리 불러오기 시작할 때까지
+
+def lazy_charts():
+    """
+    charts 모듈 (matplotlib 포함). 처음 부를 때 import 되고,
+    preload_modules가 백그라운드에서 이미 불러오는 중이면 그게 끝날 때까지만 기다린다.
+    """
+    import charts
+    return charts
+
+def preload_modules():
+    """
+    창이 뜬 뒤 백그라운드 스레드에서 charts(matplotlib)/tkcalendar를 미리 import.
+    파일을 고르는 동안 끝나므로 첫 차트/달력을 열 때 기다리지 않는다.
+    """
+    def worker():
+        lazy_charts()
+        import tkcalendar
+    threading.Thread(target=worker, daemon=True).start()
 
 def load_file():
     """
-    파일 열기 대화상자를 통해 txt파일을 선택하고, messages / user_stats 갱신,
-    테이블, 차트 갱신.
+    파일 열기 대화상자를 통해 txt파일을 선택하고, 백그라운드 스레드에서 읽기 시작.
+    같은 방을 여러 번 내보낸 파일을 여러 개 고르면 겹치는 기간은 한 번만 세서 하나로 합친다.
+    진행 상황은 큐로 받아 root.after로 확인하고, 끝나면 on_load_done에서 테이블/차트 갱신.
+    """
+    global load_cancel
+    if load_cancel is not None:
+        return
+
+    file_paths = filedialog.askopenfilenames(filetypes=[("Text Files", "*.txt")])
+    if not file_paths:
+        return
+
+    load_queue = queue.Queue()
+    load_cancel = threading.Event()
+    cancel = load_cancel
+
+    def progress(done, total, rows):
+        load_queue.put(("progress", done, total, rows))
+
+    def worker():
+        # 전에 연 파일이면 디스크 캐시에서, 아니면 mmap 수집(코어 수만큼 병렬) + 통계 계산
+        try:
+            result = load_exports(file_paths, workers=os.cpu_count(), progress=progress, cancel=cancel)
+            result[0].build_user_index()
+            indexes = (build_daily_user_counts(result[0]), NameIndex(result[1]), UserSortOrders(result[1]))
+            load_queue.put(("done",) + result + indexes)
+        except ParseCancelled:
+            load_queue.put(("cancelled",))
+        except Exception as e:
+            load_queue.put(("error", e))
+
+    load_btn.config(state="disabled")
+    progress_bar.config(value=0, maximum=1)
+    progress_label.config(text="파일 여는 중...")
+    cancel_btn.config(state="normal")
+    progress_frame.pack(after=button_frame, fill="x", padx=5)
+
+    threading.Thread(target=worker, daemon=True).start()
+    root.after(LOAD_POLL_MS, poll_load_queue, load_queue, time.perf_counter())
+
+def poll_load_queue(load_queue, started):
+    """
+    로딩 스레드가 보낸 메시지 처리 (Tk 메인 스레드에서만 위젯을 건드림)
     """
-    file_path = filedialog.askopenfilename(filetypes=[("Text Files", "*.txt")])
-    if not file_path:
+    global load_cancel
+    while True:
+        try:
+            item = load_queue.get_nowait()
+        except queue.Empty:
+            break
+
+        kind = item[0]
+        if kind == "progress":
+            _, done, total, rows = item
+            elapsed = max(time.perf_counter() - started, 1e-6)
+            progress_bar.config(maximum=max(total, 1), value=done)
+            progress_label.config(
+                text=f"{done / 1024 ** 2:,.1f} / {total / 1024 ** 2:,.1f} MB · "
+                     f"{rows:,}건 · {rows / elapsed:,.0f} msg/s"
+            )
+            continue
+
+        load_cancel = None
+        progress_frame.pack_forget()
+        load_btn.config(state="normal")
+        if kind == "done":
+            on_load_done(*item[1:])
+        elif kind == "error":
+            messagebox.showerror("Error", f"파일을 읽지 못했습니다.\n{item[1]}")
         return
 
-    with open(file_path, "r", encoding="utf-8") as f:
-        chat_data = f.read()
+    root.after(LOAD_POLL_MS, poll_load_queue, load_queue, started)
 
-    global messages, user_stats
-    messages = parse_kakao_chat(chat_data)
-    user_stats = analyze_user_activity(messages)
+def cancel_load():
+    if load_cancel is not None:
+        load_cancel.set()
+        cancel_btn.config(state="disabled")
+        progress_label.config(text="취소하는 중...")
+
+def on_load_done(new_messages, new_user_stats, new_daily_counts, new_name_index, new_sort_orders):
+    """
+    로딩이 끝난 결과를 전역에 반영하고 테이블, 차트 갱신.
+    """
+    global messages, user_stats, daily_counts, name_index, sort_orders
+    messages, user_stats, daily_counts = new_messages, new_user_stats, new_daily_counts
+    name_index, sort_orders = new_name_index, new_sort_orders
+    start_text_index_build(messages)
 
     apply_filter_and_sort()
     # 전체 기간 라인차트
-    plot_line_chart_custom(messages, right_subframe, None, None)
+    lazy_charts().plot_line_chart_custom(messages, right_subframe, None, None)
     # 기본 1주 파이차트
-    plot_pie_chart_period(messages, left_subframe, middle_subframe, "week")
+    lazy_charts().plot_pie_chart_period(messages, left_subframe, middle_subframe, "week", daily_counts)
+
+def on_search_changed(*args):
+    """
+    검색어가 바뀔 때마다 호출. 입력이 SEARCH_DEBOUNCE_MS 동안 멈췄을 때 마지막 검색어로만 검색한다.
+    """
+    global search_after_id
+    if search_after_id is not None:
+        root.after_cancel(search_after_id)
+    search_after_id = root.after(SEARCH_DEBOUNCE_MS, apply_filter_and_sort)
+
+def start_text_index_build(target):
+    """
+    메시지 검색 색인을 백그라운드 스레드에서 만든다. 그 사이 다른 파일을 열었으면 결과는 버린다.
+    """
+    global text_index
+    text_index = None
+
+    def worker():
+        global text_index
+        index = build_text_index(target)
+        if target is messages:
+            text_index = index
+
+    threading.Thread(target=worker, daemon=True).start()
+
+def open_message_search():
+    """
+    메시지 본문 검색 창. 사용자/기간으로 거를 수 있고, 결과를 더블 클릭하면 그 사용자 대화내용의 해당 위치로 간다.
+    """
+    search_win = tk.Toplevel(root)
+    search_win.title("메시지 검색")
+
+    form = tk.Frame(search_win)
+    form.pack(fill="x", padx=5, pady=5)
+
+    tk.Label(form, text="검색어:", font=("Arial", 10)).pack(side="left")
+    query_var = tk.StringVar()
+    query_entry = tk.Entry(form, textvariable=query_var, font=("Arial", 10), width=25)
+    query_entry.pack(side="left", padx=5)
+
+    tk.Label(form, text="유저:", font=("Arial", 10)).pack(side="left")
+    user_var = tk.StringVar()
+    tk.Entry(form, textvariable=user_var, font=("Arial", 10), width=12).pack(side="left", padx=5)
+
+    tk.Label(form, text="기간(YYYY-MM-DD):", font=("Arial", 10)).pack(side="left")
+    start_var = tk.StringVar()
+    tk.Entry(form, textvariable=start_var, font=("Arial", 10), width=11).pack(side="left")
+    tk.Label(form, text="~", font=("Arial", 10)).pack(side="left")
+    end_var = tk.StringVar()
+    tk.Entry(form, textvariable=end_var, font=("Arial", 10), width=11).pack(side="left")
+
+    result_label = tk.Label(search_win, text="", font=("Arial", 10), anchor="w")
+    result_label.pack(fill="x", padx=5)
+
+    table_frame = tk.Frame(search_win)
+    table_frame.pack(fill="both", expand=True, padx=5, pady=5)
+    scroll = tk.Scrollbar(table_frame, orient="vertical")
+    scroll.pack(side="right", fill="y")
+    result_table = VirtualTreeview(table_frame, columns=("time", "user", "message"), height=20,
+                                   show="headings", yscrollcommand=scroll.set)
+    result_table.heading("time", text="Time")
+    result_table.column("time", width=140, anchor="center")
+    result_table.heading("user", text="User")
+    result_table.column("user", width=120)
+    result_table.heading("message", text="Message")
+    result_table.column("message", width=500)
+    result_table.pack(side="left", fill="both", expand=True)
+    scroll.config(command=result_table.yview)
+
+    found = {"rows": np.zeros(0, dtype=np.int64), "messages": messages}
+
+    def result_row(i):
+        m = found["messages"]
+        r = found["rows"][i]
+        return "", (m.time(r).strftime("%Y-%m-%d %H:%M"), m.user(r), m.text(r).replace("\n", " "))
+
+    def run_search(event=None):
+        if text_index is None or text_index.messages is not messages:
+            result_label.config(text="검색 색인을 만드는 중입니다. 잠시 후 다시 시도하세요.")
+            return
+        try:
+            s_date = datetime.strptime(start_var.get().strip(), "%Y-%m-%d") if start_var.get().strip() else None
+            e_date = datetime.strptime(end_var.get().strip(), "%Y-%m-%d") if end_var.get().strip() else None
+        except ValueError:
+            messagebox.showerror("Error", "날짜는 YYYY-MM-DD 형식으로 입력하세요.", parent=search_win)
+            return
+        if (s_date is None) != (e_date is None):
+            # 한쪽만 입력하면 나머지는 처음/끝까지
+            s_date = s_date or datetime.min
+            e_date = e_date or datetime(9999, 12, 31)
+        if e_date is not None:
+            e_date += timedelta(hours=23, minutes=59, seconds=59)
+
+        started = time.perf_counter()
+        rows = text_index.search(query_var.get(), user=user_var.get().strip() or None,
+                                 start_dt=s_date, end_dt=e_date)
+        elapsed = (time.perf_counter() - started) * 1000
+        found["rows"], found["messages"] = rows, messages
+        result_table.set_rows(len(rows), result_row)
+        result_label.config(text=f"{len(rows):,}건 ({elapsed:,.0f} ms)")
+
+    def open_result(event):
+        i = result_table.selected_row()
+        if i is None:
+            return
+        r = found["rows"][i]
+        if found["messages"] is messages:
+            open_user_details(messages.user(r), focus_row=r)
+
+    tk.Button(form, text="검색", command=run_search, font=("Arial", 10)).pack(side="left", padx=5)
+    query_entry.bind("<Return>", run_search)
+    result_table.bind("<Double-1>", open_result)
+    query_entry.focus_set()
 
 def apply_filter_and_sort():
     """
     검색(유저명) + 정렬
     """
-    keyword = search_var.get().strip().lower()
+    global search_after_id
+    if search_after_id is not None:
+        root.after_cancel(search_after_id)
+        search_after_id = None
+
+    keyword = search_var.get().strip()
     sort_col = sort_col_var.get()
     direction = sort_dir_var.get()
     reverse_sort = (direction == "내림차순")
 
-    filtered = []
-    for u, st in user_stats.items():
-        if keyword in u.lower():
-            filtered.append((u, st))
-
-    def sort_key(item):
-        user, stats = item
-        if sort_col == "user":
-            return user.lower()
-        elif sort_col == "message_count":
-            return stats["message_count"]
-        elif sort_col == "first_message_time":
-            return stats["first_message_time"] or datetime.min
-        elif sort_col == "last_message_time":
-            return stats["last_message_time"] or datetime.min
-        elif sort_col == "joined_time":
-            return stats["joined"] or datetime.min
-        elif sort_col == "left_time":
-            return stats["left"] or datetime.min
-        else:
-            return user.lower()
-
-    filtered.sort(key=sort_key, reverse=reverse_sort)
-    update_user_table(filtered)
-
-def update_user_table(user_list=None):
+    # 이름 인덱스로 검색 -> 미리 만든 정렬 순열에서 검색된 사용자만 골라냄 (다시 정렬하지 않음)
+    ids = name_index.search(keyword) if keyword else None
+    update_user_table(sort_orders.order(sort_col, reverse_sort, ids))
+
+def update_user_table(user_ids=None):
     """
     트리뷰(user_table)에 데이터 표시.
-    user_list가 주어지지 않으면, 전체 user_stats 기준.
+    user_ids(이름 번호 배열)가 주어지지 않으면, 전체 user_stats 기준.
+    user_table은 보이는 행만 그리므로 여기서는 번호 배열만 넘기고, 행 내용은 user_table_row가 그때그때 만든다.
+    """
+    global table_rows
+    if user_ids is None:
+        user_ids = np.arange(len(name_index))
+    table_rows = user_ids
+    user_table.set_rows(len(table_rows), user_table_row)
+
+def user_table_row(i):
+    """
+    i번째 행의 (인덱스(#0), (user, message_count, ...))
     """
-    # 기존 테이블 행 삭제
-    for row in user_table.get_children():
-        user_table.delete(row)
-
-    if user_list is None:
-        user_list = [(u, user_stats[u]) for u in user_stats]
-
-    # 인덱스(#0) + (user, message_count, ...)
-    for i, (user, st) in enumerate(user_list, start=1):
-        j = st["joined"].strftime("%Y-%m-%d") if st["joined"] else ""
-        l = st["left"].strftime("%Y-%m-%d") if st["left"] else ""
-        f = st["first_message_time"].strftime("%Y-%m-%d %H:%M:%S") if st["first_message_time"] else ""
-        la = st["last_message_time"].strftime("%Y-%m-%d %H:%M:%S") if st["last_message_time"] else ""
-        mlc = st["message_letters_count"]  # 문자 수 가져오기
-        user_table.insert(
-            "",
-            "end",
-            text=str(i),  # 인덱스
-            values=(user, st["message_count"], mlc, f, la, j, l)
-        )
+    user = name_index.names[table_rows[i]]
+    st = user_stats[user]
+    j = st.joined.strftime("%Y-%m-%d") if st.joined else ""
+    l = st.left.strftime("%Y-%m-%d") if st.left else ""
+    f = st.first_message_time.strftime("%Y-%m-%d %H:%M:%S") if st.first_message_time else ""
+    la = st.last_message_time.strftime("%Y-%m-%d %H:%M:%S") if st.last_message_time else ""
+    mlc = st.message_letters_count  # 문자 수 가져오기
+    return str(i + 1), (user, st.message_count, mlc, f, la, j, l)
 
 def show_user_details(event):
     """
     유저 테이블 더블 클릭 -> 해당 유저의 상세정보 창
-    (왼쪽: 해당 유저 라인차트, 오른쪽: 대화내용)
     """
-    selected_item = user_table.selection()
-    if not selected_item:
+    row = user_table.selected_row()
+    if row is None:
         return
+    open_user_details(name_index.names[table_rows[row]])
 
-    user = user_table.item(selected_item)["values"][0]
-    user_messages = [m for m in messages if (m["type"] == "message" and m["user"] == user)]
+def open_user_details(user, focus_row=None):
+    """
+    user의 상세정보 창 (왼쪽: 해당 유저 라인차트, 오른쪽: 대화내용).
+    focus_row(메시지 행 번호)를 주면 대화내용을 그 메시지 위치로 스크롤해서 강조한다.
+    """
+    uid = messages.user_index.get(user)
+    # 로드할 때 만든 사용자별 메시지 목록에서 바로 꺼냄
+    user_rows = messages.user_message_rows(uid) if uid is not None else np.zeros(0, dtype=np.int64)
 
     details_win = tk.Toplevel(root)
     details_win.title(f"{user}의 대화 내용")
@@ -136,24 +339,23 @@ def show_user_details(event):
     right_frame.pack(side="left", fill="both", expand=True)
 
     # (1) 왼쪽 라인차트 (개별 유저용)
-    plot_user_line_chart(messages, user, left_upper_frame)
+    lazy_charts().plot_user_line_chart(messages, user, left_upper_frame, user_rows)
 
     #왼쪽 차트 하단 텍스트
     join_history_text = tk.Text(left_lower_frame, wrap="word")
     join_history_text.pack(fill="both", expand=True, padx=10, pady=10)
 
      # 사용자 입장/퇴장 기록 작성
-    user_stats_entry = user_stats.get(user, {})
-    join_time = user_stats_entry.get("joined")
-    leave_time = user_stats_entry.get("left")
+    user_stats_entry = user_stats.get(user) or UserStats()
+    join_time = user_stats_entry.joined
+    leave_time = user_stats_entry.left
 
 
     history_text = f"사용자: {user}\n"
     # history_text += f"입장 시간: {join_time.strftime('%Y-%m-%d %H:%M:%S') if join_time else '정보 없음'}\n"
     # history_text += f"퇴장 시간: {leave_time.strftime('%Y-%m-%d %H:%M:%S') if leave_time else '정보 없음'}\n"
-    # history_text += f"현재 방 상태: {'현재 방에 있음' if user_stats_entry.get('now_in') else '퇴장함'}\n"
-    # history_text += "".join(user_stats_entry["join_history"])
-    history_text += "".join(user_stats_entry.get("join_history", []))
+    # history_text += f"현재 방 상태: {'현재 방에 있음' if user_stats_entry.now_in else '퇴장함'}\n"
+    history_text += "".join(user_stats_entry.join_history)
     print(history_text)
     join_history_text.insert("1.0", history_text)
     join_history_text.config(state="disabled")  # 수정 불가로 설정
@@ -162,14 +364,20 @@ def show_user_details(event):
     scroll = tk.Scrollbar(right_frame, orient="vertical")
     scroll.pack(side="right", fill="y")
 
-    text_widget = tk.Text(right_frame, wrap="word", width=80, height=20, font=("Arial", 10), yscrollcommand=scroll.set)
+    # 보이는 부근의 메시지만 그때그때 만들어 넣는다 (수정 불가)
+    text_widget = PagedText(right_frame, wrap="word", width=80, height=20, font=("Arial", 10), yscrollcommand=scroll.set)
     text_widget.pack(side="left", fill="both", expand=True)
     scroll.config(command=text_widget.yview)
 
-    for msg in user_messages:
-        t_str = msg["time"].strftime("%Y-%m-%d %H:%M:%S")
-        text_widget.insert("end", f"[{t_str}] {msg['message']}\n")
-    text_widget.config(state="disabled")# 수정 불가로 설정
+    def transcript_line(k):
+        i = user_rows[k]
+        t_str = messages.time(i).strftime("%Y-%m-%d %H:%M:%S")
+        return f"[{t_str}] {messages.text(i)}"
+    text_widget.set_lines(len(user_rows), transcript_line)
+    if focus_row is not None:
+        pos = np.flatnonzero(user_rows == focus_row)
+        if len(pos):
+            text_widget.see_line(int(pos[0]))
     
 
 def open_custom_pie_calendar():
@@ -180,6 +388,7 @@ def open_custom_pie_calendar():
     cal_win.title("점유율 차트 기간 선택")
 
     tk.Label(cal_win, text="Start Date").pack(pady=5)
+    from tkcalendar import Calendar
     cal1 = Calendar(cal_win, selectmode='day', date_pattern='yyyy-mm-dd')
     cal1.pack(pady=5)
 
@@ -194,7 +403,7 @@ def open_custom_pie_calendar():
             messagebox.showerror("Error", "시작일이 종료일보다 늦습니다.")
             return
 
-        plot_pie_chart_custom(messages, left_subframe, middle_subframe, s_date, e_date + timedelta(hours=23, minutes=59, seconds=59))
+        lazy_charts().plot_pie_chart_custom(messages, left_subframe, middle_subframe, s_date, e_date + timedelta(hours=23, minutes=59, seconds=59), daily_counts)
         cal_win.destroy()
 
     btn_ok = tk.Button(cal_win, text="확인", command=on_ok)
@@ -208,6 +417,7 @@ def open_custom_line_calendar():
     cal_win.title("대화량 차트 기간 선택")
 
     tk.Label(cal_win, text="Start Date").pack(pady=5)
+    from tkcalendar import Calendar
     cal1 = Calendar(cal_win, selectmode='day', date_pattern='yyyy-mm-dd')
     cal1.pack(pady=5)
 
@@ -222,7 +432,7 @@ def open_custom_line_calendar():
             messagebox.showerror("Error", "시작일이 종료일보다 늦습니다.")
             return
 
-        plot_line_chart_custom(messages, right_subframe, s_date, e_date + timedelta(hours=23, minutes=59, seconds=59))
+        lazy_charts().plot_line_chart_custom(messages, right_subframe, s_date, e_date + timedelta(hours=23, minutes=59, seconds=59))
         cal_win.destroy()
 
     btn_ok = tk.Button(cal_win, text="확인", command=on_ok)
@@ -232,139 +442,155 @@ def open_custom_line_calendar():
 # -----------------------
 # 아래부터 GUI 설정
 # -----------------------
-root = tk.Tk()
-root.title("카카오톡 이용자 분석 프로그램")
-
-# 상단 버튼들
-button_frame = tk.Frame(root)
-button_frame.pack(pady=5, fill="x")
-
-load_btn = tk.Button(button_frame, text="파일 열기", command=load_file, font=("Arial", 12))
-load_btn.pack(side="left", padx=5)
-
-day_button = tk.Button(button_frame, text="대화 점유율(1일)", 
-                       command=lambda: plot_pie_chart_period(messages, left_subframe, middle_subframe, "day"))
-day_button.pack(side="left", padx=5)
-
-week_button = tk.Button(button_frame, text="대화 점유율(1주일)", 
-                        command=lambda: plot_pie_chart_period(messages, left_subframe, middle_subframe, "week"))
-week_button.pack(side="left", padx=5)
-
-month_button = tk.Button(button_frame, text="대화 점유율(1개월)", 
-                         command=lambda: plot_pie_chart_period(messages, left_subframe, middle_subframe, "month"))
-month_button.pack(side="left", padx=5)
-
-# 파이차트 전체 기간 버튼
-btn_pie_full = tk.Button(button_frame, text="대화 점유율(전체)", 
-                         command=lambda: plot_pie_chart_custom(messages, left_subframe, middle_subframe, None, None))
-btn_pie_full.pack(side="left", padx=5)
-
-btn_pie_custom = tk.Button(button_frame, text="Custom Range(대화 점유율)", 
-                           command=open_custom_pie_calendar, font=("Arial", 10))
-btn_pie_custom.pack(side="left", padx=5)
-
-# 라인차트 전체 기간 버튼
-btn_line_full = tk.Button(button_frame, text="대화량 차트(전체)",
-                          command=lambda: plot_line_chart_custom(messages, right_subframe, None, None))
-btn_line_full.pack(side="left", padx=5)
-
-btn_line_custom = tk.Button(button_frame, text="Custom Range(대화량 차트)", 
-                            command=open_custom_line_calendar, font=("Arial", 10))
-btn_line_custom.pack(side="left", padx=5)
-
-# 차트 영역 (상단)
-top_frame = tk.Frame(root)
-top_frame.pack(side="top", fill="both", expand=True, padx=5, pady=5)
-
-left_subframe = tk.Frame(top_frame)
-left_subframe.pack(side="left", fill="both", expand=True)
-
-middle_subframe = tk.Frame(top_frame)
-middle_subframe.pack(side="left", fill="both", expand=False, padx=10)
-
-right_subframe = tk.Frame(top_frame)
-right_subframe.pack(side="left", fill="both", expand=True, padx=10)
-
-# 검색 / 정렬
-filter_frame = tk.Frame(root)
-filter_frame.pack(pady=5, fill="x")
-
-search_label = tk.Label(filter_frame, text="검색(유저명):", font=("Arial", 10))
-search_label.pack(side="left", padx=5)
-
-search_var = tk.StringVar()
-search_entry = tk.Entry(filter_frame, textvariable=search_var, font=("Arial", 10), width=20)
-search_entry.pack(side="left")
-
-search_button = tk.Button(filter_frame, text="검색", command=apply_filter_and_sort, font=("Arial", 10))
-search_button.pack(side="left", padx=5)
-
-sort_label = tk.Label(filter_frame, text="정렬 기준:", font=("Arial", 10))
-sort_label.pack(side="left", padx=5)
-
-sort_col_var = tk.StringVar()
-sort_col_combobox = ttk.Combobox(
-    filter_frame,
-    textvariable=sort_col_var,
-    values=["user", "message_count", "first_message_time", "last_message_time", "joined_time", "left_time"],
-    state="readonly",
-    width=18
-)
-sort_col_combobox.current(1)
-sort_col_combobox.pack(side="left")
-
-sort_dir_var = tk.StringVar()
-sort_dir_combobox = ttk.Combobox(
-    filter_frame,
-    textvariable=sort_dir_var,
-    values=["오름차순", "내림차순"],
-    state="readonly",
-    width=8
-)
-sort_dir_combobox.current(1)
-sort_dir_combobox.pack(side="left", padx=5)
-
-sort_btn = tk.Button(filter_frame, text="정렬 적용", command=apply_filter_and_sort, font=("Arial", 10))
-sort_btn.pack(side="left", padx=5)
-
-# 하단 테이블
-bottom_frame = tk.Frame(root)
-bottom_frame.pack(side="bottom", fill="both", expand=True, padx=10, pady=10)
-
-scroll = tk.Scrollbar(bottom_frame, orient="vertical")
-scroll.pack(side="right", fill="y")
+# (병렬 파싱 워커 프로세스가 이 파일을 다시 import 해도 창이 뜨지 않도록 main 가드)
+if __name__ == "__main__":
+    root = tk.Tk()
+    root.title("카카오톡 이용자 분석 프로그램")
+
+    # 상단 버튼들
+    button_frame = tk.Frame(root)
+    button_frame.pack(pady=5, fill="x")
+
+    load_btn = tk.Button(button_frame, text="파일 열기", command=load_file, font=("Arial", 12))
+    load_btn.pack(side="left", padx=5)
+
+    # 로딩 진행 표시 (로딩 중에만 표시)
+    progress_frame = tk.Frame(root)
+    progress_bar = ttk.Progressbar(progress_frame, orient="horizontal", length=300, mode="determinate")
+    progress_bar.pack(side="left", padx=5)
+    progress_label = tk.Label(progress_frame, text="", font=("Arial", 10))
+    progress_label.pack(side="left", padx=5)
+    cancel_btn = tk.Button(progress_frame, text="취소", command=cancel_load, font=("Arial", 10))
+    cancel_btn.pack(side="left", padx=5)
+
+    day_button = tk.Button(button_frame, text="대화 점유율(1일)", 
+                           command=lambda: lazy_charts().plot_pie_chart_period(messages, left_subframe, middle_subframe, "day", daily_counts))
+    day_button.pack(side="left", padx=5)
+
+    week_button = tk.Button(button_frame, text="대화 점유율(1주일)", 
+                            command=lambda: lazy_charts().plot_pie_chart_period(messages, left_subframe, middle_subframe, "week", daily_counts))
+    week_button.pack(side="left", padx=5)
+
+    month_button = tk.Button(button_frame, text="대화 점유율(1개월)", 
+                             command=lambda: lazy_charts().plot_pie_chart_period(messages, left_subframe, middle_subframe, "month", daily_counts))
+    month_button.pack(side="left", padx=5)
+
+    # 파이차트 전체 기간 버튼
+    btn_pie_full = tk.Button(button_frame, text="대화 점유율(전체)", 
+                             command=lambda: lazy_charts().plot_pie_chart_custom(messages, left_subframe, middle_subframe, None, None, daily_counts))
+    btn_pie_full.pack(side="left", padx=5)
+
+    btn_pie_custom = tk.Button(button_frame, text="Custom Range(대화 점유율)", 
+                               command=open_custom_pie_calendar, font=("Arial", 10))
+    btn_pie_custom.pack(side="left", padx=5)
+
+    # 라인차트 전체 기간 버튼
+    btn_line_full = tk.Button(button_frame, text="대화량 차트(전체)",
+                              command=lambda: lazy_charts().plot_line_chart_custom(messages, right_subframe, None, None))
+    btn_line_full.pack(side="left", padx=5)
+
+    btn_line_custom = tk.Button(button_frame, text="Custom Range(대화량 차트)", 
+                                command=open_custom_line_calendar, font=("Arial", 10))
+    btn_line_custom.pack(side="left", padx=5)
+
+    btn_message_search = tk.Button(button_frame, text="메시지 검색", command=open_message_search, font=("Arial", 10))
+    btn_message_search.pack(side="left", padx=5)
+
+    # 차트 영역 (상단)
+    top_frame = tk.Frame(root)
+    top_frame.pack(side="top", fill="both", expand=True, padx=5, pady=5)
+
+    left_subframe = tk.Frame(top_frame)
+    left_subframe.pack(side="left", fill="both", expand=True)
+
+    middle_subframe = tk.Frame(top_frame)
+    middle_subframe.pack(side="left", fill="both", expand=False, padx=10)
+
+    right_subframe = tk.Frame(top_frame)
+    right_subframe.pack(side="left", fill="both", expand=True, padx=10)
+
+    # 검색 / 정렬
+    filter_frame = tk.Frame(root)
+    filter_frame.pack(pady=5, fill="x")
+
+    search_label = tk.Label(filter_frame, text="검색(유저명):", font=("Arial", 10))
+    search_label.pack(side="left", padx=5)
+
+    search_var = tk.StringVar()
+    search_entry = tk.Entry(filter_frame, textvariable=search_var, font=("Arial", 10), width=20)
+    search_entry.pack(side="left")
+    search_var.trace_add("write", on_search_changed)   # 입력하는 대로 검색
+
+    search_button = tk.Button(filter_frame, text="검색", command=apply_filter_and_sort, font=("Arial", 10))
+    search_button.pack(side="left", padx=5)
+
+    sort_label = tk.Label(filter_frame, text="정렬 기준:", font=("Arial", 10))
+    sort_label.pack(side="left", padx=5)
+
+    sort_col_var = tk.StringVar()
+    sort_col_combobox = ttk.Combobox(
+        filter_frame,
+        textvariable=sort_col_var,
+        values=list(SORT_COLUMNS),
+        state="readonly",
+        width=18
+    )
+    sort_col_combobox.current(1)
+    sort_col_combobox.pack(side="left")
+
+    sort_dir_var = tk.StringVar()
+    sort_dir_combobox = ttk.Combobox(
+        filter_frame,
+        textvariable=sort_dir_var,
+        values=["오름차순", "내림차순"],
+        state="readonly",
+        width=8
+    )
+    sort_dir_combobox.current(1)
+    sort_dir_combobox.pack(side="left", padx=5)
+
+    sort_btn = tk.Button(filter_frame, text="정렬 적용", command=apply_filter_and_sort, font=("Arial", 10))
+    sort_btn.pack(side="left", padx=5)
+
+    # 하단 테이블
+    bottom_frame = tk.Frame(root)
+    bottom_frame.pack(side="bottom", fill="both", expand=True, padx=10, pady=10)
+
+    scroll = tk.Scrollbar(bottom_frame, orient="vertical")
+    scroll.pack(side="right", fill="y")
 
-columns = ("user", "message_count", "message_letters_count", "first_message_time", "last_message_time", "joined_time", "left_time")
-user_table = ttk.Treeview(bottom_frame, columns=columns, height=15, show="headings", yscrollcommand=scroll.set)
+    columns = ("user", "message_count", "message_letters_count", "first_message_time", "last_message_time", "joined_time", "left_time")
+    user_table = VirtualTreeview(bottom_frame, columns=columns, height=15, show="headings", yscrollcommand=scroll.set)
 
-# (1) 인덱스(#0) 컬럼 활성화
-user_table["show"] = ("tree","headings")
-user_table.column("#0", width=50, minwidth=30, anchor="center")  # 인덱스 컬럼 폭 조정
-user_table.heading("#0", text="No.")   # 인덱스 컬럼
+    # (1) 인덱스(#0) 컬럼 활성화
+    user_table["show"] = ("tree","headings")
+    user_table.column("#0", width=50, minwidth=30, anchor="center")  # 인덱스 컬럼 폭 조정
+    user_table.heading("#0", text="No.")   # 인덱스 컬럼
 
-user_table.heading("user", text="User")
-user_table.heading("message_count", text="Message Count")
-user_table.column("message_count", width=120, anchor="center")
+    user_table.heading("user", text="User")
+    user_table.heading("message_count", text="Message Count")
+    user_table.column("message_count", width=120, anchor="center")
 
-user_table.heading("message_letters_count", text="Message Letters Count")
-user_table.column("message_letters_count", width=150, anchor="center")
+    user_table.heading("message_letters_count", text="Message Letters Count")
+    user_table.column("message_letters_count", width=150, anchor="center")
 
-user_table.heading("first_message_time", text="First Msg Time")
-user_table.column("first_message_time", width=180, anchor="center")
+    user_table.heading("first_message_time", text="First Msg Time")
+    user_table.column("first_message_time", width=180, anchor="center")
 
-user_table.heading("last_message_time", text="Last Msg Time")
-user_table.column("last_message_time", width=180, anchor="center")
+    user_table.heading("last_message_time", text="Last Msg Time")
+    user_table.column("last_message_time", width=180, anchor="center")
 
-user_table.heading("joined_time", text="Joined")
-user_table.column("joined_time", width=120, anchor="center")
+    user_table.heading("joined_time", text="Joined")
+    user_table.column("joined_time", width=120, anchor="center")
 
-user_table.heading("left_time", text="Left")
-user_table.column("left_time", width=120, anchor="center")
+    user_table.heading("left_time", text="Left")
+    user_table.column("left_time", width=120, anchor="center")
 
-user_table.pack(side="left", fill="both", expand=True)
-scroll.config(command=user_table.yview)
+    user_table.pack(side="left", fill="both", expand=True)
+    scroll.config(command=user_table.yview)
 
-# 테이블 더블클릭 -> 상세정보
-user_table.bind("<Double-1>", show_user_details)
+    # 테이블 더블클릭 -> 상세정보
+    user_table.bind("<Double-1>", show_user_details)
 
-root.mainloop()
+    root.after(PRELOAD_DELAY_MS, preload_modules)
+    root.mainloop()
@@ -0,0 +1,102 @@
+# merge_exports.py
+import numpy as np
+
+from message_table import ChainedBuffer, MessageTable
+
+def _row_keys(table, rows):
+    """
+    행마다 (분, 사용자 이름, 종류, 본문 bytes)의 64비트 해시.
+    본문은 한 줄씩 잘라 해시만 남기므로 전체 문자열 집합을 메모리에 만들지 않는다.
+    """
+    buf = table.text_buf
+    users = table.users
+    return np.array([
+        hash((m, users[u], k, buf[s:s + n]))
+        for m, u, k, s, n in zip(
+            table.minutes[rows].tolist(), table.user_ids[rows].tolist(), table.kinds[rows].tolist(),
+            table.text_starts[rows].tolist(), table.text_nbytes[rows].tolist(),
+        )
+    ], dtype=np.int64)
+
+def _new_rows_mask(old_keys, new_keys):
+    """
+    new_keys 중 old_keys에 없는 행이면 True.
+    같은 키가 여러 번 나오면 (같은 분에 같은 말을 여러 번 한 경우) old_keys에 있는 개수만큼만 중복으로 본다.
+    (np.unique는 값 종류가 많으면 해시 방식이라 느려서 정렬 + searchsorted로 센다)
+    """
+    old_sorted = np.sort(old_keys)
+    order = np.argsort(new_keys, kind="stable")
+    new_sorted = new_keys[order]
+    # 각 new 행이 같은 키 중 몇 번째로 나온 것인지 / old에 같은 키가 몇 개 있는지
+    rank = np.arange(len(new_keys)) - np.searchsorted(new_sorted, new_sorted, side="left")
+    old_count = np.searchsorted(old_sorted, new_sorted, side="right") - np.searchsorted(old_sorted, new_sorted, side="left")
+    keep = np.empty(len(new_keys), dtype=bool)
+    keep[order] = rank >= old_count
+    return keep
+
+def merge_tables(tables):
+    """
+    같은 대화방을 여러 번 내보낸 MessageTable들을 겹치는 부분 없이 하나로 합친다.
+
+    시작 시간 순으로 놓고, 앞에서 합친 부분의 마지막 시간(hi)과 다음 테이블의 시작 시간(lo)이
+    겹치는 구간의 행만 해시로 비교하므로 전체 행 수에 선형이다.
+    본문은 복사하지 않고 각 테이블의 버퍼(파일별 내용)를 ChainedBuffer로 이어서 참조한다.
+    겹치는 구간 안에서 새로 남긴 행은 앞 테이블 뒤에 붙으므로, 마지막에 그 겹치는 구간만 분 단위로
+    안정 정렬해서 시간순으로 만든다 (같은 분 안에서는 파일 순서 유지).
+    """
+    tables = sorted((t for t in tables if len(t)), key=lambda t: int(t.minutes.min()))
+    if not tables:
+        return MessageTable.empty()
+
+    pieces = []   # (table, 남길 행 번호, 남긴 행의 최대 분)
+    hi = None     # 지금까지 합친 행의 마지막 분
+    for t in tables:
+        lo = int(t.minutes.min())
+        if hi is None or lo > hi:
+            rows = np.arange(len(t))
+        else:
+            # t에서 hi 이전까지 vs 앞에서 합친 것 중 lo 이후
+            overlap_end = int(np.flatnonzero(t.minutes <= hi)[-1]) + 1
+            old_keys = []
+            for pt, prows, pt_hi in reversed(pieces):
+                if pt_hi < lo:
+                    break
+                old_keys.append(_row_keys(pt, prows[pt.minutes[prows] >= lo]))
+            keep = _new_rows_mask(np.concatenate(old_keys), _row_keys(t, np.arange(overlap_end)))
+            rows = np.concatenate([np.flatnonzero(keep), np.arange(overlap_end, len(t))])
+        if len(rows):
+            pieces.append((t, rows, int(t.minutes[rows].max())))
+            hi = pieces[-1][2] if hi is None else max(hi, pieces[-1][2])
+
+    if len(pieces) == 1 and len(pieces[0][1]) == len(pieces[0][0]):
+        return pieces[0][0]
+
+    text_buf = ChainedBuffer(t.text_buf for t, _, _ in pieces)
+    parts = []
+    for (t, rows, _), base in zip(pieces, text_buf.offsets):
+        part = t.take(rows)
+        part.text_starts = part.text_starts + base
+        parts.append(part)
+    merged = MessageTable.concat(parts, text_buf=text_buf)
+    _sort_overlaps(merged)
+    return merged
+
+def _sort_overlaps(table):
+    """
+    각자 시간순인 조각을 이어 붙인 table에서 시간이 거꾸로 가는 곳(조각 경계)마다
+    앞쪽의 더 늦은 행 ~ 뒤쪽의 더 이른 행 구간만 제자리에서 안정 정렬한다.
+    전체를 다시 정렬하거나 복사하지 않으므로 O(n + 겹치는 구간 정렬).
+    """
+    minutes = table.minutes
+    columns = (minutes, table.user_ids, table.kinds, table.text_lens, table.text_starts, table.text_nbytes)
+    descents = np.flatnonzero(minutes[1:] < minutes[:-1]) + 1
+    bounds = np.append(descents, len(minutes))
+    for b, run_end in zip(descents.tolist(), bounds[1:].tolist()):
+        if minutes[b] >= minutes[b - 1]:
+            continue   # 앞 구간을 정렬하면서 풀렸다
+        # [0, b)는 이미 정렬됨, [b, run_end)도 한 조각 안이라 정렬됨
+        start = int(np.searchsorted(minutes[:b], minutes[b], side="right"))
+        end = b + int(np.searchsorted(minutes[b:run_end], minutes[b - 1], side="right"))
+        order = np.argsort(minutes[start:end], kind="stable")
+        for col in columns:
+            col[start:end] = col[start:end][order]
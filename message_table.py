@@ -0,0 +1,366 @@
+# message_table.py
+from array import array
+from bisect import bisect_right
+from itertools import count
+from datetime import datetime, timedelta
+
+import numpy as np
+
+# kind 값 (int8)
+KIND_MESSAGE = 0
+KIND_JOIN = 1
+KIND_LEAVE = 2
+
+ACTION_TO_KIND = {"들어왔습니다": KIND_JOIN, "나갔습니다": KIND_LEAVE}
+KIND_TO_ACTION = {v: k for k, v in ACTION_TO_KIND.items()}
+
+# 시간은 1970-01-01 00:00(로컬, naive) 기준 분(minute) 단위 정수로 저장
+EPOCH = datetime(1970, 1, 1)
+ONE_MINUTE = timedelta(minutes=1)
+MINUTES_PER_DAY = 24 * 60
+
+_table_versions = count(1)   # MessageTable마다 다른 버전 번호 (차트 캐시 키 등에 사용)
+
+
+def to_minutes(dt):
+    """
+    datetime -> epoch 분 (초 이하는 버림)
+    """
+    return (dt - EPOCH) // ONE_MINUTE
+
+def from_minutes(minutes):
+    """
+    epoch 분 -> datetime
+    """
+    return EPOCH + timedelta(minutes=int(minutes))
+
+def minutes_range(start_dt, end_dt):
+    """
+    start_dt <= t <= end_dt 조건을 분 단위 닫힌 구간 [lo, hi]로 변환.
+    메시지 시간은 항상 0초이므로 start_dt는 올림, end_dt는 버림하면 결과가 같다.
+    """
+    lo = -(-(start_dt - EPOCH) // ONE_MINUTE)
+    hi = to_minutes(end_dt)
+    return lo, hi
+
+
+class ChainedBuffer:
+    """
+    여러 본문 버퍼(파일별 내용 등)를 복사하지 않고 하나로 이어 붙인 것처럼 보이게 한다.
+    offsets[i]가 i번째 버퍼의 시작 위치. 슬라이스는 버퍼 하나 안에서만 가능하다(본문은 버퍼를 넘지 않음).
+    """
+    def __init__(self, buffers):
+        self.buffers = list(buffers)
+        self.offsets = [0]
+        for buf in self.buffers:
+            self.offsets.append(self.offsets[-1] + len(buf))
+
+    def __len__(self):
+        return self.offsets[-1]
+
+    def __getitem__(self, key):
+        if not isinstance(key, slice) or key.step is not None:
+            raise TypeError("ChainedBuffer는 연속 구간 슬라이스만 지원합니다")
+        start, stop, _ = key.indices(len(self))
+        i = min(bisect_right(self.offsets, start) - 1, len(self.buffers) - 1)
+        base = self.offsets[i]
+        if stop > self.offsets[i + 1]:
+            raise IndexError("버퍼 경계를 넘는 슬라이스")
+        return self.buffers[i][start - base:stop - base]
+
+
+class MessageTableBuilder:
+    """
+    메시지를 한 건씩 append 해서 MessageTable을 만든다.
+    파이썬 array/bytearray에 쌓으므로 dict 리스트보다 훨씬 작다.
+    """
+    def __init__(self):
+        self.minutes = array("q")
+        self.user_ids = array("i")
+        self.kinds = array("b")
+        self.text_lens = array("i")
+        self.text_starts = array("q")
+        self.text_nbytes = array("i")
+        self.text_buf = bytearray()
+        self.users = []
+        self.user_index = {}
+
+    def intern_user(self, name):
+        uid = self.user_index.get(name)
+        if uid is None:
+            uid = self.user_index[name] = len(self.users)
+            self.users.append(name)
+        return uid
+
+    def append(self, kind, user, minutes, text=""):
+        self.minutes.append(minutes)
+        self.user_ids.append(self.intern_user(user))
+        self.kinds.append(kind)
+        self.text_lens.append(len(text))
+        encoded = text.encode("utf-8")
+        self.text_starts.append(len(self.text_buf))
+        self.text_nbytes.append(len(encoded))
+        self.text_buf += encoded
+
+    def append_record(self, rec):
+        """
+        parse_kakao_chat 형식의 dict 한 건 추가
+        """
+        if rec["type"] == "message":
+            self.append(KIND_MESSAGE, rec["user"], to_minutes(rec["time"]), rec["message"])
+        else:
+            self.append(ACTION_TO_KIND[rec["action"]], rec["user"], to_minutes(rec["time"]))
+
+    def append_raw(self, kind, uid, minutes, text_len, text_start, text_nbytes):
+        """
+        본문을 복사하지 않고 외부 버퍼(원본 파일) 위치만 기록 (mmap 수집 경로용)
+        """
+        self.minutes.append(minutes)
+        self.user_ids.append(uid)
+        self.kinds.append(kind)
+        self.text_lens.append(text_len)
+        self.text_starts.append(text_start)
+        self.text_nbytes.append(text_nbytes)
+
+    def build(self, text_buf=None):
+        """
+        text_buf를 주면 self.text_buf 대신 그 버퍼를 본문 버퍼로 쓴다
+        """
+        return MessageTable(
+            np.frombuffer(self.minutes, dtype=np.int64).copy(),
+            np.frombuffer(self.user_ids, dtype=np.int32).copy(),
+            np.frombuffer(self.kinds, dtype=np.int8).copy(),
+            np.frombuffer(self.text_lens, dtype=np.int32).copy(),
+            np.frombuffer(self.text_starts, dtype=np.int64).copy(),
+            np.frombuffer(self.text_nbytes, dtype=np.int32).copy(),
+            bytes(self.text_buf) if text_buf is None else text_buf,
+            self.users,
+        )
+
+
+class MessageTable:
+    """
+    파싱된 메시지를 열(column) 단위 NumPy 배열로 보관.
+
+    - minutes    : int64, epoch 분
+    - user_ids   : int32, users(이름 테이블) 인덱스
+    - kinds      : int8, KIND_MESSAGE / KIND_JOIN / KIND_LEAVE
+    - text_lens  : int32, 메시지 글자 수
+    - text_starts / text_nbytes : text_buf 안에서 UTF-8 본문 위치
+      (text_buf는 bytes. 수집 경로에서는 원본 파일 내용 그대로이고 본문은 text()로 볼 때만 디코딩)
+    """
+    def __init__(self, minutes, user_ids, kinds, text_lens, text_starts, text_nbytes, text_buf, users):
+        self.minutes = minutes
+        self.user_ids = user_ids
+        self.kinds = kinds
+        self.text_lens = text_lens
+        self.text_starts = text_starts
+        self.text_nbytes = text_nbytes
+        self.text_buf = text_buf
+        self.users = users
+        self.user_index = {name: i for i, name in enumerate(users)}
+        self.version = next(_table_versions)
+        # 시간순 메시지 인덱스 (처음 조회할 때 생성)
+        self._msg_rows = None
+        self._msg_minutes = None
+        # 사용자별 메시지 행 번호 (CSR: _user_rows[_user_offsets[u]:_user_offsets[u + 1]])
+        self._user_rows = None
+        self._user_offsets = None
+
+    @classmethod
+    def from_records(cls, records):
+        """
+        dict 레코드 iterable(iter_kakao_chat 결과 등)로부터 생성
+        """
+        builder = MessageTableBuilder()
+        for rec in records:
+            builder.append_record(rec)
+        return builder.build()
+
+    @classmethod
+    def empty(cls):
+        return MessageTableBuilder().build()
+
+    @classmethod
+    def concat(cls, tables, text_buf=None):
+        """
+        여러 테이블을 순서대로 이어 붙인다. 사용자 id는 처음 등장 순서대로 다시 매긴다.
+        text_buf를 주면 각 테이블의 본문 위치가 이미 그 버퍼(예: 같은 파일 내용) 기준이라고 보고
+        버퍼를 합치지 않는다.
+        """
+        tables = list(tables)
+        if not tables:
+            return cls.empty()
+
+        users = []
+        user_index = {}
+        user_ids = []
+        text_starts = []
+        buf_offset = 0
+        for t in tables:
+            remap = np.empty(len(t.users), dtype=np.int32)
+            for local_id, name in enumerate(t.users):
+                uid = user_index.get(name)
+                if uid is None:
+                    uid = user_index[name] = len(users)
+                    users.append(name)
+                remap[local_id] = uid
+            user_ids.append(remap[t.user_ids])
+            if text_buf is None:
+                text_starts.append(t.text_starts + buf_offset)
+                buf_offset += len(t.text_buf)
+            else:
+                text_starts.append(t.text_starts)
+
+        return cls(
+            np.concatenate([t.minutes for t in tables]),
+            np.concatenate(user_ids),
+            np.concatenate([t.kinds for t in tables]),
+            np.concatenate([t.text_lens for t in tables]),
+            np.concatenate(text_starts),
+            np.concatenate([t.text_nbytes for t in tables]),
+            b"".join(t.text_buf for t in tables) if text_buf is None else text_buf,
+            users,
+        )
+
+    def __len__(self):
+        return len(self.minutes)
+
+    def _subset(self, index):
+        """
+        index(slice 또는 행 번호 배열)로 고른 행만 남긴 테이블.
+        사용자 id는 남은 행에서 처음 등장한 순서로 다시 매기고, 본문 버퍼는 그대로 공유한다.
+        """
+        user_ids = self.user_ids[index]
+        first_row = np.full(len(self.users), len(user_ids), dtype=np.int64)
+        np.minimum.at(first_row, user_ids, np.arange(len(user_ids)))
+        present = np.flatnonzero(first_row < len(user_ids))
+        order = present[np.argsort(first_row[present], kind="stable")]
+        remap = np.zeros(len(self.users), dtype=np.int32)
+        remap[order] = np.arange(len(order), dtype=np.int32)
+        return MessageTable(
+            self.minutes[index], remap[user_ids], self.kinds[index], self.text_lens[index],
+            self.text_starts[index], self.text_nbytes[index], self.text_buf,
+            [self.users[u] for u in order],
+        )
+
+    def slice(self, start, stop):
+        """
+        [start, stop) 행만 남긴 테이블 (배열은 복사하지 않고 view)
+        """
+        return self._subset(slice(start, stop))
+
+    def head(self, n):
+        return self.slice(0, n)
+
+    def take(self, rows):
+        """
+        rows(행 번호 배열) 순서대로 고른 테이블
+        """
+        return self._subset(np.asarray(rows, dtype=np.int64))
+
+    @property
+    def nbytes(self):
+        """
+        배열 + 본문 버퍼 메모리 사용량 (이름 테이블 제외)
+        """
+        arrays = (self.minutes, self.user_ids, self.kinds, self.text_lens, self.text_starts, self.text_nbytes)
+        return sum(a.nbytes for a in arrays) + len(self.text_buf)
+
+    def message_mask(self):
+        return self.kinds == KIND_MESSAGE
+
+    def _build_message_index(self):
+        """
+        일반 메시지 행 번호를 시간순으로 정렬해 둔다.
+        내보내기 파일은 원래 시간순이라 보통은 정렬 없이 그대로 쓴다.
+        """
+        rows = np.flatnonzero(self.kinds == KIND_MESSAGE)
+        mins = self.minutes[rows]
+        if len(mins) > 1 and (mins[1:] < mins[:-1]).any():
+            order = np.argsort(mins, kind="stable")
+            rows = rows[order]
+            mins = mins[order]
+        self._msg_rows = rows
+        self._msg_minutes = mins
+
+    def message_rows(self, start_dt=None, end_dt=None):
+        """
+        start_dt <= 시간 <= end_dt 인 일반 메시지의 행 번호 배열 (시간순).
+        정렬된 인덱스에서 이진 탐색(searchsorted)으로 구간만 잘라내므로 O(log n + k).
+        범위가 없으면 전체 메시지.
+        """
+        if not (start_dt and end_dt):
+            if self._msg_rows is None:
+                self._build_message_index()
+            return self._msg_rows
+        return self.message_rows_by_minutes(*minutes_range(start_dt, end_dt))
+
+    def message_rows_by_minutes(self, lo, hi):
+        """
+        message_rows와 같지만 epoch 분 단위 닫힌 구간 [lo, hi]로 조회
+        """
+        i, j = self.message_span_by_minutes(lo, hi)
+        return self._msg_rows[i:j]
+
+    def message_span(self, start_dt=None, end_dt=None):
+        """
+        message_rows(start_dt, end_dt)가 시간순 메시지 인덱스에서 차지하는 구간 (i, j).
+        같은 메시지를 고르는 기간은 모두 같은 값이 되므로 캐시 키로 쓸 수 있다.
+        """
+        if not (start_dt and end_dt):
+            return 0, len(self.message_rows())
+        return self.message_span_by_minutes(*minutes_range(start_dt, end_dt))
+
+    def message_span_by_minutes(self, lo, hi):
+        if self._msg_rows is None:
+            self._build_message_index()
+        i = int(np.searchsorted(self._msg_minutes, lo, side="left"))
+        j = int(np.searchsorted(self._msg_minutes, hi, side="right"))
+        return i, max(i, j)
+
+    def build_user_index(self):
+        """
+        사용자별 일반 메시지 행 번호(시간순) 목록을 한 배열에 이어 붙여 만들어 둔다.
+        로드할 때 한 번 부르면 이후 user_message_rows는 배열 슬라이스만 한다.
+        """
+        if self._user_rows is not None:
+            return
+        rows = self.message_rows()
+        order = np.argsort(self.user_ids[rows], kind="stable")
+        offsets = np.zeros(len(self.users) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(self.user_ids[rows], minlength=len(self.users)), out=offsets[1:])
+        self._user_rows = rows[order]
+        self._user_offsets = offsets
+
+    def user_message_rows(self, uid):
+        """
+        사용자 uid의 일반 메시지 행 번호 배열 (시간순)
+        """
+        self.build_user_index()
+        return self._user_rows[self._user_offsets[uid]:self._user_offsets[uid + 1]]
+
+    def text(self, i):
+        start = int(self.text_starts[i])
+        return self.text_buf[start:start + int(self.text_nbytes[i])].decode("utf-8")
+
+    def time(self, i):
+        return from_minutes(self.minutes[i])
+
+    def user(self, i):
+        return self.users[self.user_ids[i]]
+
+    def record(self, i):
+        """
+        i번째 행을 parse_kakao_chat 형식의 dict로 변환
+        """
+        kind = int(self.kinds[i])
+        if kind == KIND_MESSAGE:
+            return {"type": "message", "user": self.user(i), "time": self.time(i), "message": self.text(i)}
+        return {"type": "system", "user": self.user(i), "action": KIND_TO_ACTION[kind], "time": self.time(i)}
+
+    def records(self, indices=None):
+        if indices is None:
+            indices = range(len(self))
+        for i in indices:
+            yield self.record(i)
@@ -0,0 +1,54 @@
+# name_index.py
+import numpy as np
+
+class NameIndex:
+    """
+    사용자 이름 부분 문자열 검색용 인덱스.
+    소문자 이름의 글자(1-gram)/두 글자(2-gram)마다 그 글자를 포함하는 이름 번호 배열을 만들어 두고,
+    검색어의 2-gram 목록들을 교집합한 후보만 실제로 `keyword in name` 확인한다.
+    결과는 names 순서(이름 번호 오름차순)다.
+    """
+    def __init__(self, names):
+        self.names = list(names)
+        self.lower = [name.lower() for name in self.names]
+        grams = {}
+        for i, name in enumerate(self.lower):
+            for g in set(name) | {name[k:k + 2] for k in range(len(name) - 1)}:
+                grams.setdefault(g, []).append(i)
+        self.postings = {g: np.array(ids, dtype=np.int32) for g, ids in grams.items()}
+        self.all_ids = np.arange(len(self.names), dtype=np.int32)
+        # 직전 검색 (검색어가 이어서 길어지면 직전 결과 안에서만 찾는다)
+        self._last = ("", self.all_ids)
+
+    def __len__(self):
+        return len(self.names)
+
+    def search(self, keyword):
+        """
+        keyword(대소문자 무시)를 포함하는 이름 번호 배열
+        """
+        keyword = keyword.lower()
+        if not keyword:
+            return self.all_ids
+
+        last_keyword, last_ids = self._last
+        if last_keyword and last_keyword in keyword:
+            candidates = last_ids
+        elif len(keyword) == 1:
+            candidates = self.postings.get(keyword, self.all_ids[:0])
+        else:
+            lists = sorted(
+                (self.postings.get(keyword[k:k + 2], self.all_ids[:0]) for k in range(len(keyword) - 1)),
+                key=len,
+            )
+            candidates = lists[0]
+            for ids in lists[1:]:
+                if not len(candidates):
+                    break
+                candidates = np.intersect1d(candidates, ids, assume_unique=True)
+
+        lower = self.lower
+        if len(keyword) > 2 or candidates is last_ids:
+            candidates = np.array([i for i in candidates.tolist() if keyword in lower[i]], dtype=np.int32)
+        self._last = (keyword, candidates)
+        return candidates
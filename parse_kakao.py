@@ -1,77 +1,480 @@
 # parse_kakao.py
+import io
+import mmap
+import os
 import re
-from datetime import datetime
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime, timedelta
+
+from message_table import (
+    MessageTable, MessageTableBuilder, KIND_MESSAGE, KIND_JOIN, KIND_LEAVE,
+    MINUTES_PER_DAY, to_minutes
+)
+
+# 파싱 결과가 달라지는 변경을 하면 올린다 (디스크 캐시 무효화용)
+PARSER_VERSION = 1
+
+# 줄 종류별 패턴 (모듈 로드 시 한 번만 컴파일)
+DATE_RE = re.compile(r"^-+\s+(\d{4})년\s+(\d{1,2})월\s+(\d{1,2})일\s+[가-힣]+\s+-+$")
+MESSAGE_RE = re.compile(r"\[(.*?)\] \[(.*?)\] (.+)")
+JOIN_LEAVE_RE = re.compile(r"(.*?)님이 (들어왔습니다|나갔습니다)\.")
+
+# 자정 기준 분(minute) -> timedelta (하루 1440개를 미리 만들어 둠)
+_MINUTE_DELTAS = [timedelta(minutes=i) for i in range(24 * 60)]
+
+
+def kakao_time_to_minutes(time_str):
+    """
+    '오전 9:00' / '오후 10:22' 등을 자정 기준 분(minute)으로 변환.
+    형식이 맞지 않으면 ValueError.
+    """
+    sep = time_str.find(" ")
+    colon = time_str.find(":", sep + 1)
+    if sep < 0 or colon < 0:
+        raise ValueError(time_str)
+    hour = int(time_str[sep + 1:colon])
+    minute = int(time_str[colon + 1:])
+    if not (0 <= hour < 24 and 0 <= minute < 60):
+        raise ValueError(time_str)
+
+    period = time_str[:sep]
+    if period == "오후" and hour != 12:
+        hour += 12
+    elif period == "오전" and hour == 12:
+        hour = 0
+    if hour >= 24:
+        raise ValueError(time_str)
+    return hour * 60 + minute
+
 
 def parse_kakao_chat(chat_data):
     """
     카카오톡 txt 파일을 파싱하여 messages 리스트를 반환.
+    chat_data는 전체 문자열, 열린 파일, 줄 단위 iterable 모두 가능.
+    """
+    return list(iter_kakao_chat(chat_data))
+
+def iter_kakao_chat(lines):
+    """
+    카카오톡 대화 내용을 한 줄씩 읽으며 메시지 레코드를 하나씩 yield 하는 제너레이터.
+    열린 파일 핸들을 그대로 넘기면 파일 전체를 메모리에 올리지 않는다.
+
+    줄의 첫 글자로 종류를 먼저 고른다('-' 날짜, '[' 메시지, 그 외 입장/퇴장).
     """
-    messages = []
-    date_pattern = r"^-+\s+(\d{4})년\s+(\d{1,2})월\s+(\d{1,2})일\s+[가-힣]+\s+-+$"
-    message_pattern = r"\[(.*?)\] \[(.*?)\] (.+)"
-    join_leave_pattern = r"(.*?)님이 (들어왔습니다|나갔습니다)\."
-
-    current_date = None
-
-    def parse_kakao_time(time_str):
-        """
-        '오전 9:00' / '오후 10:22' 등을 24시간제로 변환
-        """
-        period, clock = time_str.split()
-        hour, minute = map(int, clock.split(":"))
-        if period == "오후" and hour != 12:
-            hour += 12
-        if period == "오전" and hour == 12:
-            hour = 0
-        return hour, minute
-
-    for line in chat_data.split("\n"):
+    if isinstance(lines, str):
+        lines = lines.split("\n")
+
+    date_match = DATE_RE.match
+    message_match = MESSAGE_RE.match
+    join_leave_match = JOIN_LEAVE_RE.match
+    minute_deltas = _MINUTE_DELTAS
+
+    current_date = None   # 입장/퇴장 시간으로 쓰임
+    day_start = None      # 메시지 시간 계산용 (해당 날짜 00:00)
+
+    for line in lines:
         line_stripped = line.strip()
+        if not line_stripped:
+            continue
+        head = line_stripped[0]
 
         # 날짜 라인
-        date_match = re.match(date_pattern, line_stripped)
-        if date_match:
-            year, month, day = map(int, date_match.groups())
-            current_date = datetime(year, month, day)
-            continue
+        if head == "-":
+            m = date_match(line_stripped)
+            if m:
+                year, month, day = m.groups()
+                current_date = day_start = datetime(int(year), int(month), int(day))
+                continue
+
+        # 일반 메시지
+        elif head == "[":
+            m = message_match(line_stripped)
+            if m:
+                name, time_str, msg_text = m.groups()
+                try:
+                    minutes = kakao_time_to_minutes(time_str)
+                except ValueError:
+                    minutes = None
+
+                if minutes is not None:
+                    if not current_date:
+                        current_date = datetime.now()
+                    if day_start is None:
+                        day_start = datetime(current_date.year, current_date.month, current_date.day)
+                    yield {
+                        "type": "message",
+                        "user": name,
+                        "time": day_start + minute_deltas[minutes],
+                        "message": msg_text
+                    }
+                    continue
+
+                # '[봇] [공지] 철수님이 들어왔습니다.' 처럼 입장/퇴장일 수도 있음
+                if not join_leave_match(line_stripped):
+                    print(f"[WARNING] Invalid time format: {time_str}")
+                    continue
 
         # 입장/퇴장 (system)
-        join_leave_match = re.match(join_leave_pattern, line_stripped)
-        if join_leave_match:
-            user, action = join_leave_match.groups()
+        m = join_leave_match(line_stripped)
+        if m:
+            user, action = m.groups()
             if not current_date:
                 current_date = datetime.now()
-                # current_date = None
-            messages.append({
+            yield {
                 "type": "system",
                 "user": user,
                 "action": action,
                 "time": current_date
-            })
+            }
+
+
+# 병렬 파싱: 이보다 작은 조각으로는 나누지 않음
+MIN_PARALLEL_CHUNK = 4 * 1024 * 1024
+
+# mmap 수집 중 진행 상황 보고/취소 확인 간격 (바이트)
+PROGRESS_INTERVAL = 4 * 1024 * 1024
+
+
+class ParseCancelled(Exception):
+    """
+    cancel 이벤트가 설정되어 수집을 중단했을 때
+    """
+
+def _next_date_header_offset(f, offset, file_size):
+    """
+    offset 이후(포함) 처음 나오는 날짜 줄의 시작 바이트 위치. 없으면 file_size
+    """
+    # offset이 마침 줄 시작이면 그 줄부터 보도록 한 바이트 앞에서 줄을 맞춘다
+    f.seek(offset - 1)
+    f.readline()
+    while True:
+        pos = f.tell()
+        line = f.readline()
+        if not line:
+            return file_size
+        if line.lstrip()[:1] == b"-" and DATE_RE.match(line.decode("utf-8", "replace").strip()):
+            return pos
+
+def split_at_date_headers(path, n_chunks):
+    """
+    파일을 n_chunks개 정도의 바이트 구간 [(start, end), ...]으로 나눈다.
+    첫 구간을 빼고는 모두 날짜 줄에서 시작하므로 각 구간을 독립적으로 파싱할 수 있다.
+    """
+    file_size = os.path.getsize(path)
+    bounds = [0]
+    with open(path, "rb") as f:
+        for i in range(1, n_chunks):
+            target = file_size * i // n_chunks
+            if target <= bounds[-1]:
+                continue
+            pos = _next_date_header_offset(f, target, file_size)
+            if pos >= file_size:
+                break
+            if pos > bounds[-1]:
+                bounds.append(pos)
+    bounds.append(file_size)
+    return list(zip(bounds[:-1], bounds[1:]))
+
+def _parse_byte_range(path, start, end):
+    """
+    (워커 프로세스) 파일의 [start, end) 바이트 구간을 파싱해서 MessageTable로 반환
+    """
+    with open(path, "rb") as f:
+        f.seek(start)
+        chunk = f.read(end - start)
+    # 순차 파싱(텍스트 모드 open)과 같은 줄바꿈 처리
+    lines = io.TextIOWrapper(io.BytesIO(chunk), encoding="utf-8")
+    return MessageTable.from_records(iter_kakao_chat(lines))
+
+def parse_kakao_file(path, workers=1):
+    """
+    카카오톡 txt 파일 경로를 파싱해서 MessageTable로 반환.
+    workers가 2 이상이고 파일이 충분히 크면 날짜 줄 경계로 나눠 여러 프로세스에서 파싱한 뒤
+    순서대로 합친다 (결과는 순차 파싱과 같음).
+    """
+    n_chunks = min(workers or 1, os.path.getsize(path) // MIN_PARALLEL_CHUNK)
+    if n_chunks < 2:
+        with open(path, "r", encoding="utf-8") as f:
+            return MessageTable.from_records(iter_kakao_chat(f))
+
+    ranges = split_at_date_headers(path, n_chunks)
+    with ProcessPoolExecutor(max_workers=min(workers, len(ranges))) as pool:
+        futures = [pool.submit(_parse_byte_range, path, s, e) for s, e in ranges]
+        tables = [fut.result() for fut in futures]
+    return MessageTable.concat(tables)
+
+
+# ---------------------------------------------------------------
+# mmap + bytes 단위 수집 경로
+# 파일을 str로 디코딩하지 않고 원본 UTF-8 바이트에서 줄/종류를 찾는다.
+# 이름과 시간만 디코딩하고, 본문은 파일 위치만 기록해 두었다가 볼 때 디코딩한다.
+# 메모리: 수집이 끝나면 파일 내용을 bytes로 복사해 두므로 상주 메모리는 파일 크기 + 열 배열이다.
+# str로 디코딩하는 경로보다는 작지만 파일을 통째로 읽는 것과 같은 크기이며, mmap을 열어 둘 때처럼
+# 본문을 OS 페이지 캐시에 맡기지는 않는다 (원본 파일을 잠그거나 SIGBUS가 나지 않게 하는 대가).
+# ---------------------------------------------------------------
+_HANGUL_B = rb"(?:[\xea-\xed][\x80-\xbf][\x80-\xbf])+"
+# str.strip() / str 정규식의 \s와 같은 공백. bytes 정규식의 \s는 ASCII만 보므로 UTF-8로 직접 나열한다
+_WHITESPACE_B = b" \t\r\n\x0b\x0c\x1c\x1d\x1e\x1f"   # 1바이트 공백
+_SPACES_MB = frozenset(                                # 여러 바이트 공백 (U+0085, NBSP, U+2000~U+200A, 전각 공백 등)
+    c.encode() for c in "\x85\xa0\u1680" + "".join(map(chr, range(0x2000, 0x200B))) + "\u2028\u2029\u202f\u205f\u3000"
+)
+_SPACE_LEADS = frozenset(sp[0] for sp in _SPACES_MB)   # 그 첫 바이트 (0xC2, 0xE1, 0xE2, 0xE3)
+_SPACE_PENULTS = frozenset(sp[-2] for sp in _SPACES_MB)   # 그 끝에서 두 번째 바이트 (0xC2, 0x80, 0x81, 0x9A)
+_SPACE_B = rb"(?:[ \t\r\n\x0b\x0c\x1c-\x1f]|" + b"|".join(re.escape(sp) for sp in sorted(_SPACES_MB)) + rb")+"
+DATE_RE_B = re.compile(
+    rb"-+" + _SPACE_B + rb"(\d{4})" + "년".encode() + _SPACE_B + rb"(\d{1,2})" + "월".encode()
+    + _SPACE_B + rb"(\d{1,2})" + "일".encode() + _SPACE_B + _HANGUL_B + _SPACE_B + rb"-+$"
+)
+MESSAGE_RE_B = re.compile(rb"\[(.*?)\] \[(.*?)\] (.+)")
+JOIN_LEAVE_RE_B = re.compile(rb"(.*?)" + "님이 (들어왔습니다|나갔습니다)\\.".encode())
+
+_ACTION_KIND_B = {"들어왔습니다".encode(): KIND_JOIN, "나갔습니다".encode(): KIND_LEAVE}
+_UTF8_CONTINUATION = bytes(range(0x80, 0xC0))   # 글자 수를 셀 때 지울 바이트
+
+def _strip_span(mm, s, e):
+    """
+    mm[s:e] 앞뒤의 공백을 str.strip()과 같은 기준으로 걷어낸 (s, e) (여러 바이트 공백 포함)
+    """
+    while s < e:
+        if mm[s] in _WHITESPACE_B:
+            s += 1
+        elif mm[s:s + 2] in _SPACES_MB:
+            s += 2
+        elif mm[s:s + 3] in _SPACES_MB:
+            s += 3
+        else:
+            break
+    while e > s:
+        if mm[e - 1] in _WHITESPACE_B:
+            e -= 1
+        elif e - s >= 2 and mm[e - 2:e] in _SPACES_MB:
+            e -= 2
+        elif e - s >= 3 and mm[e - 3:e] in _SPACES_MB:
+            e -= 3
+        else:
+            break
+    return s, e
+
+def _ingest_lines(mm, start, end, builder, progress=None, cancel=None):
+    """
+    mm[start:end] 구간의 줄들을 읽어 builder에 append_raw로 쌓는다.
+    PROGRESS_INTERVAL 바이트마다 progress(처리한 바이트, 행 수)를 부르고 cancel(threading.Event)을 확인한다.
+    """
+    find = mm.find
+    date_match = DATE_RE_B.match
+    message_match = MESSAGE_RE_B.match
+    join_leave_match = JOIN_LEAVE_RE_B.match
+    whitespace = _WHITESPACE_B
+    space_leads = _SPACE_LEADS
+    space_penults = _SPACE_PENULTS
+    continuation = _UTF8_CONTINUATION
+    # 줄마다 호출되므로 builder.append_raw 대신 배열 append를 직접 묶어 둔다
+    add_minutes = builder.minutes.append
+    add_user = builder.user_ids.append
+    add_kind = builder.kinds.append
+    add_len = builder.text_lens.append
+    add_start = builder.text_starts.append
+    add_nbytes = builder.text_nbytes.append
+
+    uid_by_name = {}    # 이름 bytes -> user id (처음 볼 때만 디코딩)
+    time_cache = {}     # '오후 10:22' bytes -> 자정 기준 분 (실패는 -1)
+
+    def user_id(name_b):
+        uid = uid_by_name.get(name_b)
+        if uid is None:
+            uid = uid_by_name[name_b] = builder.intern_user(name_b.decode("utf-8"))
+        return uid
+
+    current_minutes = None   # 입장/퇴장 시간 (epoch 분)
+    day_minutes = None       # 해당 날짜 00:00 (epoch 분)
+
+    next_report = start + PROGRESS_INTERVAL
+    pos = start
+    while pos < end:
+        if pos >= next_report:
+            next_report = pos + PROGRESS_INTERVAL
+            if cancel is not None and cancel.is_set():
+                raise ParseCancelled()
+            if progress is not None:
+                progress(pos - start, len(builder.minutes))
+
+        nl = find(b"\n", pos, end)
+        if nl < 0:
+            nl = end
+        s, e = pos, nl
+        pos = nl + 1
+
+        while s < e and mm[s] in whitespace:
+            s += 1
+        while e > s and mm[e - 1] in whitespace:
+            e -= 1
+        # 여러 바이트 공백(전각 공백, NBSP 등)이 앞뒤에 있을 수 있을 때만 느린 경로로 다시 걷어낸다
+        if s < e and (mm[s] in space_leads or mm[e - 2] in space_penults):
+            s, e = _strip_span(mm, s, e)
+        if s == e:
             continue
+        head = mm[s]
+
+        # 날짜 라인
+        if head == 0x2D:   # '-'
+            m = date_match(mm, s, e)
+            if m:
+                year, month, day = m.groups()
+                day_minutes = current_minutes = to_minutes(datetime(int(year), int(month), int(day)))
+                continue
 
         # 일반 메시지
-        message_match = re.match(message_pattern, line_stripped)
-        if message_match:
-            if not current_date:
-                current_date = datetime.now()
+        elif head == 0x5B:   # '['
+            m = message_match(mm, s, e)
+            if m:
+                name_b, time_b = m.group(1, 2)
+                tm = time_cache.get(time_b)
+                if tm is None:
+                    try:
+                        tm = kakao_time_to_minutes(time_b.decode("utf-8"))
+                    except (ValueError, UnicodeDecodeError):
+                        tm = -1
+                    time_cache[time_b] = tm
+
+                if tm >= 0:
+                    if current_minutes is None:
+                        current_minutes = to_minutes(datetime.now())
+                    if day_minutes is None:
+                        day_minutes = current_minutes - current_minutes % MINUTES_PER_DAY
+                    ts, te = m.span(3)
+                    add_minutes(day_minutes + tm)
+                    add_user(user_id(name_b))
+                    add_kind(KIND_MESSAGE)
+                    add_len(len(mm[ts:te].translate(None, continuation)))
+                    add_start(ts)
+                    add_nbytes(te - ts)
+                    continue
 
-            name, time_str, msg_text = message_match.groups()
-            try:
-                h, m = parse_kakao_time(time_str)
-                msg_time = datetime(
-                    current_date.year,
-                    current_date.month,
-                    current_date.day,
-                    h, m, 0, 0
-                )
-                messages.append({
-                    "type": "message",
-                    "user": name,
-                    "time": msg_time,
-                    "message": msg_text
-                })
-            except ValueError:
-                print(f"[WARNING] Invalid time format: {time_str}")
+                if not join_leave_match(mm, s, e):
+                    print(f"[WARNING] Invalid time format: {time_b.decode('utf-8', 'replace')}")
+                    continue
 
+        # 입장/퇴장 (system)
+        m = join_leave_match(mm, s, e)
+        if m:
+            name_b, action_b = m.groups()
+            if current_minutes is None:
+                current_minutes = to_minutes(datetime.now())
+            builder.append_raw(_ACTION_KIND_B[action_b], user_id(name_b), current_minutes, 0, 0, 0)
+
+def map_file(path):
+    """
+    파일 전체를 읽기 전용 mmap으로 연다 (빈 파일이면 b"")
+    """
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+def read_file(path):
+    """
+    파일 전체를 bytes로 읽는다 (열어 둔 채로 두지 않는다)
+    """
+    with open(path, "rb") as f:
+        return f.read()
+
+def _ingest_byte_range(path, start, end):
+    """
+    (워커 프로세스) [start, end) 구간을 mmap으로 수집. 본문 위치는 파일 기준 오프셋
+    """
+    mm = map_file(path)
+    builder = MessageTableBuilder()
+    try:
+        _ingest_lines(mm, start, end, builder)
+    finally:
+        if isinstance(mm, mmap.mmap):
+            mm.close()
+    return builder.build(text_buf=b"")
+
+def ingest_kakao_range(mm, start, end=None, progress=None, cancel=None):
+    """
+    이미 열린 mmap(또는 bytes)의 [start, end) 구간만 수집. 본문 버퍼는 mm 그대로.
+    progress(처리한 바이트, 전체 바이트, 행 수)는 중간중간 호출된다.
+    """
+    end = len(mm) if end is None else end
+    report = None
+    if progress is not None:
+        def report(done, rows):
+            progress(done, end - start, rows)
+
+    builder = MessageTableBuilder()
+    _ingest_lines(mm, start, end, builder, report, cancel)
+    if progress is not None:
+        progress(end - start, end - start, len(builder.minutes))
+    return builder.build(text_buf=mm)
+
+def last_date_header_offset(mm):
+    """
+    파일에서 마지막 날짜 줄의 시작 바이트 위치. 날짜 줄이 없으면 None
+    """
+    end = len(mm)
+    while end > 0:
+        pos = mm.rfind(b"-", 0, end)
+        if pos < 0:
+            return None
+        line_start = mm.rfind(b"\n", 0, pos) + 1
+        line_end = mm.find(b"\n", pos)
+        if line_end < 0:
+            line_end = len(mm)
+        s, e = _strip_span(mm, line_start, line_end)
+        if DATE_RE_B.match(mm, s, e):
+            return line_start
+        end = line_start
+    return None
+
+def ingest_kakao_mmap(path, workers=1, progress=None, cancel=None):
+    """
+    카카오톡 txt 파일을 mmap으로 열어 bytes 단위로 수집한 MessageTable을 반환.
+    수집이 끝나면 파일 내용을 bytes로 복사하고 mmap은 닫는다 (원본 파일을 열어 둔 채로 두지 않음).
+    그래서 수집 후에는 파일 크기만큼의 bytes가 메모리에 남는다 (파일을 통째로 읽은 것과 같은 크기).
+    반환된 테이블의 text_buf는 그 bytes이고, 메시지 본문은 text()로 볼 때만 디코딩된다.
+    workers가 2 이상이면 parse_kakao_file처럼 날짜 줄 경계로 나눠 병렬로 수집한다.
+
+    progress(처리한 바이트, 전체 바이트, 행 수)로 진행 상황을 알리고,
+    cancel(threading.Event)이 설정되면 ParseCancelled를 낸다.
+    """
+    mm = map_file(path)
+    try:
+        # 진행 상황이 너무 띄엄띄엄 보이지 않도록 워커 수보다 잘게 나눈다
+        n_chunks = min((workers or 1) * 4, len(mm) // MIN_PARALLEL_CHUNK) if (workers or 1) > 1 else 1
+        if n_chunks < 2:
+            messages = ingest_kakao_range(mm, 0, progress=progress, cancel=cancel)
+        else:
+            messages = _ingest_parallel(path, mm, n_chunks, workers, progress, cancel)
+        # mmap을 계속 열어 두면 Windows에서는 원본 파일이 잠겨 다시 내보낼 수 없고,
+        # 다른 OS에서는 파일이 잘리거나 다시 쓰이면 본문을 읽을 때 SIGBUS로 죽으므로 본문은 복사해 둔다
+        messages.text_buf = mm[:]
+    finally:
+        if isinstance(mm, mmap.mmap):
+            mm.close()
     return messages
+
+def _ingest_parallel(path, mm, n_chunks, workers, progress=None, cancel=None):
+    """
+    날짜 줄 경계로 나눈 구간을 워커 프로세스에서 수집해서 순서대로 이어 붙인다 (본문 버퍼는 mm)
+    """
+    ranges = split_at_date_headers(path, n_chunks)
+    pool = ProcessPoolExecutor(max_workers=min(workers, len(ranges)))
+    try:
+        futures = {pool.submit(_ingest_byte_range, path, s, e): e - s for s, e in ranges}
+        pending = set(futures)
+        done_bytes = 0
+        rows = 0
+        while pending:
+            finished, pending = wait(pending, timeout=0.2, return_when=FIRST_COMPLETED)
+            if cancel is not None and cancel.is_set():
+                raise ParseCancelled()
+            for fut in finished:
+                done_bytes += futures[fut]
+                rows += len(fut.result())
+            if finished and progress is not None:
+                progress(done_bytes, len(mm), rows)
+        tables = [fut.result() for fut in futures]
+    finally:
+        pool.shutdown(wait=False, cancel_futures=True)
+    return MessageTable.concat(tables, text_buf=mm)
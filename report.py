@@ -0,0 +1,151 @@
+# report.py
+"""
+Tk 없이 (서버/cron에서) 대화방 리포트 만들기.
+
+    python -m report export.txt [export2.txt ...] [-o OUT] [--start YYYY-MM-DD] [--end YYYY-MM-DD]
+                     [--no-charts] [--no-cache] [--workers N] [--dpi DPI]
+
+같은 방을 여러 번 내보낸 파일을 여러 개 주면 GUI와 같이 겹치는 기간은 한 번만 세서 합친다.
+OUT 디렉터리에 users.csv / users.json(사용자별 통계), pie.png / line.png(Agg로 그린 차트)를 쓴다.
+--start/--end를 주면 통계와 차트 모두 그 기간의 메시지·입장·퇴장만으로 계산한다
+(그 기간에 아무 기록이 없는 사용자는 빠지고, 입장/퇴장 시간도 기간 안의 것만 반영).
+tkinter는 import 하지 않고, --no-charts면 matplotlib도 import 하지 않는다.
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from loader import load_exports
+from message_table import from_minutes, minutes_range
+from stats import SORT_COLUMNS, analyze_user_activity
+
+
+def user_stats_rows(user_stats):
+    """
+    user_stats -> [{컬럼: 값}] (GUI 사용자 테이블과 같은 컬럼, 시간은 ISO 문자열, 없으면 "")
+    """
+    rows = []
+    for user, st in user_stats.items():
+        row = {}
+        for col, attr in SORT_COLUMNS.items():   # 컬럼 -> UserStats 속성 (user는 이름)
+            value = user if attr is None else getattr(st, attr)
+            row[col] = value.isoformat(sep=" ") if isinstance(value, datetime) else ("" if value is None else value)
+        rows.append(row)
+    return rows
+
+def range_user_stats(messages, start_dt, end_dt):
+    """
+    start_dt <= 시간 <= end_dt 행(메시지 + 입장/퇴장)만으로 계산한 user_stats.
+    행이 시간순이라고 가정하지 않고 마스크로 고른다 (파일 순서는 그대로 유지)
+    """
+    lo, hi = minutes_range(start_dt, end_dt)
+    minutes = messages.minutes
+    return analyze_user_activity(messages.take(np.flatnonzero((minutes >= lo) & (minutes <= hi))))
+
+def write_user_stats(user_stats, out_dir):
+    """
+    users.csv (엑셀에서 한글이 깨지지 않게 BOM 포함) + users.json
+    """
+    rows = user_stats_rows(user_stats)
+    with open(os.path.join(out_dir, "users.csv"), "w", encoding="utf-8-sig", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=list(SORT_COLUMNS))
+        writer.writeheader()
+        writer.writerows(rows)
+    with open(os.path.join(out_dir, "users.json"), "w", encoding="utf-8") as f:
+        json.dump(rows, f, ensure_ascii=False, indent=1)
+
+def write_charts(messages, out_dir, start_dt=None, end_dt=None, daily_counts=None, dpi=None):
+    """
+    pie.png(기간 내 Top 20 점유율) + line.png(일자별 대화량 + 30일 이동평균). 쓴 파일 이름 목록
+    """
+    from chart_figures import (
+        ChartFigure, draw_pie, line_series, pie_title, pie_top20, update_daily_lines, use_korean_font,
+    )
+    use_korean_font()
+
+    written = []
+    top_20, _ = pie_top20(messages, start_dt, end_dt, daily_counts)
+    figure = ChartFigure(figsize=(6, 5), layout="tight")
+    if top_20:
+        draw_pie(figure, top_20, pie_title(start_dt, end_dt))
+    else:
+        figure.show_notice("No messages in this range")
+    figure.save(os.path.join(out_dir, "pie.png"), dpi=dpi)
+    written.append("pie.png")
+
+    series = line_series(messages, start_dt, end_dt)
+    figure = ChartFigure(figsize=(8, 4), layout="tight")
+    if series is not None:
+        days, day_counts, ma_vals, title, _ = series
+        update_daily_lines(figure, days, day_counts, ma_vals, 30, 'Daily Count', title)
+    else:
+        figure.show_notice("No messages for line chart")
+    figure.save(os.path.join(out_dir, "line.png"), dpi=dpi)
+    written.append("line.png")
+    return written
+
+def run_report(paths, out_dir, start_dt=None, end_dt=None, charts=True, use_cache=True, workers=None, dpi=None):
+    """
+    내보내기 파일(들)을 읽어 out_dir에 리포트를 쓰고 요약 dict를 반환.
+    start_dt/end_dt를 주면 통계·차트·요약 모두 그 기간만 센다.
+    """
+    messages, user_stats = load_exports(paths, workers=workers, use_cache=use_cache)
+    if start_dt and end_dt:
+        user_stats = range_user_stats(messages, start_dt, end_dt)
+    os.makedirs(out_dir, exist_ok=True)
+    write_user_stats(user_stats, out_dir)
+    files = ["users.csv", "users.json"]
+    if charts:
+        files += write_charts(messages, out_dir, start_dt, end_dt, dpi=dpi)
+
+    rows = messages.message_rows(start_dt, end_dt)
+    return {
+        "paths": [os.path.abspath(p) for p in paths],
+        "out_dir": os.path.abspath(out_dir),
+        "start": start_dt.isoformat(sep=" ") if start_dt else None,
+        "end": end_dt.isoformat(sep=" ") if end_dt else None,
+        "messages": len(rows),
+        "users": len(user_stats),
+        "first_message_time": from_minutes(messages.minutes[rows[0]]).isoformat(sep=" ") if len(rows) else None,
+        "last_message_time": from_minutes(messages.minutes[rows[-1]]).isoformat(sep=" ") if len(rows) else None,
+        "files": files,
+    }
+
+
+def _parse_date(text):
+    return datetime.strptime(text, "%Y-%m-%d")
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(prog="python -m report", description=__doc__,
+                                 formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("paths", nargs="+", help="같은 대화방의 내보내기 txt 파일(들)")
+    ap.add_argument("-o", "--out", default="report", help="결과를 쓸 디렉터리 (기본: report)")
+    ap.add_argument("--start", type=_parse_date, help="통계/차트 기간 시작일 (--end와 같이)")
+    ap.add_argument("--end", type=_parse_date, help="통계/차트 기간 마지막 날 (그날 23:59까지 포함)")
+    ap.add_argument("--no-charts", action="store_true", help="PNG 차트를 만들지 않는다 (matplotlib 없이 통계만)")
+    ap.add_argument("--no-cache", action="store_true", help="디스크 캐시를 읽지도 쓰지도 않는다")
+    ap.add_argument("--workers", type=int, default=None, help="파싱 프로세스 수 (기본: 코어 수)")
+    ap.add_argument("--dpi", type=float, default=None)
+    args = ap.parse_args(argv)
+
+    if (args.start is None) != (args.end is None):
+        ap.error("--start와 --end는 같이 지정해야 합니다")
+    end_dt = args.end + timedelta(hours=23, minutes=59, seconds=59) if args.end else None
+
+    try:
+        summary = run_report(args.paths, args.out, args.start, end_dt, charts=not args.no_charts,
+                             use_cache=not args.no_cache, workers=args.workers, dpi=args.dpi)
+    except (OSError, UnicodeDecodeError) as e:
+        print(f"[ERROR] {e}", file=sys.stderr)
+        return 1
+    print(f"{summary['messages']:,} messages, {summary['users']:,} users -> {summary['out_dir']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,61 +1,338 @@
 # stats.py
-from collections import defaultdict
+import numpy as np
 
-def analyze_user_activity(messages):
+from message_table import (
+    MessageTable, KIND_MESSAGE, KIND_JOIN, KIND_LEAVE, MINUTES_PER_DAY,
+    from_minutes, minutes_range, to_minutes
+)
+
+# 일자×사용자 누적 행렬 최대 칸 수 (int32 기준 약 256MB). 넘으면 만들지 않음
+MAX_DAILY_CELLS = 64_000_000
+
+class UserStats:
     """
-    주어진 messages 리스트를 바탕으로 사용자별 통계(user_stats)를 계산.
+    사용자 한 명의 통계. 구간(파일 조각, 날짜 구간, 다른 내보내기 파일)별로 따로 계산한 뒤
+    시간 순서대로 merge 하면 전체를 한 번에 계산한 것과 같은 결과가 된다.
+
+    - message_count / message_letters_count : 합
+    - first_message_time / last_message_time : min / max
+    - join_history : 시간 순서대로 이어 붙임
+    - joined / left / now_in : 입장·퇴장 순서에 따른 상태. 구간 안에 입장이 없으면
+      앞 구간의 상태에 따라 결과가 달라지므로, 입장 전에 처음 나간 시간(first_leave)을 따로 기억한다.
     """
-    from datetime import datetime  # 함수 안에서만 쓰이므로 내부 import
+    __slots__ = (
+        "message_count", "message_letters_count", "first_message_time", "last_message_time",
+        "joined", "left", "now_in", "join_history", "first_leave",
+    )
+
+    def __init__(self):
+        self.message_count = 0
+        self.message_letters_count = 0
+        self.first_message_time = None
+        self.last_message_time = None
+        self.joined = None
+        self.left = None
+        self.now_in = None
+        self.join_history = []
+        self.first_leave = None   # 이 구간에서 입장하기 전에 처음 나간 시간
+
+    def __eq__(self, other):
+        if not isinstance(other, UserStats):
+            return NotImplemented
+        return all(getattr(self, k) == getattr(other, k) for k in self.__slots__)
 
-    user_stats = defaultdict(lambda: {
-        "message_count": 0,
-        "first_message_time": None,
-        "last_message_time": None,
-        "message_letters_count":0,
-        "joined": None,
-        "left": None,
-        "now_in": None,
-        "join_history":[],
-    })
+    def __repr__(self):
+        fields = ", ".join(f"{k}={getattr(self, k)!r}" for k in self.__slots__ if k != "join_history")
+        return f"UserStats({fields})"
 
-    for msg in messages:
-        user = msg["user"]
-        if msg["type"] == "system":
-            # 입장/퇴장 처리
-            action = msg["action"]
-            if action == "들어왔습니다":
-                if user_stats[user]["joined"] is None:
-                    user_stats[user]["joined"] = msg["time"]
+    def copy(self):
+        st = UserStats()
+        for k in self.__slots__:
+            setattr(st, k, getattr(self, k))
+        st.join_history = list(self.join_history)
+        return st
 
-                user_stats[user]["left"] = None
-                user_stats[user]["now_in"] = True
-                # user_stats[user]["join_history"].append(msg["time"]+" " + "입장\n")
-                user_stats[user]["join_history"].append(msg["time"].strftime("%Y-%m-%d") + " 입장\n")
+    def add_join(self, t):
+        if self.joined is None:
+            self.joined = t
 
+        self.left = None
+        self.now_in = True
+        self.join_history.append(t.strftime("%Y-%m-%d") + " 입장\n")
 
+    def add_leave(self, t):
+        self.join_history.append(t.strftime("%Y-%m-%d") + " 퇴장\n")
+
+        if self.now_in: # 현재 입장 상태인 경우만 처리
+            self.left = t
+            self.now_in = False
+        elif self.joined is None and self.first_leave is None:
+            self.first_leave = t
+
+    def merge(self, other):
+        """
+        self 구간 바로 뒤에 이어지는 other 구간의 통계를 합친다 (self를 갱신하고 반환)
+        """
+        self.message_count += other.message_count
+        self.message_letters_count += other.message_letters_count
+        if other.first_message_time is not None:
+            if self.first_message_time is None or other.first_message_time < self.first_message_time:
+                self.first_message_time = other.first_message_time
+        if other.last_message_time is not None:
+            if self.last_message_time is None or other.last_message_time > self.last_message_time:
+                self.last_message_time = other.last_message_time
+
+        if other.joined is not None:
+            # other 안에 입장이 있으면 마지막 상태는 other만으로 정해진다
+            self.left = other.left
+            self.now_in = other.now_in
+        elif other.first_leave is not None and self.now_in:
+            self.left = other.first_leave
+            self.now_in = False
+        if self.joined is None:
+            if self.first_leave is None:
+                self.first_leave = other.first_leave
+            self.joined = other.joined
+        self.join_history = self.join_history + other.join_history
+        return self
+
+
+def merge_user_stats(*parts):
+    """
+    시간 순서대로 놓인 구간별 user_stats(dict: 이름 -> UserStats)를 하나로 합친 새 dict.
+    사용자 순서는 처음 등장한 순서를 유지한다.
+    """
+    merged = {}
+    for part in parts:
+        for user, st in part.items():
+            if user in merged:
+                merged[user].merge(st)
+            else:
+                merged[user] = st.copy()
+    return merged
 
-            # elif action == "나갔습니다":
-            #     if (user_stats[user]["left"] is None) or (msg["time"] > user_stats[user]["left"]):
-            #         user_stats[user]["left"] = msg["time"]
-            #         user_stats[user]["now_in"] = False
 
-            elif action == "나갔습니다":
-                user_stats[user]["join_history"].append(msg["time"].strftime("%Y-%m-%d") + " 퇴장\n")
+def analyze_user_activity(messages):
+    """
+    주어진 messages(MessageTable)를 바탕으로 사용자별 통계(user_stats: 이름 -> UserStats)를 계산.
+    dict 레코드 iterable(iter_kakao_chat 제너레이터 등)을 넘기면 MessageTable로 변환해서 사용.
+    """
+    if not isinstance(messages, MessageTable):
+        messages = MessageTable.from_records(messages)
 
-                if user_stats[user]["now_in"]: # 현재 입장 상태인 경우만 처리
-                    user_stats[user]["left"] = msg["time"]
-                    user_stats[user]["now_in"] = False
+    n_users = len(messages.users)
+    kinds = messages.kinds
+    is_msg = kinds == KIND_MESSAGE
 
+    # 일반 메시지: 사용자별 개수 / 글자 수 / 처음·마지막 시간 (벡터 연산)
+    msg_uids = messages.user_ids[is_msg]
+    msg_minutes = messages.minutes[is_msg]
+    counts = np.bincount(msg_uids, minlength=n_users)
+    letters = np.bincount(msg_uids, weights=messages.text_lens[is_msg], minlength=n_users).astype(np.int64)
+    first = np.full(n_users, np.iinfo(np.int64).max, dtype=np.int64)
+    last = np.full(n_users, np.iinfo(np.int64).min, dtype=np.int64)
+    np.minimum.at(first, msg_uids, msg_minutes)
+    np.maximum.at(last, msg_uids, msg_minutes)
 
-        else:
-            # 일반 메시지
-            user_stats[user]["message_count"] += 1
-            user_stats[user]["message_letters_count"] += len(msg["message"])
+    user_stats = {}
+    for uid, user in enumerate(messages.users):
+        st = user_stats[user] = UserStats()
+        st.message_count = int(counts[uid])
+        st.message_letters_count = int(letters[uid])
+        if st.message_count:
+            st.first_message_time = from_minutes(first[uid])
+            st.last_message_time = from_minutes(last[uid])
 
-            t = msg["time"]
-            if user_stats[user]["first_message_time"] is None or t < user_stats[user]["first_message_time"]:
-                user_stats[user]["first_message_time"] = t
-            if user_stats[user]["last_message_time"] is None or t > user_stats[user]["last_message_time"]:
-                user_stats[user]["last_message_time"] = t
+    # 입장/퇴장은 순서에 따라 상태가 바뀌므로 해당 행만 순서대로 처리
+    for i in np.flatnonzero(~is_msg):
+        st = user_stats[messages.users[messages.user_ids[i]]]
+        t = from_minutes(messages.minutes[i])
+        if kinds[i] == KIND_JOIN:
+            st.add_join(t)
+        elif kinds[i] == KIND_LEAVE:
+            st.add_leave(t)
 
     return user_stats
+
+
+# 사용자 테이블 정렬 기준 -> 정렬 키를 만드는 UserStats 속성 (user는 이름)
+SORT_COLUMNS = {
+    "user": None,
+    "message_count": "message_count",
+    "message_letters_count": "message_letters_count",
+    "first_message_time": "first_message_time",
+    "last_message_time": "last_message_time",
+    "joined_time": "joined",
+    "left_time": "left",
+}
+
+def _sort_key_array(names, stats, attr):
+    if attr is None:
+        return np.array([name.lower() for name in names])
+    values = [getattr(st, attr) for st in stats]
+    if attr in ("message_count", "message_letters_count"):
+        return np.array(values, dtype=np.int64)
+    # 시간이 없으면 가장 앞 (datetime.min 취급)
+    missing = np.iinfo(np.int64).min
+    return np.array([missing if t is None else to_minutes(t) for t in values], dtype=np.int64)
+
+class UserSortOrders:
+    """
+    user_stats의 사용자 순서(이름 번호)를 정렬 기준별 오름/내림차순으로 늘어놓은 순열을 로드 시 한 번 만든다.
+    정렬 기준이나 방향을 바꿀 때는 다시 정렬하지 않고 순열을 고르기만 하고,
+    검색 결과(이름 번호 일부)와 합칠 때도 순열에서 해당 번호만 골라낸다.
+    값이 같으면 list.sort(reverse=...)와 같이 원래 순서를 유지한다.
+    """
+    def __init__(self, user_stats):
+        names = list(user_stats)
+        stats = list(user_stats.values())
+        self.n = len(names)
+        self.orders = {}
+        self._positions = {}
+        for col, attr in SORT_COLUMNS.items():
+            key = _sort_key_array(names, stats, attr)
+            asc = np.argsort(key, kind="stable")
+            # 같은 값끼리 같은 순위 -> 순위 내림차순으로 stable 정렬하면 같은 값은 원래 순서 유지
+            sorted_key = key[asc]
+            new_value = np.ones(self.n, dtype=bool)
+            new_value[1:] = sorted_key[1:] != sorted_key[:-1]
+            rank = np.empty(self.n, dtype=np.int64)
+            rank[asc] = np.cumsum(new_value)
+            desc = np.argsort(-rank, kind="stable")
+            self.orders[col] = (asc, desc)
+
+    def order(self, col, descending=False, ids=None):
+        """
+        col 기준으로 정렬한 이름 번호 배열. ids(이름 번호 배열)를 주면 그 사용자만 남긴다.
+        모르는 기준이면 user 기준.
+        """
+        perm = self.orders.get(col, self.orders["user"])[1 if descending else 0]
+        if ids is None or len(ids) == self.n:
+            return perm
+        if len(ids) * 16 < self.n:
+            # 결과가 적으면 순열 안에서의 위치로 ids만 정렬 (O(k log k))
+            position = self.positions(col, descending)
+            return ids[np.argsort(position[ids])]
+        keep = np.zeros(self.n, dtype=bool)
+        keep[ids] = True
+        return perm[keep[perm]]
+
+    def positions(self, col, descending=False):
+        """
+        이름 번호 -> 정렬 순열 안에서의 위치 (처음 필요할 때 만들어 둠)
+        """
+        key = (col if col in self.orders else "user", descending)
+        if key not in self._positions:
+            perm = self.orders[key[0]][1 if descending else 0]
+            position = np.empty(self.n, dtype=np.int64)
+            position[perm] = np.arange(self.n)
+            self._positions[key] = position
+        return self._positions[key]
+
+
+class DailyUserCounts:
+    """
+    일자×사용자 메시지 수의 누적합(prefix sum) 행렬.
+    cum[d]는 first_day부터 d일 전까지 사용자별 메시지 수이므로,
+    어떤 기간이든 행 두 개의 차 + 양 끝의 하루치 조각만으로 사용자별 개수를 구한다.
+    열은 메시지를 한 번이라도 쓴 사용자(posters)만 둔다.
+    """
+    def __init__(self, messages, first_day, posters, cum):
+        self.messages = messages
+        self.first_day = first_day
+        self.posters = posters
+        self.cum = cum
+
+    @property
+    def n_days(self):
+        return self.cum.shape[0] - 1
+
+    def _rows_count(self, lo, hi):
+        rows = self.messages.message_rows_by_minutes(lo, hi)
+        return np.bincount(self.messages.user_ids[rows], minlength=len(self.messages.users))
+
+    def _scatter(self, poster_counts):
+        counts = np.zeros(len(self.messages.users), dtype=np.int64)
+        counts[self.posters] = poster_counts
+        return counts
+
+    def range_counts(self, start_dt=None, end_dt=None):
+        """
+        start_dt~end_dt 사이 사용자별 메시지 수 (user id 순서 int64 배열). 범위가 없으면 전체.
+        """
+        if not (start_dt and end_dt):
+            return self._scatter(self.cum[-1])
+
+        lo, hi = minutes_range(start_dt, end_dt)
+        # 범위 안에 온전히 들어가는 날짜 [day_lo, day_hi)
+        day_lo = -(-lo // MINUTES_PER_DAY)
+        day_hi = (hi + 1) // MINUTES_PER_DAY
+        if day_lo >= day_hi:
+            return self._rows_count(lo, hi).astype(np.int64)
+
+        a = min(max(day_lo - self.first_day, 0), self.n_days)
+        b = min(max(day_hi - self.first_day, 0), self.n_days)
+        counts = self._scatter(self.cum[b].astype(np.int64) - self.cum[a])
+        # 하루가 안 되는 앞/뒤 조각
+        if lo < day_lo * MINUTES_PER_DAY:
+            counts += self._rows_count(lo, day_lo * MINUTES_PER_DAY - 1)
+        if hi >= day_hi * MINUTES_PER_DAY:
+            counts += self._rows_count(day_hi * MINUTES_PER_DAY, hi)
+        return counts
+
+
+def build_daily_user_counts(messages, max_cells=MAX_DAILY_CELLS):
+    """
+    로드 시 한 번 DailyUserCounts를 만든다.
+    일수×사용자 수가 max_cells를 넘으면 None (이 경우 구간 인덱스로 직접 센다).
+    """
+    rows = messages.message_rows()
+    uids = messages.user_ids[rows]
+    posters = np.flatnonzero(np.bincount(uids, minlength=len(messages.users)))
+    if not len(rows):
+        return DailyUserCounts(messages, 0, posters, np.zeros((1, 0), dtype=np.int32))
+
+    days = messages.minutes[rows] // MINUTES_PER_DAY
+    first_day = int(days[0])
+    n_days = int(days[-1]) - first_day + 1
+    n_cols = len(posters)
+    if n_days * n_cols > max_cells:
+        return None
+
+    col_of_user = np.zeros(len(messages.users), dtype=np.int64)
+    col_of_user[posters] = np.arange(n_cols)
+    flat = (days - first_day) * n_cols + col_of_user[uids]
+    cum = np.zeros((n_days + 1, n_cols), dtype=np.int32)
+    cum[1:] = np.bincount(flat, minlength=n_days * n_cols).reshape(n_days, n_cols)
+    np.cumsum(cum, axis=0, out=cum)
+    return DailyUserCounts(messages, first_day, posters, cum)
+
+
+def count_messages_by_user(messages, start_dt=None, end_dt=None, daily_counts=None):
+    """
+    기간 내 사용자별 메시지 수 (user id 순서 배열).
+    daily_counts가 있으면 누적 행렬로, 없으면 시간순 인덱스 구간을 직접 센다.
+    """
+    if daily_counts is not None:
+        return daily_counts.range_counts(start_dt, end_dt)
+    rows = messages.message_rows(start_dt, end_dt)
+    return np.bincount(messages.user_ids[rows], minlength=len(messages.users))
+
+
+def top_users(counts, k=20):
+    """
+    사용자별 개수 배열에서 상위 k명의 user id (개수 내림차순, 동률이면 id 순) + 나머지 합계
+    """
+    nonzero = np.flatnonzero(counts)
+    if len(nonzero) > k:
+        c = counts[nonzero]
+        kth = -np.partition(-c, k - 1)[k - 1]   # k번째로 큰 값
+        above = nonzero[c > kth]
+        tied = nonzero[c == kth][:k - len(above)]
+        top = np.concatenate([above, tied])
+        others = int(counts.sum() - counts[top].sum())
+    else:
+        top = nonzero
+        others = 0
+    top = top[np.lexsort((top, -counts[top]))]
+    return top, others
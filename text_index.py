@@ -0,0 +1,300 @@
+# text_index.py
+import numpy as np
+
+from message_table import ChainedBuffer, minutes_range
+
+# 색인 키 = 앞 글자 코드 포인트 << 21 | 뒷 글자 코드 포인트 (코드 포인트는 21비트 미만)
+# 한 글자 키는 앞 글자 자리에 실제로 나올 수 없는 값(UNIGRAM)을 넣는다
+CP_BITS = 21
+UNIGRAM = (1 << CP_BITS) - 1
+ROW_BITS = 22                  # 세그먼트 안의 메시지 번호 비트 수 (키와 합쳐 uint64 하나로 정렬)
+SEGMENT_BYTES = 2 * 1024 * 1024    # 색인 중 임시 배열은 본문 바이트의 수십 배이므로 세그먼트를 작게 둔다
+SEGMENT_ROWS = 1 << ROW_BITS
+
+def normalize(text):
+    """
+    색인/검색 공통 정규화: ASCII 대문자만 소문자로 (bytes.lower()와 같은 규칙)
+    """
+    return "".join(c.lower() if c.isascii() else c for c in text)
+
+def _query_keys(query):
+    cps = [ord(c) for c in query]
+    if len(cps) == 1:
+        return [UNIGRAM << CP_BITS | cps[0]]
+    return sorted({a << CP_BITS | b for a, b in zip(cps, cps[1:])})
+
+# ---- varint (7비트씩, 최상위 비트가 1이면 다음 바이트가 이어짐) -----------------
+def _varint_encode(values):
+    """
+    0 이상 정수 배열 -> (바이트 배열, 각 값의 시작 위치)
+    """
+    # 세그먼트 안의 값/위치는 32비트에 들어가므로 값이 작으면 32비트로 계산한다
+    wide = len(values) and int(values.max()) >= 2 ** 32
+    vtype = np.uint64 if wide else np.uint32
+    values = values.astype(vtype)
+    nbytes = np.ones(len(values), dtype=np.int32)
+    rest = values >> vtype(7)
+    while rest.any():
+        nbytes += rest > 0
+        rest >>= vtype(7)
+    del rest
+    ends = np.cumsum(nbytes, dtype=np.int64 if wide else np.int32)
+    starts = ends - nbytes
+    out = np.empty(int(ends[-1]) if len(ends) else 0, dtype=np.uint8)
+    del ends
+    for k in range(int(nbytes.max()) if len(nbytes) else 0):
+        sel = nbytes > k
+        byte = (values[sel] >> vtype(7 * k)) & vtype(0x7F)
+        byte |= (nbytes[sel] > k + 1).astype(vtype) << vtype(7)
+        out[starts[sel] + k] = byte
+    return out, starts
+
+def _varint_decode(data):
+    """
+    바이트 배열 -> 정수 배열 (int64)
+    """
+    if not len(data):
+        return np.zeros(0, dtype=np.int64)
+    last = (data & 0x80) == 0
+    value_ends = np.flatnonzero(last)
+    value_starts = np.concatenate([[0], value_ends[:-1] + 1])
+    shift = np.arange(len(data)) - np.repeat(value_starts, value_ends - value_starts + 1)
+    parts = (data & 0x7F).astype(np.int64) << (7 * shift)
+    return np.add.reduceat(parts, value_starts)
+
+
+class _Segment:
+    """
+    연속한 메시지 묶음 하나의 역색인.
+    keys[i]의 게시 목록(세그먼트 안 메시지 번호, 오름차순)은 data[offsets[i]:offsets[i + 1]]에
+    차이값(delta)을 varint로 압축해 저장한다. rows는 세그먼트 안 번호 -> 테이블 행 번호.
+    """
+    def __init__(self, rows, keys, offsets, data, min_minute, max_minute):
+        self.rows = rows
+        self.keys = keys
+        self.offsets = offsets
+        self.data = data
+        self.min_minute = min_minute
+        self.max_minute = max_minute
+
+    @property
+    def nbytes(self):
+        return self.rows.nbytes + self.keys.nbytes + self.offsets.nbytes + self.data.nbytes
+
+    def postings(self, key):
+        i = np.searchsorted(self.keys, key)
+        if i == len(self.keys) or self.keys[i] != key:
+            return None
+        return np.cumsum(_varint_decode(self.data[self.offsets[i]:self.offsets[i + 1]]))
+
+    def lookup(self, keys):
+        """
+        keys를 모두 가진 메시지의 테이블 행 번호 배열
+        """
+        lists = []
+        for key in keys:
+            p = self.postings(key)
+            if p is None:
+                return self.rows[:0]
+            lists.append(p)
+        lists.sort(key=len)
+        local = lists[0]
+        for p in lists[1:]:
+            local = np.intersect1d(local, p, assume_unique=True)
+        return self.rows[local]
+
+
+def _spans_index(starts, lengths):
+    """
+    [starts[i], starts[i] + lengths[i]) 구간들을 이어 붙인 위치 배열 (repeat 없이 cumsum 한 번).
+    위치가 int32에 들어가면(버퍼 2GB 미만) int32로 만들어 바이트당 임시 메모리를 줄인다.
+    """
+    keep = lengths > 0
+    starts, lengths = starts[keep], lengths[keep]
+    total = int(lengths.sum())
+    dtype = np.int32 if not total or int(starts.max()) + int(lengths.max()) < 2 ** 31 else np.int64
+    step = np.ones(total, dtype=dtype)
+    if total:
+        first = np.cumsum(lengths) - lengths
+        step[first] = starts - np.concatenate([[1], starts[:-1] + lengths[:-1]]) + 1
+    return np.cumsum(step, out=step)
+
+def _gather_bytes(messages, rows):
+    """
+    rows 메시지 본문 bytes를 이어 붙인 uint8 배열 (본문 버퍼가 파일 전체여도 복사는 이 구간만)
+    """
+    buf = messages.text_buf
+    starts = messages.text_starts[rows]
+    nbytes = messages.text_nbytes[rows].astype(np.int64)
+    if not isinstance(buf, ChainedBuffer):
+        if not len(buf):
+            return np.zeros(int(nbytes.sum()), dtype=np.uint8), nbytes
+        return np.frombuffer(buf, dtype=np.uint8)[_spans_index(starts, nbytes)], nbytes
+
+    out = np.empty(int(nbytes.sum()), dtype=np.uint8)
+    out_starts = np.cumsum(nbytes) - nbytes
+    which = np.searchsorted(buf.offsets, starts, side="right") - 1
+    for j, (b, base) in enumerate(zip(buf.buffers, buf.offsets)):
+        sel = np.flatnonzero(which == j)
+        if len(sel) and len(b):
+            n = nbytes[sel]
+            out[_spans_index(out_starts[sel], n)] = np.frombuffer(b, dtype=np.uint8)[_spans_index(starts[sel] - base, n)]
+    return out, nbytes
+
+def _decode_utf8(b):
+    """
+    UTF-8 bytes 배열 -> (글자 시작 바이트 위치, 코드 포인트) 배열. ASCII 대문자는 소문자로.
+    """
+    lead = np.flatnonzero((b & 0xC0) != 0x80).astype(np.int32)   # 세그먼트는 2GB보다 훨씬 작다
+    padded = np.concatenate([b, np.zeros(3, dtype=np.uint8)])
+    # 바이트 배열은 uint8 그대로 두고 글자 단위로 고른 값만 uint32로 넓힌다
+    b0 = padded[lead].astype(np.uint32)
+    b1 = padded[lead + 1].astype(np.uint32) & 0x3F
+    b2 = padded[lead + 2].astype(np.uint32) & 0x3F
+    b3 = padded[lead + 3].astype(np.uint32) & 0x3F
+    cp = np.where(
+        b0 < 0x80, b0,
+        np.where(b0 < 0xE0, (b0 & 0x1F) << 6 | b1,
+                 np.where(b0 < 0xF0, (b0 & 0x0F) << 12 | b1 << 6 | b2,
+                          (b0 & 0x07) << 18 | b1 << 12 | b2 << 6 | b3)))
+    upper = (cp >= 0x41) & (cp <= 0x5A)
+    cp[upper] += 0x20
+    return lead, cp
+
+def _first_of_run(sorted_values):
+    """
+    정렬된 배열에서 값이 바뀌는 첫 위치면 True
+    """
+    first = np.ones(len(sorted_values), dtype=bool)
+    first[1:] = sorted_values[1:] != sorted_values[:-1]
+    return first
+
+def _build_segment(messages, rows):
+    b, nbytes = _gather_bytes(messages, rows)
+    lead, cp = _decode_utf8(b)
+    del b
+    # 바이트/글자 단위 임시 배열은 32비트로 두고, 정렬 키를 만들 때만 64비트로 넓힌다
+    local = np.repeat(np.arange(len(rows), dtype=np.uint32), nbytes.astype(np.int32))[lead]
+    del lead
+
+    # (키, 메시지 번호)를 uint64 하나로 합쳐(2-gram 다음에 1-gram) 제자리에서 정렬 + 중복 제거
+    # (np.unique는 값 종류가 많으면 해시 방식이라 정렬보다 훨씬 느리다)
+    same_row = local[1:] == local[:-1]
+    n_bigrams = int(np.count_nonzero(same_row))
+    entries = np.empty(n_bigrams + len(cp), dtype=np.uint64)
+    bigram, unigram = entries[:n_bigrams], entries[n_bigrams:]
+    bigram[:] = cp[:-1][same_row]
+    bigram <<= np.uint64(CP_BITS)
+    bigram |= cp[1:][same_row]
+    unigram[:] = cp
+    unigram |= np.uint64(UNIGRAM << CP_BITS)
+    entries <<= np.uint64(ROW_BITS)
+    bigram |= local[:-1][same_row]
+    unigram |= local
+    del bigram, unigram, cp, local, same_row
+    entries.sort()
+    entries = entries[_first_of_run(entries)]
+    keys = entries >> np.uint64(ROW_BITS)
+    locals_ = (entries & np.uint64(SEGMENT_ROWS - 1)).astype(np.int32)
+    del entries
+
+    key_starts = np.flatnonzero(_first_of_run(keys))
+    unique_keys = keys[key_starts].astype(np.int64)
+    del keys
+    deltas = np.diff(locals_, prepend=np.int32(0))
+    deltas[key_starts] = locals_[key_starts]
+    data, value_starts = _varint_encode(deltas)
+    offsets = np.append(value_starts[key_starts], len(data)).astype(np.int64)
+
+    minutes = messages.minutes[rows]
+    return _Segment(rows, unique_keys, offsets, data, int(minutes.min()), int(minutes.max()))
+
+
+def _contains(messages, rows, needle):
+    """
+    rows 중 본문(ASCII 소문자화)에 needle bytes가 들어 있는 행만 (후보 본문을 모아 한 번에 비교)
+    """
+    b, nbytes = _gather_bytes(messages, rows)
+    b[(b >= 0x41) & (b <= 0x5A)] += 0x20
+    ends = np.cumsum(nbytes)
+    pattern = np.frombuffer(needle, dtype=np.uint8)
+    # 첫 바이트가 같은 위치에서 시작해 한 바이트씩 후보를 줄인다
+    pos = np.flatnonzero(b[:max(len(b) - len(pattern) + 1, 0)] == pattern[0])
+    for j in range(1, len(pattern)):
+        pos = pos[b[pos + j] == pattern[j]]
+    row = np.searchsorted(ends, pos, side="right")
+    inside = pos + len(pattern) <= ends[row]   # 다음 메시지에 걸친 일치는 제외
+    hit = np.zeros(len(rows), dtype=bool)
+    hit[row[inside]] = True
+    return rows[hit]
+
+
+class MessageTextIndex:
+    """
+    메시지 본문 전문 검색용 역색인 (글자 2-gram + 1-gram).
+    형태소 분석 없이 두 글자 단위로 색인하므로 한국어도 띄어쓰기와 상관없이 부분 문자열로 찾는다.
+    메시지는 SEGMENT_BYTES 단위 세그먼트로 나눠 색인하고, 게시 목록은 delta + varint로 압축한다.
+    """
+    def __init__(self, messages, segments):
+        self.messages = messages
+        self.segments = segments
+
+    @property
+    def nbytes(self):
+        return sum(seg.nbytes for seg in self.segments)
+
+    def search(self, query, user=None, start_dt=None, end_dt=None):
+        """
+        query를 포함하는 메시지 행 번호 배열 (시간순).
+        user(이름)와 start_dt~end_dt로 거를 수 있다. 검색어는 대소문자(ASCII) 무시.
+        """
+        messages = self.messages
+        query = normalize(query.strip())
+        if not query:
+            return np.zeros(0, dtype=np.int64)
+        uid = None
+        if user is not None:
+            uid = messages.user_index.get(user)
+            if uid is None:
+                return np.zeros(0, dtype=np.int64)
+        lo = hi = None
+        if start_dt and end_dt:
+            lo, hi = minutes_range(start_dt, end_dt)
+
+        keys = _query_keys(query)
+        found = []
+        for seg in self.segments:
+            if lo is not None and (seg.max_minute < lo or seg.min_minute > hi):
+                continue
+            rows = seg.lookup(keys)
+            if uid is not None:
+                rows = rows[messages.user_ids[rows] == uid]
+            if lo is not None:
+                m = messages.minutes[rows]
+                rows = rows[(m >= lo) & (m <= hi)]
+            found.append(rows)
+        rows = np.concatenate(found) if found else np.zeros(0, dtype=np.int64)
+
+        if len(query) > 2:
+            # 2-gram이 모두 있어도 이어져 있지 않을 수 있으므로 후보만 실제 본문으로 확인
+            rows = _contains(messages, rows, query.encode("utf-8"))
+
+        order = np.argsort(messages.minutes[rows], kind="stable")
+        return rows[order]
+
+
+def build_text_index(messages, segment_bytes=SEGMENT_BYTES):
+    """
+    일반 메시지 전체를 색인한 MessageTextIndex. 본문 bytes 합이 segment_bytes 정도가 되도록 나눠 만든다.
+    """
+    rows = np.flatnonzero(messages.message_mask())
+    cum = np.cumsum(messages.text_nbytes[rows].astype(np.int64))
+    segments = []
+    start = 0
+    while start < len(rows):
+        base = cum[start - 1] if start else 0
+        stop = int(np.searchsorted(cum, base + segment_bytes, side="right"))
+        stop = min(max(stop, start + 1), start + SEGMENT_ROWS)
+        segments.append(_build_segment(messages, rows[start:stop]))
+        start = stop
+    return MessageTextIndex(messages, segments)
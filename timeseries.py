@@ -0,0 +1,80 @@
+# timeseries.py
+from datetime import timedelta
+
+import numpy as np
+
+from message_table import EPOCH, MINUTES_PER_DAY
+
+def daily_series(minutes, first_day=None, last_day=None):
+    """
+    epoch 분 배열을 날짜별 개수로 집계 (메시지가 없는 날도 0으로 포함).
+    반환: (epoch 일 번호 배열, 날짜별 개수 배열). first_day/last_day를 주면 그 구간으로 맞춘다.
+    """
+    days = np.asarray(minutes) // MINUTES_PER_DAY
+    if first_day is None:
+        first_day = int(days.min()) if len(days) else 0
+    if last_day is None:
+        last_day = int(days.max()) if len(days) else first_day - 1
+    n_days = max(last_day - first_day + 1, 0)
+
+    days = days[(days >= first_day) & (days <= last_day)]
+    counts = np.bincount(days - first_day, minlength=n_days)
+    return np.arange(first_day, first_day + n_days, dtype=np.int64), counts
+
+def moving_average(values, window):
+    """
+    후행(trailing) 이동평균. 앞쪽 window-1개는 있는 값만으로 평균을 낸다.
+    누적합을 이용해 O(n)
+    """
+    values = np.asarray(values, dtype=np.float64)
+    n = len(values)
+    csum = np.concatenate(([0.0], np.cumsum(values)))
+    end = np.arange(1, n + 1)
+    start = np.maximum(end - window, 0)
+    return (csum[end] - csum[start]) / (end - start)
+
+def day_to_datetime(day):
+    """
+    epoch 일 번호 -> datetime (00:00)
+    """
+    return EPOCH + timedelta(days=int(day))
+
+def day_labels(days):
+    """
+    epoch 일 번호 배열 -> 'YYYY-MM-DD' 문자열 리스트
+    """
+    return [day_to_datetime(d).strftime("%Y-%m-%d") for d in days]
+
+def lttb(x, y, n_out):
+    """
+    Largest-Triangle-Three-Buckets 다운샘플링. (x, y) 점 중 n_out개의 인덱스(오름차순)를 고른다.
+    처음/마지막 점은 항상 남기고, 가운데 점들을 n_out-2개 구간으로 나눠 구간마다
+    (직전에 고른 점, 이 구간의 점, 다음 구간 평균점)이 만드는 삼각형이 가장 큰 점 하나를 고르므로
+    봉우리/골짜기가 살아남는다. n_out이 점 수 이상이면 전부 반환.
+    """
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    # 가운데 점 [1, n-1)을 n_out-2개 구간으로. 구간 i = [bounds[i], bounds[i+1])
+    bounds = (1 + np.arange(n_out - 1) * (n - 2) / (n_out - 2)).astype(np.int64)
+    bounds[-1] = n - 1
+    sizes = np.diff(bounds)
+    # 구간별 평균점 (다음 구간 평균으로 쓰고, 마지막 구간 다음은 마지막 점)
+    avg_x = np.append(np.add.reduceat(x[:-1], bounds[:-1]) / sizes, x[-1])
+    avg_y = np.append(np.add.reduceat(y[:-1], bounds[:-1]) / sizes, y[-1])
+
+    picked = np.empty(n_out, dtype=np.int64)
+    picked[0] = 0
+    picked[-1] = n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = bounds[i], bounds[i + 1]
+        bx, by = x[lo:hi], y[lo:hi]
+        cx, cy = avg_x[i + 1], avg_y[i + 1]
+        area = np.abs((x[a] - cx) * (by - y[a]) - (x[a] - bx) * (cy - y[a]))
+        a = lo + int(area.argmax())
+        picked[i + 1] = a
+    return picked
@@ -0,0 +1,223 @@
+# virtual_table.py
+import tkinter as tk
+from tkinter import ttk
+
+class VirtualTreeview(ttk.Treeview):
+    """
+    화면에 보이는 줄 수만큼만 항목(item)을 만들어 두고, 스크롤할 때 그 항목들의 내용만 바꿔 끼우는 Treeview.
+    행 데이터는 set_rows(행 수, row_getter)로 넘기고, row_getter(i)는 i번째 행의 (text, values)를 돌려준다.
+    보이는 행만 row_getter로 만들기 때문에 갱신 비용이 전체 행 수와 무관하다.
+
+    스크롤바는 평소처럼 yscrollcommand=scroll.set, scroll.config(command=tree.yview)로 연결한다.
+    """
+    def __init__(self, master=None, **kw):
+        self._yscrollcommand = kw.pop("yscrollcommand", None)
+        super().__init__(master, **kw)
+        self.row_count = 0
+        self.row_getter = None
+        self.top = 0                  # 맨 위에 보이는 행 번호
+        self.visible = int(kw.get("height", 10))
+        self.selected = None          # 선택된 행 번호 (화면 밖으로 스크롤해도 유지)
+
+        self.bind("<Configure>", self._on_configure, add="+")
+        self.bind("<<TreeviewSelect>>", self._on_select, add="+")
+        self.bind("<MouseWheel>", self._on_wheel, add="+")
+        self.bind("<Button-4>", lambda e: self._scroll_by(-3), add="+")
+        self.bind("<Button-5>", lambda e: self._scroll_by(3), add="+")
+        self.bind("<Up>", lambda e: self._move_selection(-1))
+        self.bind("<Down>", lambda e: self._move_selection(1))
+        self.bind("<Prior>", lambda e: self._move_selection(-self.visible))
+        self.bind("<Next>", lambda e: self._move_selection(self.visible))
+        self.bind("<Home>", lambda e: self._move_selection(-self.row_count))
+        self.bind("<End>", lambda e: self._move_selection(self.row_count))
+
+    # ---- 데이터 ------------------------------------------------------------
+    def set_rows(self, row_count, row_getter):
+        """
+        새 행 데이터로 바꾸고 맨 위부터 다시 그린다
+        """
+        self.row_count = row_count
+        self.row_getter = row_getter
+        self.top = 0
+        self.selected = None
+        self._render()
+
+    def selected_row(self):
+        """
+        선택된 행 번호 (없으면 None)
+        """
+        return self.selected
+
+    # ---- 스크롤 ------------------------------------------------------------
+    def yview(self, *args):
+        """
+        스크롤바 command. ("moveto", 비율) / ("scroll", n, "units"|"pages")
+        """
+        if not args:
+            return self._fractions()
+        if args[0] == "moveto":
+            self._scroll_to(round(float(args[1]) * self.row_count))
+        elif args[0] == "scroll":
+            n = int(args[1])
+            self._scroll_by(n * self.visible if args[2] == "pages" else n)
+
+    def see_row(self, i):
+        if i < self.top:
+            self._scroll_to(i)
+        elif i >= self.top + self.visible:
+            self._scroll_to(i - self.visible + 1)
+
+    def _fractions(self):
+        if not self.row_count:
+            return 0.0, 1.0
+        return self.top / self.row_count, min(self.top + self.visible, self.row_count) / self.row_count
+
+    def _scroll_by(self, n):
+        self._scroll_to(self.top + n)
+        return "break"
+
+    def _scroll_to(self, top):
+        top = max(0, min(top, self.row_count - self.visible))
+        if top != self.top:
+            self.top = top
+            self._render()
+
+    def _on_wheel(self, event):
+        # Windows는 delta가 120 단위, macOS는 작은 값
+        step = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        return self._scroll_by(-3 * step)
+
+    def _move_selection(self, n):
+        if not self.row_count:
+            return "break"
+        i = 0 if self.selected is None else max(0, min(self.selected + n, self.row_count - 1))
+        self.selected = i
+        self.see_row(i)
+        self._render()
+        return "break"
+
+    # ---- 그리기 ------------------------------------------------------------
+    def _on_configure(self, event):
+        # 실제 높이에 들어가는 줄 수 = (창 높이 - 첫 줄 위치) // 줄 높이
+        children = self.get_children()
+        bbox = self.bbox(children[0]) if children else None
+        if not bbox:
+            return
+        _, y, _, row_height = bbox
+        visible = max(1, (event.height - y) // max(row_height, 1))
+        if visible != self.visible:
+            self.visible = visible
+            self.top = max(0, min(self.top, self.row_count - self.visible))
+            self._render()
+
+    def _on_select(self, event):
+        # _render의 selection_set도 이 이벤트를 내지만 같은 행을 가리키므로 그대로 반영해도 된다
+        sel = self.selection()
+        if sel:
+            self.selected = self.top + int(sel[0])
+
+    def _render(self):
+        n = max(0, min(self.visible, self.row_count - self.top))
+        children = self.get_children()
+        if len(children) > n:
+            self.delete(*children[n:])
+        for k in range(n):
+            text, values = self.row_getter(self.top + k)
+            if k < len(children):
+                self.item(str(k), text=text, values=values)
+            else:
+                self.insert("", "end", iid=str(k), text=text, values=values)
+
+        if self.selected is not None and self.top <= self.selected < self.top + n:
+            self.selection_set(str(self.selected - self.top))
+        else:
+            self.selection_set(())
+        if self._yscrollcommand is not None:
+            self._yscrollcommand(*self._fractions())
+
+
+class PagedText(tk.Text):
+    """
+    줄이 아주 많은 읽기 전용 텍스트. 전체 중 window줄만 Text에 넣어 두고,
+    스크롤이 그 구간 끝에 가까워지면 현재 위치를 가운데로 하는 구간으로 바꿔 끼운다.
+    줄 내용은 set_lines(줄 수, line_getter)로 넘기고, line_getter(i)는 i번째 줄 문자열(개행 제외)을 돌려준다.
+
+    스크롤바는 yscrollcommand=scroll.set, scroll.config(command=text.yview)로 연결하며 전체 줄 기준 비율로 표시된다.
+    """
+    EDGE = 0.2   # 구간 앞/뒤 이 비율 안으로 들어오면 구간을 옮긴다
+
+    def __init__(self, master=None, window=300, **kw):
+        self._yscrollcommand = kw.pop("yscrollcommand", None)
+        super().__init__(master, yscrollcommand=self._on_text_scroll, **kw)
+        self.window = window
+        self.line_count = 0
+        self.line_getter = None
+        self.start = 0   # Text에 들어 있는 줄 구간 [start, end)
+        self.end = 0
+        self._shift_pending = False
+        self.highlight = None   # 강조 표시할 줄 번호
+        self.tag_configure("highlight", background="#fff2a8")
+        self.config(state="disabled")
+
+    def set_lines(self, line_count, line_getter):
+        self.line_count = line_count
+        self.line_getter = line_getter
+        self._render(0, 0)
+
+    def see_line(self, i, highlight=True):
+        """
+        i번째 줄이 맨 위에 오도록 스크롤 (highlight면 그 줄을 강조 표시)
+        """
+        if highlight:
+            self.highlight = i
+        self._render(i - self.window // 2, i)
+
+    def yview(self, *args):
+        """
+        스크롤바 command. moveto는 전체 줄 기준 비율로 받아 필요하면 구간을 바꾼다
+        """
+        if not args:
+            return self._fractions(*super().yview())
+        if args[0] == "moveto":
+            target = min(int(float(args[1]) * self.line_count), max(self.line_count - 1, 0))
+            in_window = self.start <= target < self.end
+            if in_window and (target < self.end - self.window * self.EDGE or self.end == self.line_count):
+                super().yview(f"{target - self.start + 1}.0")
+            else:
+                self._render(target - self.window // 2, target)
+        else:
+            super().yview(*args)
+
+    def _fractions(self, first, last):
+        if not self.line_count:
+            return 0.0, 1.0
+        n = self.end - self.start
+        return (self.start + float(first) * n) / self.line_count, (self.start + float(last) * n) / self.line_count
+
+    def _render(self, start, top_line):
+        start = max(0, min(start, self.line_count - self.window))
+        end = min(start + self.window, self.line_count)
+        self.config(state="normal")
+        self.delete("1.0", "end")
+        self.insert("1.0", "\n".join(self.line_getter(i) for i in range(start, end)))
+        if self.highlight is not None and start <= self.highlight < end:
+            line = self.highlight - start + 1
+            self.tag_add("highlight", f"{line}.0", f"{line}.end")
+        self.config(state="disabled")
+        self.start, self.end = start, end
+        super().yview(f"{top_line - start + 1}.0")
+
+    def _on_text_scroll(self, first, last):
+        # 마우스 휠/키보드 등 Text 자체 스크롤도 여기로 들어온다
+        if self._yscrollcommand is not None:
+            self._yscrollcommand(*self._fractions(first, last))
+        near_top = float(first) < self.EDGE and self.start > 0
+        near_bottom = float(last) > 1 - self.EDGE and self.end < self.line_count
+        if (near_top or near_bottom) and not self._shift_pending:
+            self._shift_pending = True
+            self.after_idle(self._recenter)
+
+    def _recenter(self):
+        self._shift_pending = False
+        top = self.start + int(self.index("@0,0").split(".")[0]) - 1
+        self._render(top - self.window // 2, top)